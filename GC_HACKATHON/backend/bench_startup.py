@@ -0,0 +1,85 @@
+"""Import-time budget check for worker cold starts.
+
+Every module is imported in a fresh interpreter with outbound network blocked, so an
+import that scrapes, calls an API or builds a client eagerly fails outright. The median
+import time over --repeat runs is compared with each module's budget.
+
+    python bench_startup.py                 # from GC_HACKATHON/backend
+    python bench_startup.py --budget-ms 800 --repeat 7
+    IMPORT_BUDGET_SCALE=2 python bench_startup.py   # slower CI machines
+
+Exits with status 1 if any module is over budget or touches the network at import.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+PIPELINE_DIR = BACKEND_DIR.parent / "cricket_pipeline"
+
+# (working directory, module, budget in ms)
+TARGETS = [
+    (BACKEND_DIR, "main", 1500),
+    (BACKEND_DIR, "commentary_agents", 100),
+    (PIPELINE_DIR, "agents.agent", 100),
+    (PIPELINE_DIR, "ingestion.match_finder", 500),
+]
+
+PROBE = """
+import socket, sys, time
+
+def _blocked(*args, **kwargs):
+    raise RuntimeError("network I/O during import")
+
+socket.socket.connect = _blocked
+socket.create_connection = _blocked
+socket.getaddrinfo = _blocked
+sys.path.insert(0, ".")
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def time_import(cwd: Path, module: str) -> float:
+    env = dict(os.environ)
+    # Imports must not depend on credentials being present
+    env.pop("GROQ_API_KEY", None)
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None, help="override every module's budget")
+    args = parser.parse_args()
+    scale = float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+
+    failed = False
+    print(f"{'module':<28}{'median ms':>12}{'budget ms':>12}  result")
+    for cwd, module, budget_ms in TARGETS:
+        budget_ms = (args.budget_ms or budget_ms) * scale
+        try:
+            samples = [time_import(cwd, module) * 1000 for _ in range(args.repeat)]
+        except RuntimeError as e:
+            failed = True
+            print(f"{module:<28}{'-':>12}{budget_ms:>12.0f}  FAIL ({e})")
+            continue
+        median_ms = statistics.median(samples)
+        ok = median_ms <= budget_ms
+        failed = failed or not ok
+        print(f"{module:<28}{median_ms:>12.1f}{budget_ms:>12.0f}  {'ok' if ok else 'OVER BUDGET'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import os
+import time
+from functools import lru_cache
+
+from llm_scheduler import record_usage
+from metrics import AGENT_ERRORS, AGENT_RUN_SECONDS, LLM_TOKENS, TOOL_CALL_SECONDS
+from search_cache import PREFETCH_QUERY, SEARCH_CACHE
+from semantic_cache import CURRENT_SITUATION, SEMANTIC_CACHE
+
+# phi and groq are imported inside the builders below: importing this module must stay
+# cheap and must not need GROQ_API_KEY, so workers boot and tests collect quickly.
+#
+# Agents keep per-run state (run_id, run_response, memory) on the instance and share
+# nothing safely between concurrent runs, so every run builds its own agents with
+# new_commentary_agent(). Each agent also gets its own Groq model object
+# (phi registers an agent's tools on its model); the HTTP clients underneath are shared.
+
+
+@lru_cache(maxsize=None)
+def _groq_clients():
+    from groq import AsyncGroq, Groq as GroqClient
+
+    # Ensure the environment variable 'GROQ_API_KEY' is set
+    groq_api_key = os.getenv("GROQ_API_KEY")
+    if not groq_api_key:
+        raise ValueError("GROQ_API_KEY environment variable not set.")
+    return GroqClient(api_key=groq_api_key), AsyncGroq(api_key=groq_api_key)
+
+
+def get_model():
+    """Initialize a Groq model (one per agent) over the shared clients"""
+    if os.getenv("LLM_PROVIDER", "groq").lower() == "fake":
+        # Offline load testing, see fake_llm.py
+        from fake_llm import fake_groq_from_env
+        return fake_groq_from_env()
+
+    from phi.model.groq import Groq
+
+    client, async_client = _groq_clients()
+    return Groq(id=os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"),
+                client=client, async_client=async_client)
+
+
+@lru_cache(maxsize=None)
+def _instrumented_classes():
+    """phi subclasses that report run latency, token counts and tool-call latency to metrics.
+
+    DuckDuckGo results also go through SEARCH_CACHE: the same players stay on the field
+    for many runs in a row, and prefetch_player_searches() warms it ahead of the agent.
+    """
+    from phi.agent import Agent
+    from phi.tools.duckduckgo import DuckDuckGo
+
+    class InstrumentedAgent(Agent):
+        def run(self, *args, **kwargs):
+            cached = self._cached_analysis()
+            if cached is not None:
+                return iter([cached]) if kwargs.get("stream") else cached
+            start = time.perf_counter()
+            try:
+                result = super().run(*args, **kwargs)
+            except Exception:
+                AGENT_ERRORS.inc(agent=self.name)
+                raise
+            if kwargs.get("stream"):
+                return self._timed_stream(result, start)
+            self._record(start)
+            return result
+
+        async def arun(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await super().arun(*args, **kwargs)
+            except Exception:
+                AGENT_ERRORS.inc(agent=self.name)
+                raise
+            if kwargs.get("stream"):
+                return self._timed_astream(result, start)
+            self._record(start)
+            return result
+
+        def _timed_stream(self, chunks, start):
+            yield from chunks
+            self._record(start)
+
+        async def _timed_astream(self, chunks, start):
+            async for chunk in chunks:
+                yield chunk
+            self._record(start)
+
+        def _cached_analysis(self):
+            # The StatsAnalyzer's take on a near-identical situation earlier in this innings
+            situation = CURRENT_SITUATION.get()
+            if self.name != "StatsAnalyzer" or situation is None:
+                return None
+            return SEMANTIC_CACHE.lookup("stats_analyzer", situation)
+
+        def _record(self, start):
+            AGENT_RUN_SECONDS.observe(time.perf_counter() - start, agent=self.name)
+            situation = CURRENT_SITUATION.get()
+            if self.name == "StatsAnalyzer" and situation is not None:
+                SEMANTIC_CACHE.store("stats_analyzer", situation, self.run_response)
+            metrics = getattr(self.run_response, "metrics", None) or {}
+            total = 0
+            for kind in ("input_tokens", "output_tokens"):
+                tokens = sum(value or 0 for value in metrics.get(kind) or [])
+                LLM_TOKENS.inc(tokens, agent=self.name, kind=kind.replace("_tokens", ""))
+                total += tokens
+            # One input_tokens entry per model call; settles this run's LLM_SCHEDULER reservation
+            record_usage(len(metrics.get("input_tokens") or []), total)
+
+    class InstrumentedDuckDuckGo(DuckDuckGo):
+        def duckduckgo_search(self, query: str, max_results: int = 5) -> str:
+            """Use this function to search DuckDuckGo for a query.
+
+            Args:
+                query(str): The query to search for.
+                max_results (optional, default=5): The maximum number of results to return.
+
+            Returns:
+                The result from DuckDuckGo.
+            """
+            return SEARCH_CACHE.get_or_search("duckduckgo_search", query, max_results, lambda: self._timed(
+                "duckduckgo_search", super(InstrumentedDuckDuckGo, self).duckduckgo_search, query, max_results))
+
+        def duckduckgo_news(self, query: str, max_results: int = 5) -> str:
+            """Use this function to get the latest news from DuckDuckGo.
+
+            Args:
+                query(str): The query to search for.
+                max_results (optional, default=5): The maximum number of results to return.
+
+            Returns:
+                The latest news from DuckDuckGo.
+            """
+            return SEARCH_CACHE.get_or_search("duckduckgo_news", query, max_results, lambda: self._timed(
+                "duckduckgo_news", super(InstrumentedDuckDuckGo, self).duckduckgo_news, query, max_results))
+
+        def _timed(self, tool, search, query, max_results):
+            with TOOL_CALL_SECONDS.time(tool=tool):
+                return search(query, max_results)
+
+    return InstrumentedAgent, InstrumentedDuckDuckGo
+
+
+def prefetch_player_searches(names):
+    """Run the StatsAnalyzer's per-player search ahead of time so its tool call is a cache hit"""
+    _, DuckDuckGo = _instrumented_classes()
+    tool = DuckDuckGo()
+    for name in names:
+        query = PREFETCH_QUERY.format(name=name)
+        if SEARCH_CACHE.contains("duckduckgo_search", query, 5):
+            continue
+        try:
+            tool.duckduckgo_search(query)
+            SEARCH_CACHE.prefetched += 1
+        except Exception as e:
+            print(f"Search prefetch failed for {name}: {e}")
+
+
+def new_stats_analyzer():
+    """Stats Analyzer Assistant"""
+    Agent, DuckDuckGo = _instrumented_classes()
+
+    return Agent(
+        name="StatsAnalyzer",
+        model=get_model(),
+        tools=[DuckDuckGo()],
+        instructions=["""
+        You are an expert cricket statistician and analyst. The match data comes with a
+        match_stats section that already has exact strike rates, economy rates, partnership,
+        run-rate trend, milestones and highlights - use those numbers, do not recompute them.
+        Add the qualitative insight they cannot:
+
+        1. Identify potential record-breaking performances or notable achievements
+        2. Detect important game-changing moments worth highlighting
+        3. Put the current performances in the context of the players' form and careers
+        4. Use websearch for some interesting statistics related to the batsman and the bowler
+           (one search per player, e.g. "<player name> cricket statistics")
+
+        Provide your analysis in a structured format that helps the commentary team understand
+        key aspects of the current match situation and noteworthy performances.
+        """],
+        markdown=True
+    )
+
+
+def new_commentary_generator():
+    """Commentary Generator Assistant"""
+    Agent, _ = _instrumented_classes()
+
+    return Agent(
+        name="CommentaryGenerator",
+        model=get_model(),
+        instructions=["""
+        You are an elite cricket commentator renowned for captivating, insightful, and engaging commentary.
+
+        Using the match data and statistical analysis provided:
+
+        1. Create vibrant play-by-play commentary that brings the cricket match to life
+        2. Weave statistical insights naturally into your narrative
+        3. Use colorful language, cricket terminology, and appropriate expressions
+        4. Vary your tone to match the game situation - excited for boundaries, analytical for strategy
+        5. Incorporate the latest match developments listed under 'Since the last commentary'
+        6. Build upon but don't simply repeat what is listed under 'Already said'
+        7. Include both immediate action description and strategic analysis
+
+        Your commentary should feel authentic, passionate, and knowledgeable - like listening to
+        an expert commentator during a live broadcast. Create at least 250 words of rich,
+        compelling cricket commentary that truly engages fans.
+        """],
+        markdown=True
+    )
+
+
+def stats_analyzer_enabled() -> bool:
+    """STATS_ANALYZER_LLM=1 adds the StatsAnalyzer LLM hop for qualitative insight on top of match_stats"""
+    return os.getenv("STATS_ANALYZER_LLM", "0") == "1"
+
+
+def expected_llm_calls() -> int:
+    """Model calls in one commentary run: the generator alone, or the leader, two hand-offs and both members"""
+    return 5 if stats_analyzer_enabled() else 1
+
+
+def new_commentary_agent():
+    """The CommentaryGenerator on its own, or the full team when the StatsAnalyzer hop is enabled"""
+    if stats_analyzer_enabled():
+        return new_commentary_team()
+    return new_commentary_generator()
+
+
+def new_commentary_team():
+    Agent, _ = _instrumented_classes()
+
+    return Agent(
+        name="Cricket Commentary Team",
+        team=[new_stats_analyzer(), new_commentary_generator()],
+        model=get_model(),
+        instructions=[
+            "Coordinate the team to generate engaging cricket commentary",
+            "First, have the StatsAnalyzer analyze the match data and identify highlights",
+            "Then, have the CommentaryGenerator use the analysis to create engaging commentary",
+            "Ensure the final output is a cohesive and engaging cricket commentary"
+        ],
+        markdown=True,
+    )
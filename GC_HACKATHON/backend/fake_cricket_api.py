@@ -0,0 +1,183 @@
+"""Local stand-in for the sanwebinfo/cricket-api Flask app, for offline load tests.
+
+Serves GET / (health) and GET /score?id=<match_id> with the same JSON shape. Payloads
+are replayed from a recording, one JSON object per line (or a pipeline feed journal), and the match moves on to the
+next payload every --advance seconds (per match id, starting from its first request).
+Without a recording a synthetic innings is generated.
+
+    python fake_cricket_api.py serve --port 5055 --payloads match.jsonl --advance 2
+    python fake_cricket_api.py record 12345 --out match.jsonl --interval 5   # from Cricbuzz
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from aiohttp import web
+
+BATTERS = ["Rohit Sharma", "Shubman Gill", "Virat Kohli", "Shreyas Iyer", "KL Rahul", "Hardik Pandya"]
+BOWLERS = ["Pat Cummins", "Mitchell Starc", "Josh Hazlewood", "Adam Zampa"]
+
+
+def synthetic_innings(balls: int = 120, seed: int = 7) -> List[dict]:
+    """One cricket-api /score payload per ball of a made-up T20 innings"""
+    rng = random.Random(seed)
+    payloads = []
+    runs = wickets = 0
+    batters = {name: [0, 0] for name in BATTERS}
+    bowlers = {name: [0, 0, 0] for name in BOWLERS}  # balls, runs, wickets
+    striker, non_striker, next_in = 0, 1, 2
+    for ball in range(1, balls + 1):
+        outcome = rng.choices(["0", "1", "2", "4", "6", "W"], weights=[30, 35, 10, 12, 6, 4])[0]
+        bowler = BOWLERS[(ball - 1) // 6 % len(BOWLERS)]
+        batter = BATTERS[striker]
+        batters[batter][1] += 1
+        bowlers[bowler][0] += 1
+        update = f"{bowler} to {batter}"
+        if outcome == "W" and next_in < len(BATTERS):
+            wickets += 1
+            bowlers[bowler][2] += 1
+            update += ", wicket! Caught in the deep"
+            striker, next_in = next_in, next_in + 1
+        else:
+            scored = 0 if outcome == "W" else int(outcome)
+            runs += scored
+            batters[batter][0] += scored
+            bowlers[bowler][1] += scored
+            if scored % 2:
+                striker, non_striker = non_striker, striker
+        if ball % 6 == 0:
+            striker, non_striker = non_striker, striker
+        overs = f"{ball // 6}.{ball % 6}"
+        one, two = BATTERS[striker], BATTERS[non_striker]
+        other = BOWLERS[(ball - 1) // 6 % len(BOWLERS) - 1]
+        figures, other_figures = bowlers[bowler], bowlers[other]
+        payloads.append({
+            "title": "India vs Australia, Final",
+            "update": update,
+            "livescore": f"IND {runs}/{wickets} ({overs})",
+            "runrate": f"CRR: {runs * 6 / ball:.2f}",
+            "batterone": one,
+            "batsmanonerun": str(batters[one][0]),
+            "batsmanoneball": f"({batters[one][1]})",
+            "batsmanonesr": f"{100 * batters[one][0] / max(batters[one][1], 1):.2f}",
+            "battertwo": two,
+            "batsmantworun": str(batters[two][0]),
+            "batsmantwoball": f"({batters[two][1]})",
+            "batsmantwosr": f"{100 * batters[two][0] / max(batters[two][1], 1):.2f}",
+            "bowlerone": bowler,
+            "bowleroneover": f"{figures[0] // 6}.{figures[0] % 6}",
+            "bowleronerun": str(figures[1]),
+            "bowleronewickers": str(figures[2]),
+            "bowleroneeconomy": f"{figures[1] * 6 / figures[0]:.2f}",
+            "bowlertwo": other,
+            "bowlertwoover": f"{other_figures[0] // 6}.{other_figures[0] % 6}",
+            "bowlertworun": str(other_figures[1]),
+            "bowlertwowickers": str(other_figures[2]),
+            "bowlertwoeconomy": f"{other_figures[1] * 6 / max(other_figures[0], 1):.2f}",
+        })
+    return payloads
+
+
+def load_payloads(path: str) -> List[dict]:
+    """Plain payloads, or a cricket_pipeline feed journal (ingestion/journal.py) decoded back to payloads"""
+    with open(path) as f:
+        payloads = [json.loads(line) for line in f if line.strip()]
+    if payloads and "t" in payloads[0] and "k" in payloads[0]:
+        sys.path.append(str(Path(__file__).resolve().parent.parent / "cricket_pipeline"))
+        from ingestion.journal import read_journal_file
+
+        return [payload for _, payload in read_journal_file(path)]
+    return payloads
+
+
+class FakeCricketApi:
+    """Replays payloads per match id; every match id gets its own cursor into the same recording"""
+
+    def __init__(self, payloads: List[dict], advance: float = 2.0, loop_replay: bool = True):
+        self.payloads = payloads
+        self.advance = advance
+        self.loop_replay = loop_replay
+        self.started_at: Dict[str, float] = {}
+        self.requests = 0
+
+    def payload_for(self, match_id: str) -> dict:
+        start = self.started_at.setdefault(match_id, time.monotonic())
+        index = int((time.monotonic() - start) / self.advance) if self.advance > 0 else 0
+        if self.loop_replay:
+            index %= len(self.payloads)
+        return self.payloads[min(index, len(self.payloads) - 1)]
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.Response(text="cricket-api stand-in")
+
+    async def score(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        match_id = request.query.get("id")
+        if not match_id:
+            return web.json_response({"error": "id is required"}, status=400)
+        return web.json_response(self.payload_for(match_id))
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/", self.health)
+        app.router.add_get("/score", self.score)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 5055) -> web.AppRunner:
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+
+async def record(match_id: str, out: str, interval: float, count: int):
+    """Append live payloads for match_id to out, skipping polls where nothing changed"""
+    from http_client import UpstreamClient
+    from score_provider import CricbuzzScoreProvider
+
+    client = UpstreamClient()
+    provider = CricbuzzScoreProvider(client)
+    last = None
+    try:
+        with open(out, "a") as f:
+            for _ in range(count):
+                data = await provider.afetch(match_id)
+                if data != last:
+                    f.write(json.dumps(data) + "\n")
+                    f.flush()
+                    last = data
+                    print(f"Recorded {data.get('livescore')}")
+                await asyncio.sleep(interval)
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=5055)
+    serve.add_argument("--payloads", help="recorded payloads (JSON lines); synthetic innings if omitted")
+    serve.add_argument("--advance", type=float, default=2.0, help="seconds per payload")
+    rec = commands.add_parser("record")
+    rec.add_argument("match_id")
+    rec.add_argument("--out", required=True)
+    rec.add_argument("--interval", type=float, default=5.0)
+    rec.add_argument("--count", type=int, default=720)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        asyncio.run(record(args.match_id, args.out, args.interval, args.count))
+        return
+    payloads = load_payloads(args.payloads) if args.payloads else synthetic_innings()
+    web.run_app(FakeCricketApi(payloads, args.advance).app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Offline stand-in for the Groq model behind the commentary agents (LLM_PROVIDER=fake).
+
+FakeGroq only replaces the four invoke methods of phi's Groq model, so phi still does
+the real work around them: prompt building, team hand-offs through tool calls, streaming
+and token metrics. A leader with team members first calls each transfer_task_to_* tool
+once, as the real model is told to, then writes its answer.
+
+Timing is latency seconds to the first token, then tokens_per_sec. Nothing leaves the
+machine, and DuckDuckGo is never called because the fake never asks for search tools.
+"""
+import asyncio
+import itertools
+import json
+import os
+import time
+import uuid
+from functools import lru_cache
+
+WORDS = (
+    "What a delivery that is, full and straight, and the batter digs it out towards mid-on "
+    "for a quick single. The required rate keeps climbing while the bowler hits a good length "
+    "over after over and the field spreads out for the final push."
+).split()
+
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> dict:
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+def _prompt_tokens(messages) -> int:
+    # Roughly four characters per token, close enough for sizing load
+    return sum(len(str(message.content or "")) for message in messages) // 4
+
+
+def _next_transfer(tools, messages):
+    """Name of the first team member the leader has not handed a task to yet, or None"""
+    called = {
+        tool_call["function"]["name"]
+        for message in messages if message.role == "assistant" and message.tool_calls
+        for tool_call in message.tool_calls
+    }
+    for tool in tools or []:
+        name = tool.get("function", {}).get("name", "")
+        if name.startswith("transfer_task_to_") and name not in called:
+            return name
+    return None
+
+
+def _tool_call(name: str) -> dict:
+    return {
+        "id": f"call_{uuid.uuid4().hex[:12]}",
+        "type": "function",
+        "function": {
+            "name": name,
+            "arguments": json.dumps({
+                "task_description": "Work on the current match situation",
+                "expected_output": "A short paragraph",
+                "additional_information": "",
+            }),
+        },
+    }
+
+
+@lru_cache(maxsize=None)
+def _fake_groq_class():
+    # phi and groq are imported here so importing this module stays cheap
+    from groq.types.chat import ChatCompletion, ChatCompletionChunk
+    from phi.model.groq import Groq
+
+    class FakeGroq(Groq):
+        id: str = "fake-llm"
+        name: str = "FakeGroq"
+        latency: float = 0.3
+        tokens_per_sec: float = 250.0
+        output_tokens: int = 120
+
+        def _plan(self, messages):
+            """(tool call or None, words of the answer)"""
+            name = _next_transfer(self.request_kwargs.get("tools"), messages)
+            if name:
+                return _tool_call(name), []
+            return None, list(itertools.islice(itertools.cycle(WORDS), self.output_tokens))
+
+        def _completion(self, messages, tool_call, words) -> ChatCompletion:
+            message = {"role": "assistant", "content": None if tool_call else " ".join(words)}
+            if tool_call:
+                message["tool_calls"] = [tool_call]
+            return ChatCompletion.model_validate({
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion",
+                "created": int(time.time()), "model": self.id,
+                "choices": [{"index": 0, "message": message,
+                             "finish_reason": "tool_calls" if tool_call else "stop"}],
+                "usage": _usage(_prompt_tokens(messages), len(words) or 1),
+            })
+
+        def _chunk(self, delta: dict, usage: dict = None) -> ChatCompletionChunk:
+            return ChatCompletionChunk.model_validate({
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": self.id,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}] if delta else [],
+                "usage": usage,
+            })
+
+        def _chunks(self, messages, tool_call, words):
+            if tool_call:
+                yield self._chunk({"role": "assistant", "tool_calls": [dict(tool_call, index=0)]})
+            for i, word in enumerate(words):
+                yield self._chunk({"content": word if i == 0 else " " + word})
+            yield self._chunk({}, _usage(_prompt_tokens(messages), len(words) or 1))
+
+        def invoke(self, messages):
+            tool_call, words = self._plan(messages)
+            time.sleep(self.latency + len(words) / self.tokens_per_sec)
+            return self._completion(messages, tool_call, words)
+
+        async def ainvoke(self, messages):
+            tool_call, words = self._plan(messages)
+            await asyncio.sleep(self.latency + len(words) / self.tokens_per_sec)
+            return self._completion(messages, tool_call, words)
+
+        def invoke_stream(self, messages):
+            tool_call, words = self._plan(messages)
+            time.sleep(self.latency)
+            for chunk in self._chunks(messages, tool_call, words):
+                yield chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    time.sleep(1 / self.tokens_per_sec)
+
+        async def ainvoke_stream(self, messages):
+            tool_call, words = self._plan(messages)
+            await asyncio.sleep(self.latency)
+            for chunk in self._chunks(messages, tool_call, words):
+                yield chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    await asyncio.sleep(1 / self.tokens_per_sec)
+
+    return FakeGroq
+
+
+def make_fake_groq(latency: float = 0.3, tokens_per_sec: float = 250.0, output_tokens: int = 120):
+    return _fake_groq_class()(latency=latency, tokens_per_sec=tokens_per_sec, output_tokens=output_tokens)
+
+
+def fake_groq_from_env():
+    """FAKE_LLM_LATENCY (s to first token), FAKE_LLM_TOKENS_PER_SEC, FAKE_LLM_OUTPUT_TOKENS"""
+    return make_fake_groq(
+        latency=float(os.getenv("FAKE_LLM_LATENCY", "0.3")),
+        tokens_per_sec=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "250")),
+        output_tokens=int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "120")),
+    )
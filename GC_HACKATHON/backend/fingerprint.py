@@ -0,0 +1,52 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional, Tuple
+
+# Fields of a processed snapshot that change when something happens on the field.
+# timestamp is deliberately left out: it is restamped on every fetch.
+FINGERPRINT_FIELDS = ("current_score", "batsman", "bowler", "player_stats", "context")
+
+
+def scorecard_fingerprint(processed_data: dict) -> str:
+    """Hash of the semantically relevant part of a processed snapshot"""
+    relevant = {field: processed_data.get(field) for field in FINGERPRINT_FIELDS}
+    encoded = json.dumps(relevant, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+class AgentOutputCache:
+    """Last agent output per match, reused while the scorecard fingerprint is unchanged"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[str, Any]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        # Totals over every match ever seen: exported as counters, so forget() must not lower them
+        self._totals = {"hits": 0, "misses": 0}
+
+    def get(self, match_id: str, fingerprint: str) -> Optional[Any]:
+        counts = self._counts.setdefault(match_id, {"hits": 0, "misses": 0})
+        entry = self._entries.get(match_id)
+        if entry is not None and entry[0] == fingerprint:
+            counts["hits"] += 1
+            self._totals["hits"] += 1
+            return entry[1]
+        counts["misses"] += 1
+        self._totals["misses"] += 1
+        return None
+
+    def put(self, match_id: str, fingerprint: str, output: Any):
+        self._entries[match_id] = (fingerprint, output)
+
+    def forget(self, match_id: str):
+        self._entries.pop(match_id, None)
+        self._counts.pop(match_id, None)
+
+    def stats(self) -> dict:
+        hits, misses = self._totals["hits"], self._totals["misses"]
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "matches": {match_id: dict(counts) for match_id, counts in self._counts.items()},
+        }
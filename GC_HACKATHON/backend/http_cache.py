@@ -0,0 +1,63 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+
+def make_etag(match_id: str, version: int, fingerprint: str, generation: int = 0) -> str:
+    return f'"{match_id}-{generation}.{version}-{fingerprint[:12]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True when the client's If-None-Match header already names this representation"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 asks for If-None-Match
+    return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+class ResponseCache:
+    """Bounded, short-TTL cache of pre-serialized JSON bodies keyed by match state generation and version.
+
+    Repeat polls for the same version skip JSON encoding of the agent output entirely.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], dict]) -> bytes:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] <= self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        body = json.dumps(jsonable_encoder(render()), separators=(",", ":")).encode("utf-8")
+        self._entries[key] = (now, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
+
+    def forget(self, match_id: str):
+        """Drop every body rendered for match_id; keys start with the match id"""
+        for key in [key for key in self._entries if isinstance(key, tuple) and key[0] == match_id]:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
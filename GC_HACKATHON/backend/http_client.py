@@ -0,0 +1,222 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of making a request while an upstream's circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """closed -> open after failure_threshold consecutive failures; one trial call after reset_timeout.
+
+    A trial call that is never resolved (record_success/record_failure) expires after
+    another reset_timeout, and the next call becomes the trial.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if (self.state == "open" and now - self.opened_at >= self.reset_timeout
+                    or self.state == "half_open" and now - self.probe_started >= self.reset_timeout):
+                # Let exactly one request through to probe the upstream
+                self.state = "half_open"
+                self.probe_started = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """Shared keep-alive connection pools (sync and async) with jittered retries and per-host breakers"""
+
+    def __init__(self, timeout: float = 5.0, retries: int = 2, backoff_base: float = 0.25,
+                 backoff_max: float = 4.0, pool_size: int = 32,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._aio_session: Optional[aiohttp.ClientSession] = None
+
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            self.counters[host] = {"requests": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+        return self.breakers[host]
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps many pollers from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _check_breaker(self, url: str):
+        host = urlsplit(url).netloc
+        if not self._breaker(host).allow():
+            self.counters[host]["short_circuited"] += 1
+            raise UpstreamUnavailable(f"Circuit open for {host}")
+        return host
+
+    def get_json(self, url: str, headers: dict = None) -> dict:
+        return self._get(url, headers, lambda response: response.json())
+
+    def get_text(self, url: str, headers: dict = None) -> str:
+        return self._get(url, headers, lambda response: response.text)
+
+    async def aget_json(self, url: str, headers: dict = None) -> dict:
+        return await self._aget(url, headers, lambda response: response.json(content_type=None))
+
+    async def aget_text(self, url: str, headers: dict = None) -> str:
+        return await self._aget(url, headers, lambda response: response.text())
+
+    def _get(self, url: str, headers, read):
+        host = self._check_breaker(url)
+        for attempt in range(self.retries + 1):
+            self.counters[host]["requests"] += 1
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code in RETRYABLE_STATUS and attempt < self.retries:
+                    raise requests.exceptions.HTTPError(f"{response.status_code} from {host}")
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                if not self._should_retry(host, e, attempt):
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            except Exception:
+                self._record_unexpected(host)
+                raise
+            # Read outside the retry loop: requests' JSONDecodeError is also a RequestException
+            try:
+                data = read(response)
+            except ValueError:
+                self._record_bad_body(host)
+                raise
+            self.breakers[host].record_success()
+            return data
+
+    async def _aget(self, url: str, headers, read):
+        host = self._check_breaker(url)
+        session = self._get_aio_session()
+        for attempt in range(self.retries + 1):
+            self.counters[host]["requests"] += 1
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status in RETRYABLE_STATUS and attempt < self.retries:
+                        raise aiohttp.ClientError(f"{response.status} from {host}")
+                    response.raise_for_status()
+                    data = await read(response)
+                self.breakers[host].record_success()
+                return data
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if not self._should_retry(host, e, attempt):
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+            except asyncio.CancelledError:
+                # Cancelling says nothing about the upstream, but a cancelled probe must not keep the breaker half open
+                if self.breakers[host].state == "half_open":
+                    self.breakers[host].record_failure()
+                raise
+            except ValueError:
+                self._record_bad_body(host)
+                raise
+            except Exception:
+                self._record_unexpected(host)
+                raise
+
+    def _should_retry(self, host: str, error: Exception, attempt: int) -> bool:
+        status = getattr(getattr(error, "response", None), "status_code", None) or getattr(error, "status", None)
+        retryable = status is None or status in RETRYABLE_STATUS
+        if retryable and attempt < self.retries:
+            self.counters[host]["retries"] += 1
+            return True
+        self.counters[host]["failures"] += 1
+        if retryable:
+            self.breakers[host].record_failure()
+        else:
+            # A 4xx means the upstream answered; it says nothing about its health
+            self.breakers[host].record_success()
+        return False
+
+    def _record_unexpected(self, host: str):
+        """Anything else that fails a request"""
+        self.counters[host]["failures"] += 1
+        self.breakers[host].record_failure()
+
+    def _record_bad_body(self, host: str):
+        """A body that doesn't decode, e.g. an HTML error page where JSON was expected.
+
+        Not retried; the upstream answered, so it only counts against the breaker when it
+        was the half-open probe.
+        """
+        self.counters[host]["failures"] += 1
+        if self.breakers[host].state == "half_open":
+            self.breakers[host].record_failure()
+
+    def _get_aio_session(self) -> aiohttp.ClientSession:
+        if self._aio_session is None or self._aio_session.closed:
+            self._aio_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30),
+            )
+        return self._aio_session
+
+    async def close(self):
+        if self._aio_session is not None:
+            await self._aio_session.close()
+        self.session.close()
+
+    def stats(self) -> dict:
+        return {
+            host: {
+                "state": breaker.state,
+                "consecutive_failures": breaker.consecutive_failures,
+                "times_opened": breaker.times_opened,
+                **self.counters[host],
+            }
+            for host, breaker in self.breakers.items()
+        }
@@ -0,0 +1,81 @@
+import zlib
+from typing import Optional
+
+# First tier of commentary: a one-liner filled in from match_stats as soon as the scorecard
+# changes, published while the agents are still working on the full commentary.
+# Several phrasings per event; the scorecard fingerprint picks one, so every worker and
+# every replay of the same ball says the same thing.
+TEMPLATES = {
+    "wicket": (
+        "OUT! {dismissed} has to go, {bowler} strikes. {score}",
+        "WICKET! {bowler} gets the breakthrough, {dismissed} walks back. {score}",
+        "Gone! {dismissed} falls to {bowler}. {score}",
+    ),
+    "six": (
+        "SIX! {batter} launches {bowler} into the stands, {score}",
+        "SIX! {batter} clears the rope off {bowler}, {score}",
+        "That's huge! {batter} takes {bowler} for six, {score}",
+    ),
+    "four": (
+        "FOUR! {batter} drives {bowler} to the boundary, {score}",
+        "FOUR! {batter} finds the gap off {bowler}, {score}",
+        "Cracking shot, {batter} picks off {bowler} for four, {score}",
+    ),
+    "milestone": (
+        "{milestone}! {score}",
+    ),
+    "runs": (
+        "{runs} off {bowler}, {score}",
+        "{batter} keeps the board moving against {bowler}, {score}",
+    ),
+    "scored": (
+        "{batter} works {bowler} away, {score}",
+        "{batter} keeps the scoreboard ticking against {bowler}, {score}",
+    ),
+    "update": (
+        "{score}",
+    ),
+}
+
+
+def _score(stats: dict, processed_data: dict) -> str:
+    score = stats.get("score")
+    if not score:
+        return processed_data.get("current_score") or ""
+    return f"{score['runs']}/{score['wickets']} ({score['overs']} ov)"
+
+
+def _event(stats: dict, milestones: list) -> str:
+    events = stats.get("events") or []
+    for kind in ("wicket", "six", "four"):
+        if kind in events:
+            return kind
+    if milestones:
+        return "milestone"
+    if events:
+        return "runs"
+    return "scored" if stats.get("scorer") else "update"
+
+
+def instant_commentary(processed_data: dict, fingerprint: str = "") -> Optional[str]:
+    """Templated one-liner for the latest scorecard change, None if there is nothing to say"""
+    stats = processed_data.get("match_stats") or {}
+    score = _score(stats, processed_data)
+    if not score:
+        return None
+
+    batters, bowlers = stats.get("batters") or [], stats.get("bowlers") or []
+    # Reached, not approaching ("X needs 4 for 50")
+    milestones = [m for m in stats.get("milestones") or [] if " needs " not in m]
+    fields = {
+        "score": score,
+        "batter": stats.get("scorer") or (batters[0]["name"] if batters else "the batter"),
+        "bowler": bowlers[0]["name"] if bowlers else "the bowler",
+        "dismissed": stats.get("dismissed") or "the batter",
+        "milestone": milestones[0][:1].upper() + milestones[0][1:] if milestones else "",
+        "runs": next((e for e in stats.get("events") or [] if e[:1].isdigit()), ""),
+    }
+    kind = _event(stats, milestones)
+    templates = TEMPLATES[kind]
+    template = templates[zlib.crc32(fingerprint.encode("utf-8")) % len(templates)]
+    return template.format(**fields)
@@ -0,0 +1,276 @@
+"""Admission control for LLM runs, shared by every match.
+
+Groq limits requests and tokens per minute. Each agent run asks LLM_SCHEDULER for a slot
+with an estimate of how many model calls and tokens it will use; slots are handed out
+by priority while both token buckets and the concurrency cap allow, so the backend runs
+at the provider's ceiling instead of bursting past it into 429s. Actual usage, reported
+by the agents as they finish, is settled against the estimate afterwards.
+
+Under load, a match's waiting run is superseded by its newer one (the delta prompt of
+the newer run covers both scorecards), and routine runs are dropped rather than queued
+behind wickets; the instant line stays up for those balls.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Hashable, List, Optional
+
+from metrics import LLM_QUEUE_WAIT_SECONDS, LLM_SCHEDULER_DECISIONS
+
+HIGH, NORMAL, LOW = 0, 1, 2
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+DEFAULT_RETRY_AFTER = 10.0
+
+
+class SchedulerSkipped(Exception):
+    """The run never got a slot"""
+
+
+class Superseded(SchedulerSkipped):
+    """A newer run for the same key took this one's place in the queue"""
+
+
+class Dropped(SchedulerSkipped):
+    """Shed under load: low priority and the queue was full or the wait too long"""
+
+
+class TokenBucket:
+    """Refills continuously at per_minute, up to one minute's worth. per_minute=0 means unlimited.
+
+    Settling actual usage can take the level below zero; later runs then wait for it to recover.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available; amounts above capacity only need a full bucket"""
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60.0 / self.capacity)
+
+    def take(self, amount: float):
+        if self.capacity:
+            self._refill()
+            self.level = min(self.capacity, self.level - amount)
+
+    def pause(self):
+        """Empty the bucket, e.g. after the provider said we are over its limit"""
+        if self.capacity:
+            self._refill()
+            self.level = min(self.level, 0.0)
+
+
+class Reservation:
+    """What a run was admitted with, and what its agents report using"""
+
+    def __init__(self, calls: int, tokens: int):
+        self.calls = calls
+        self.tokens = tokens
+        self.used_calls = 0
+        self.used_tokens = 0
+
+
+_CURRENT: ContextVar[Optional[Reservation]] = ContextVar("llm_reservation", default=None)
+
+
+def record_usage(calls: int, tokens: int):
+    """Called by agents when they finish; asyncio.to_thread carries the context into worker threads"""
+    reservation = _CURRENT.get()
+    if reservation is not None:
+        reservation.used_calls += calls
+        reservation.used_tokens += tokens
+
+
+class _Request:
+    def __init__(self, key: Hashable, priority: int, calls: int, tokens: int):
+        self.key = key
+        self.priority = priority
+        self.calls = calls
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class LLMScheduler:
+    def __init__(self, requests_per_minute: float = 30, tokens_per_minute: float = 6000,
+                 max_concurrency: int = 4, max_queue: int = 16, low_priority_wait: float = 20.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.low_priority_wait = low_priority_wait
+        self.running = 0
+        self.paused_until = 0.0
+        self._heap: List[tuple] = []
+        self._waiting: Dict[Hashable, _Request] = {}
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable, priority: int = NORMAL, calls: int = 1, tokens: int = 1000):
+        """Wait for a slot for one agent run; raises Superseded or Dropped if it never gets one"""
+        request = self._enqueue(key, priority, calls, tokens)
+        try:
+            await request.future
+        except asyncio.CancelledError:
+            self._remove(request)
+            if request.future.done() and not request.future.cancelled() and request.future.exception() is None:
+                # Admitted just as we were cancelled: give the slot back
+                self.running -= 1
+                self._dispatch()
+            raise
+        LLM_QUEUE_WAIT_SECONDS.observe(time.monotonic() - request.enqueued, priority=PRIORITY_NAMES[request.priority])
+
+        reservation = Reservation(calls, tokens)
+        context = _CURRENT.set(reservation)
+        try:
+            yield reservation
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.back_off(retry_after(e))
+            raise
+        finally:
+            _CURRENT.reset(context)
+            self.running -= 1
+            self._settle(reservation)
+            self._dispatch()
+
+    def is_waiting(self, key: Hashable) -> bool:
+        return key in self._waiting
+
+    def back_off(self, seconds: float):
+        """The provider rate-limited us anyway: hold every queued run for a while"""
+        LLM_SCHEDULER_DECISIONS.inc(outcome="rate_limited")
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.requests.pause()
+        self.tokens.pause()
+
+    def _enqueue(self, key: Hashable, priority: int, calls: int, tokens: int) -> _Request:
+        older = self._waiting.get(key)
+        if older is not None:
+            # The newer run covers what the older one would have said, and keeps its priority
+            priority = min(priority, older.priority)
+            self._reject(older, Superseded(f"Superseded by a newer run for {key}"), "merged")
+
+        request = _Request(key, priority, calls, tokens)
+        if len(self._waiting) >= self.max_queue:
+            # Lowest priority, longest waiting
+            victim = max(self._waiting.values(), key=lambda r: (r.priority, -r.enqueued), default=None)
+            if priority == LOW and (victim is None or victim.priority < LOW):
+                LLM_SCHEDULER_DECISIONS.inc(outcome="dropped")
+                raise Dropped("LLM queue is full")
+            if victim is not None and victim.priority == LOW:
+                self._reject(victim, Dropped("LLM queue is full"), "dropped")
+
+        self._waiting[key] = request
+        heapq.heappush(self._heap, (priority, next(self._seq), request))
+        self._dispatch()
+        return request
+
+    def _shed_stale_low_priority(self):
+        now = time.monotonic()
+        for request in list(self._waiting.values()):
+            if request.priority == LOW and now - request.enqueued > self.low_priority_wait:
+                self._reject(request, Dropped("Waited too long for an LLM slot"), "dropped")
+
+    def _reject(self, request: _Request, error: SchedulerSkipped, outcome: str):
+        self._remove(request)
+        if not request.future.done():
+            request.future.set_exception(error)
+        LLM_SCHEDULER_DECISIONS.inc(outcome=outcome)
+
+    def _remove(self, request: _Request):
+        # Removed from _waiting only; its heap entry is skipped when it reaches the top
+        if self._waiting.get(request.key) is request:
+            del self._waiting[request.key]
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._shed_stale_low_priority()
+        while self._heap and self.running < self.max_concurrency:
+            request = self._heap[0][2]
+            if self._waiting.get(request.key) is not request:
+                heapq.heappop(self._heap)
+                continue
+            wait = max(self.paused_until - time.monotonic(),
+                       self.requests.wait_time(request.calls), self.tokens.wait_time(request.tokens))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._heap)
+            del self._waiting[request.key]
+            self.requests.take(request.calls)
+            self.tokens.take(request.tokens)
+            self.running += 1
+            LLM_SCHEDULER_DECISIONS.inc(outcome="admitted")
+            request.future.set_result(None)
+
+    def _settle(self, reservation: Reservation):
+        # Runs that failed before reporting keep their estimate
+        if reservation.used_calls:
+            self.requests.take(reservation.used_calls - reservation.calls)
+            self.tokens.take(reservation.used_tokens - reservation.tokens)
+
+    def queue_depth(self) -> Dict[str, int]:
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for request in self._waiting.values():
+            depth[PRIORITY_NAMES[request.priority]] += 1
+        return depth
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self.queue_depth(),
+            "requests_available": round(self.requests.level, 1) if self.requests.capacity else None,
+            "tokens_available": round(self.tokens.level) if self.tokens.capacity else None,
+            "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 1),
+        }
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return type(error).__name__ == "RateLimitError" or getattr(error, "status_code", None) == 429
+
+
+def retry_after(error: Exception) -> float:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+def commentary_priority(match_stats: dict) -> int:
+    """Wickets and milestones first, routine balls (no boundary, no runs of note) last"""
+    events = match_stats.get("events") or []
+    if "wicket" in events or any(" needs " not in m for m in match_stats.get("milestones") or []):
+        return HIGH
+    if events:
+        return NORMAL
+    return LOW
+
+
+def scheduler_from_env() -> LLMScheduler:
+    return LLMScheduler(requests_per_minute=float(os.getenv("LLM_RPM", "30")),
+                        tokens_per_minute=float(os.getenv("LLM_TPM", "6000")),
+                        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+                        max_queue=int(os.getenv("LLM_MAX_QUEUE", "16")),
+                        low_priority_wait=float(os.getenv("LLM_LOW_PRIORITY_WAIT", "20")))
+
+
+LLM_SCHEDULER = scheduler_from_env()
@@ -0,0 +1,272 @@
+"""Offline load test: fake cricket-api + fake LLM, driven at a fixed concurrency.
+
+Starts fake_cricket_api in-process and the backend under uvicorn with SCORE_PROVIDER=flask
+pointed at it and LLM_PROVIDER=fake, registers --matches matches, then has --concurrency
+clients hit /api/live-data for --duration seconds. Reports throughput and p50/p95/p99 of
+the client-side requests and of every pipeline stage, taken from the /metrics histograms
+(difference between a scrape before and after the run).
+
+    python loadtest.py --matches 4 --concurrency 32 --duration 60
+    python loadtest.py --llm-latency 1.5 --llm-tokens-per-sec 80 --save baseline.json
+    python loadtest.py --baseline baseline.json     # after a change: shows the deltas
+    python loadtest.py --target http://127.0.0.1:8000 --matches 2   # already running backend
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import aiohttp
+
+from fake_cricket_api import FakeCricketApi, load_payloads, synthetic_innings
+
+BACKEND_DIR = Path(__file__).resolve().parent
+QUANTILES = (0.5, 0.95, 0.99)
+# Histograms reported per stage: metric name -> label that names the stage
+STAGE_HISTOGRAMS = {
+    "commentary_stage_seconds": "stage",
+    "agent_run_seconds": "agent",
+    "tool_call_seconds": "tool",
+}
+SAMPLE_LINE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_metrics(text: str) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+    """Prometheus text format -> {(sample name, sorted label pairs): value}"""
+    samples = {}
+    for line in text.splitlines():
+        match = SAMPLE_LINE.match(line)
+        if not match or line.startswith("#"):
+            continue
+        name, labels, value = match.groups()
+        pairs = tuple(sorted(LABEL.findall(labels or "")))
+        samples[(name, pairs)] = float(value)
+    return samples
+
+
+def histogram_quantiles(before: dict, after: dict, metric: str, label: str) -> Dict[str, dict]:
+    """Per label value: count and interpolated quantiles of the observations made between two scrapes"""
+    buckets: Dict[str, List[Tuple[float, float]]] = defaultdict(list)
+    for (name, pairs), value in after.items():
+        if name != f"{metric}_bucket":
+            continue
+        labels = dict(pairs)
+        delta = value - before.get((name, pairs), 0.0)
+        buckets[labels.get(label, "")].append((float(labels["le"]), delta))
+
+    stages = {}
+    for key, series in buckets.items():
+        series.sort()
+        total = series[-1][1]
+        if total <= 0:
+            continue
+        stages[key] = {"count": int(total), **{f"p{int(q * 100)}": _bucket_quantile(series, q) for q in QUANTILES}}
+    return stages
+
+
+def _bucket_quantile(series: List[Tuple[float, float]], q: float) -> float:
+    # Same linear interpolation inside the bucket as Prometheus' histogram_quantile
+    rank = q * series[-1][1]
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, count in series:
+        if count >= rank:
+            if bound == float("inf"):
+                return lower_bound
+            if count == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = bound, count
+    return lower_bound
+
+
+def sample_quantiles(latencies: List[float]) -> dict:
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"count": 0}
+    return {"count": len(ordered),
+            **{f"p{int(q * 100)}": ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}}
+
+
+class Driver:
+    def __init__(self, base_url: str, match_ids: List[str], concurrency: int, duration: float):
+        self.base_url = base_url
+        self.match_ids = match_ids
+        self.concurrency = concurrency
+        self.duration = duration
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, session: aiohttp.ClientSession, kind: str, method: str, path: str):
+        start = time.perf_counter()
+        try:
+            async with session.request(method, f"{self.base_url}{path}") as response:
+                await response.read()
+                ok = response.status < 400
+        except aiohttp.ClientError:
+            ok = False
+        if ok:
+            self.latencies[kind].append(time.perf_counter() - start)
+        else:
+            self.errors[kind] += 1
+
+    async def client(self, session: aiohttp.ClientSession, deadline: float):
+        while time.monotonic() < deadline:
+            match_id = random.choice(self.match_ids)
+            await self.request(session, "live-data", "GET", f"/api/live-data/{match_id}")
+
+    async def run(self) -> dict:
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=120)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            for match_id in self.match_ids:
+                await self.request(session, "set-match", "POST", f"/api/set-match/{match_id}")
+            before = await scrape(session, self.base_url)
+            started = time.monotonic()
+            deadline = started + self.duration
+            await asyncio.gather(*(self.client(session, deadline) for _ in range(self.concurrency)))
+            elapsed = time.monotonic() - started
+            after = await scrape(session, self.base_url)
+
+        report = {"elapsed_s": elapsed, "requests": {}, "stages": {}}
+        for kind, latencies in self.latencies.items():
+            report["requests"][kind] = {**sample_quantiles(latencies), "errors": self.errors[kind],
+                                        "rps": len(latencies) / elapsed if kind == "live-data" else None}
+        for metric, label in STAGE_HISTOGRAMS.items():
+            for key, stats in histogram_quantiles(before, after, metric, label).items():
+                report["stages"][f"{metric}:{key}"] = stats
+        return report
+
+
+async def scrape(session: aiohttp.ClientSession, base_url: str) -> dict:
+    async with session.get(f"{base_url}/metrics") as response:
+        return parse_metrics(await response.text())
+
+
+async def wait_until_up(base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/metrics") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"Backend at {base_url} did not come up within {timeout:.0f}s")
+
+
+def start_backend(args) -> subprocess.Popen:
+    env = dict(os.environ,
+               SCORE_PROVIDER="flask",
+               CRICKET_API_HOST="127.0.0.1",
+               CRICKET_API_PORT=str(args.api_port),
+               LLM_PROVIDER="fake",
+               SEARCH_PREFETCH="0",
+               FAKE_LLM_LATENCY=str(args.llm_latency),
+               FAKE_LLM_TOKENS_PER_SEC=str(args.llm_tokens_per_sec),
+               FAKE_LLM_OUTPUT_TOKENS=str(args.llm_output_tokens),
+               LLM_RPM=str(args.llm_rpm),
+               LLM_TPM=str(args.llm_tpm))
+    output = None if args.verbose else subprocess.DEVNULL
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=output, stderr=output
+    )
+
+
+def print_report(report: dict, baseline: dict = None):
+    def row(section, key, title, stats):
+        cells = [f"{stats.get(f'p{int(q * 100)}', 0) * 1000:>9.1f}" for q in QUANTILES]
+        old = (baseline or {}).get(section, {}).get(key)
+        if old:
+            cells += [_change(stats.get(f"p{int(q * 100)}"), old.get(f"p{int(q * 100)}")) for q in QUANTILES]
+        return f"{title:<44}{stats['count']:>8}" + "".join(cells)
+
+    header = f"{'':<44}{'count':>8}" + "".join(f"{f'p{int(q * 100)} ms':>9}" for q in QUANTILES)
+    if baseline:
+        header += "".join(f"{f'Δp{int(q * 100)}':>9}" for q in QUANTILES)
+    print(f"\nRan {report['elapsed_s']:.1f}s")
+    print(header)
+    for key, stats in report["requests"].items():
+        print(row("requests", key, f"http {key}", stats))
+        summary = f"  errors={stats['errors']}"
+        if stats.get("rps") is not None:
+            summary += f"  throughput={stats['rps']:.1f} req/s"
+        print(summary)
+    for key, stats in sorted(report["stages"].items()):
+        print(row("stages", key, key, stats))
+
+
+def _change(new, old) -> str:
+    if not new or not old:
+        return f"{'-':>9}"
+    return f"{(new - old) / old * 100:>+8.0f}%"
+
+
+async def main_async(args) -> dict:
+    payloads = load_payloads(args.payloads) if args.payloads else synthetic_innings()
+    fake_api = FakeCricketApi(payloads, args.advance)
+    api_runner = await fake_api.start(port=args.api_port)
+    backend = None
+    try:
+        base_url = args.target
+        if not base_url:
+            backend = start_backend(args)
+            base_url = f"http://127.0.0.1:{args.port}"
+        await wait_until_up(base_url)
+        match_ids = [f"loadtest-{i}" for i in range(1, args.matches + 1)]
+        print(f"Driving {base_url}: {args.matches} matches, {args.concurrency} clients, {args.duration:.0f}s")
+        return await Driver(base_url, match_ids, args.concurrency, args.duration).run()
+    finally:
+        if backend:
+            backend.terminate()
+            backend.wait()
+        await api_runner.cleanup()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--port", type=int, default=8055, help="port for the backend under test")
+    parser.add_argument("--api-port", type=int, default=5055, help="port for the fake cricket-api")
+    parser.add_argument("--target", help="drive an already running backend instead of starting one")
+    parser.add_argument("--payloads", help="recorded /score payloads (JSON lines), see fake_cricket_api.py")
+    parser.add_argument("--advance", type=float, default=2.0, help="seconds before each match moves to its next payload")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fake LLM seconds to first token")
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=250.0)
+    parser.add_argument("--llm-output-tokens", type=int, default=120)
+    parser.add_argument("--llm-rpm", type=float, default=0, help="LLM scheduler requests per minute, 0 for no limit")
+    parser.add_argument("--llm-tpm", type=float, default=0, help="LLM scheduler tokens per minute, 0 for no limit")
+    parser.add_argument("--save", help="write the report as JSON, e.g. to use as a baseline")
+    parser.add_argument("--baseline", help="report from an earlier --save to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the backend's output")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved report to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,156 +1,69 @@
-import pathway as pw
 import requests
-import subprocess
+import aiohttp
+import asyncio
 import time
-from pathlib import Path
-import json
-import sys
 import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-from phi.agent import Agent
-from phi.model.groq import Groq
-from phi.tools.duckduckgo import DuckDuckGo
-
-# Initialize Groq model
-# Ensure the environment variable 'GROQ_API_KEY' is set
-groq_api_key = os.getenv("GROQ_API_KEY")
-if not groq_api_key:
-    # In a real application, you'd handle this more gracefully than raising an error here
-    # For now, we'll raise an error to indicate the missing key
-    raise ValueError("GROQ_API_KEY environment variable not set.")
-
-model = Groq(model="llama-3.3-70b-versatile", api_key=groq_api_key)
-
-# Stats Analyzer Assistant
-stats_analyzer = Agent(
-    name="StatsAnalyzer",
-    model=model,
-    tools = [DuckDuckGo()],
-    instructions=["""
-    You are an expert cricket statistician and analyst. Analyze the provided cricket match data to:
-    
-    1. Summarize the current match situation and key statistics
-    2. Identify exceptional performances from batsmen (high strike rates, milestones)
-    3. Highlight impressive bowling figures (economy rates, wicket-taking spells)
-    4. Calculate partnership statistics and run rate trends
-    5. Identify potential record-breaking performances or notable achievements
-    6. Detect important game-changing moments worth highlighting
-    7. Use websearch for some interesting statistics related to the batsman and the bowler
-
-    The match data will include: score, run rates, batsmen stats (runs, balls, SR),
-    bowler stats (overs, runs, wickets, economy), and recent commentary.
-    
-    Provide your analysis in a structured format that helps the commentary team understand
-    key aspects of the current match situation and noteworthy performances.
-    """],
-    markdown=True
-)
-
-# Commentary Generator Assistant
-commentary_generator = Agent(
-    name="CommentaryGenerator",
-    model=model,
-    instructions=["""
-    You are an elite cricket commentator renowned for captivating, insightful, and engaging commentary.
-    
-    Using the match data and statistical analysis provided:
-    
-    1. Create vibrant play-by-play commentary that brings the cricket match to life
-    2. Weave statistical insights naturally into your narrative
-    3. Use colorful language, cricket terminology, and appropriate expressions
-    4. Vary your tone to match the game situation - excited for boundaries, analytical for strategy
-    5. Incorporate the latest match developments from the 'latest_commentary' field
-    6. Build upon but don't simply repeat existing commentary
-    7. Include both immediate action description and strategic analysis
-    
-    Your commentary should feel authentic, passionate, and knowledgeable - like listening to
-    an expert commentator during a live broadcast. Create at least 250 words of rich,
-    compelling cricket commentary that truly engages fans.
-    """],
-    markdown=True
-)
-
-cricket_commentary_team = Agent(
-    name="Cricket Commentary Team",
-    team=[stats_analyzer, commentary_generator],
-    model=model,
-    instructions=[
-        "Coordinate the team to generate engaging cricket commentary",
-        "First, have the StatsAnalyzer analyze the match data and identify highlights",
-        "Then, have the CommentaryGenerator use the analysis to create engaging commentary",
-        "Ensure the final output is a cohesive and engaging cricket commentary"
-    ],
-    markdown=True,
+from commentary_agents import (
+    expected_llm_calls, new_commentary_agent, prefetch_player_searches, stats_analyzer_enabled
 )
+from singleflight import SingleFlight
+from registry import CricketApiServer, registry_from_env
+from http_client import UpstreamClient, UpstreamUnavailable
+from score_provider import FlaskScoreProvider, provider_from_env
+from streaming import BroadcastGroup, sse_event
+from fingerprint import AgentOutputCache, scorecard_fingerprint
+from poller import AdaptivePoller, LatestStateStore, match_phase
+from http_cache import ResponseCache, etag_matches, make_etag
+from instant_commentary import instant_commentary
+from llm_scheduler import LLM_SCHEDULER, SchedulerSkipped, commentary_priority
+from metrics import HTTP_IN_FLIGHT, POLLS, PROMPT_TOKENS, REGISTRY, STAGE_SECONDS
+from prompt_builder import estimate_tokens, prompt_builder_from_env
+from search_cache import SEARCH_CACHE, PlayerPrefetcher
+from semantic_cache import SEMANTIC_CACHE, situation_context, situation_for
+from stats_engine import StatsEngine
 
 # --- CricketDataPipeline Class (Copied from original main.py) ---
 class CricketDataPipeline:
-    def __init__(self, match_id: str):
+    def __init__(self, match_id: str, provider=None):
         self.match_id = match_id
-        self.api_url = f"http://127.0.0.1:5000/score?id={self.match_id}"
-        self.server_process = None
+        # Where scores come from: parsed in-process, or the cricket-api Flask app (see score_provider).
+        # Pass a shared provider so every match reuses one keep-alive connection pool.
+        self.provider = provider or FlaskScoreProvider(UpstreamClient())
+        self.last_good_data = {}
 
-    def start_api_server(self):
-        """Start local API server from cricket-api repository"""
+    def fetch_cricket_data(self) -> dict:
+        """Fetch data from the score provider, falling back to the last good snapshot"""
         try:
-            repo_path = Path("cricket-api/api")
-            if not repo_path.exists():
-                # print("Cloning cricket-api repository...")
-                subprocess.run(["git", "clone", "https://github.com/sanwebinfo/cricket-api"])
-
-            # Check if server is already running
-            try:
-                requests.get("http://127.0.0.1:5000/", timeout=1)
-                print("Flask server is already running.")
-                return # Server is already running, no need to start again
-            except requests.exceptions.RequestException:
-                pass # Server is not running, continue to start it
-
-            # Start the server process
-            print("Starting Flask server...")
-            self.server_process = subprocess.Popen(
-                ["flask", "--app", "index.py", "run", "--host=0.0.0.0", "--port=5000"],
-                cwd=repo_path,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-
-            # Wait for server to become available
-            max_attempts = 30
-            for attempt in range(max_attempts):
-                try:
-                    # Try connecting to the server
-                    response = requests.get("http://127.0.0.1:5000/", timeout=2)
-                    if response.status_code == 200:
-                        print("Flask server started successfully!")
-                        return
-                except requests.exceptions.RequestException:
-                    # Server not ready yet, wait and try again
-                    time.sleep(1)
-
-            raise TimeoutError(f"Flask server failed to start after {max_attempts} seconds")
-        except Exception as e:
-            print(f"Server startup failed: {e}")
-            # In a web server, you might not want to raise here, but log and return an error response
-            raise
+            with STAGE_SECONDS.time(stage="fetch"):
+                data = self.provider.fetch(self.match_id)
+        except (UpstreamUnavailable, requests.exceptions.RequestException, ValueError) as e:
+            print(f"API request failed: {e}")
+            return self.last_good_data
+        self.last_good_data = data
+        return data
 
-    def fetch_cricket_data(self) -> dict:
-        """Fetch data from local API endpoint"""
+    async def fetch_cricket_data_async(self) -> dict:
+        """Fetch data from the score provider without blocking the event loop"""
         try:
-            response = requests.get(self.api_url, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            with STAGE_SECONDS.time(stage="fetch"):
+                data = await self.provider.afetch(self.match_id)
+        except (UpstreamUnavailable, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            # While the upstream is down (or its breaker is open) keep serving what we last saw
             print(f"API request failed: {e}")
-            return {}
+            return self.last_good_data
+        self.last_good_data = data
+        return data
 
     # Pathway related methods - may need adjustment or can be omitted if not writing to CSV directly from backend
-    def create_pathway_table(self, data: dict) -> pw.Table:
+    def create_pathway_table(self, data: dict) -> "pw.Table":
         """Convert API response to Pathway table with schema"""
+        import pathway as pw
+
         processed_data = self._process_api_response(data)
 
         class CricketDataSubject(pw.io.python.ConnectorSubject):
@@ -201,6 +114,8 @@ class CricketDataPipeline:
         }
 
     def _get_schema(self):
+        import pathway as pw
+
         class CricketSchema(pw.Schema):
             match_id: str
             timestamp: int
@@ -226,7 +141,8 @@ class CricketDataPipeline:
             return 0
 
 # --- FastAPI Endpoints ---
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI()
@@ -242,59 +158,392 @@ app.add_middleware(
 )
 
 
-# Keep track of the pipeline instance (simple for now)
-pipeline_instance = None
+# Each match gets its own pipeline; they share one score provider and connection pool.
+# With SCORE_PROVIDER=flask one supervised cricket-api process serves every match.
+upstream = UpstreamClient()
+api_server = CricketApiServer(host=os.getenv("CRICKET_API_HOST", "127.0.0.1"),
+                              port=int(os.getenv("CRICKET_API_PORT", "5000")),
+                              session=upstream.session)
+score_provider = provider_from_env(upstream, api_server.base_url)
+registry = registry_from_env(lambda match_id: CricketDataPipeline(match_id, score_provider))
+
+@app.on_event("startup")
+async def startup_event():
+    app.state.supervisor = asyncio.create_task(api_server.supervise())
+    app.state.poller = asyncio.create_task(poller.run())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.poller.cancel()
+    poller.stop_all()
+    app.state.supervisor.cancel()
+    api_server.stop()
+    await upstream.close()
 
 @app.post("/api/set-match/{match_id}")
-def set_match(match_id: str):
-    global pipeline_instance
+async def set_match(match_id: str):
     try:
-        # Start the local API server when setting the match
-        pipeline = CricketDataPipeline(match_id)
-        pipeline.start_api_server()
-        pipeline_instance = pipeline # Store the pipeline instance
-        return {"message": f"Match ID set to {match_id} and API server started."}
+        if score_provider.needs_api_server:
+            # Start the local API server if it is not running yet
+            await asyncio.to_thread(api_server.ensure_running)
+        registry.register(match_id)
+        poller.start(match_id)
+        return {
+            "message": f"Match ID set to {match_id} using the {score_provider.name} score provider.",
+            "active_matches": registry.active_matches()
+        }
     except Exception as e:
+        print(f"Server startup failed: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to set match or start API server: {e}")
 
-@app.get("/api/live-data")
-def get_live_data():
-    global pipeline_instance
-    if not pipeline_instance:
-        raise HTTPException(status_code=400, detail="Match ID not set. Please call /api/set-match/{match_id} first.")
-
-    try:
-        # Fetch data
-        cricket_data = pipeline_instance.fetch_cricket_data()
-        if not cricket_data:
-            return {"message": "Could not fetch live data.", "data": {}}
-
-        # Process data and run agents
-        processed_data = pipeline_instance._process_api_response(cricket_data)
-
-        # Run commentary agent team
+@app.get("/api/matches")
+def list_matches():
+    return {"active_matches": registry.active_matches(), "max_matches": registry.max_matches}
+
+@app.delete("/api/matches/{match_id}")
+def remove_match(match_id: str):
+    if not registry.remove(match_id):
+        raise HTTPException(status_code=404, detail=f"Match {match_id} is not active.")
+    return {"message": f"Match {match_id} removed.", "active_matches": registry.active_matches()}
+
+@app.get("/api/matches/{match_id}/state")
+def get_match_state(match_id: str):
+    """Running aggregates and the over-by-over worm for the current innings"""
+    state = stats_engine.states.get(match_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"No state for match {match_id} yet.")
+    return state.summary()
+
+# Concurrent pollers of the same match share one upstream fetch, and concurrent
+# requests that see the same scorecard share one agent run
+fetch_flights = SingleFlight()
+agent_flights = SingleFlight()
+
+# Agent output is reused while a match's scorecard fingerprint stays the same
+agent_cache = AgentOutputCache()
+
+stats_engine = StatsEngine()
+
+def process_snapshot(pipeline, cricket_data: dict) -> dict:
+    with STAGE_SECONDS.time(stage="process"):
+        processed_data = pipeline._process_api_response(cricket_data)
+    # Exact numbers for the commentator, so no LLM has to work them out
+    with STAGE_SECONDS.time(stage="stats"):
+        processed_data["match_stats"] = stats_engine.analyze(pipeline.match_id, cricket_data)
+    return processed_data
+
+# Prompts carry only what changed since the last commentary, plus a capped memory of it
+prompt_builder = prompt_builder_from_env()
+
+def commentary_prompt(match_id: str, processed_data: dict) -> str:
+    prompt = prompt_builder.build(match_id, processed_data)
+    PROMPT_TOKENS.observe(estimate_tokens(prompt))
+    return prompt
+
+# Token estimate for the LLM scheduler: the agents' instructions ride along on every model
+# call, and a commentary is a few hundred words
+LLM_INSTRUCTION_TOKENS = 300
+LLM_OUTPUT_TOKENS = 500
+
+def llm_slot(key, processed_data: dict, prompt: str):
+    """Wait for LLM_SCHEDULER to admit a commentary run (priority from what just happened)"""
+    calls = expected_llm_calls()
+    tokens = calls * (estimate_tokens(prompt) + LLM_INSTRUCTION_TOKENS) + LLM_OUTPUT_TOKENS
+    priority = commentary_priority(processed_data.get("match_stats") or {})
+    return LLM_SCHEDULER.slot(key, priority, calls=calls, tokens=tokens)
+
+async def run_commentary_team(match_id: str, fingerprint: str, processed_data: dict):
+    # A near-identical situation earlier in the innings (same batters, another dot ball) reuses its commentary
+    situation = situation_for(match_id, processed_data)
+    agent_result = await asyncio.to_thread(SEMANTIC_CACHE.lookup, "commentary", situation)
+    if agent_result is None:
         print("Running commentary agent team...")
-        agent_result = cricket_commentary_team.run(cricket_data=processed_data)
+        prompt = commentary_prompt(match_id, processed_data)
+        # phi runs team members and tools synchronously, even from arun, so the whole
+        # run goes to a worker thread to keep the event loop free
+        async with llm_slot(match_id, processed_data, prompt):
+            with STAGE_SECONDS.time(stage="commentary"), situation_context(situation):
+                agent_result = await asyncio.to_thread(new_commentary_agent().run, prompt)
+        SEMANTIC_CACHE.store("commentary", situation, agent_result)
+    prompt_builder.commit(match_id, processed_data, getattr(agent_result, "content", None) or "")
+    agent_cache.put(match_id, fingerprint, agent_result)
+    return agent_result
+
+async def commentary_for(match_id: str, fingerprint: str, processed_data: dict):
+    """Run commentary agent team, unless nothing changed since the last run
+    (one in-flight run per match and scorecard state)"""
+    agent_result = agent_cache.get(match_id, fingerprint)
+    if agent_result is None:
+        agent_result = await agent_flights.do(
+            (match_id, fingerprint), run_commentary_team, match_id, fingerprint, processed_data)
+    return agent_result
+
+# --- Background polling ---
+# The poller keeps latest_state fresh for every active match, so endpoints don't wait on upstream
+latest_state = LatestStateStore()
+agent_tasks = {}
+# Warms the StatsAnalyzer's web searches; only useful when that LLM hop is on.
+# SEARCH_PREFETCH=0 turns it off regardless (e.g. offline load tests)
+search_prefetcher = PlayerPrefetcher(prefetch_player_searches,
+                                     enabled=stats_analyzer_enabled() and os.getenv("SEARCH_PREFETCH", "1") != "0")
+prefetch_tasks = {}
+
+async def refresh_match(pipeline) -> str:
+    """One poll cycle: fetch, publish the new scorecard, kick off commentary. Returns the match phase."""
+    cricket_data = await fetch_flights.do(pipeline.match_id, pipeline.fetch_cricket_data_async)
+    if not cricket_data:
+        POLLS.inc(match_id=pipeline.match_id, outcome="error")
+        raise RuntimeError("Could not fetch live data.")
+
+    processed_data = process_snapshot(pipeline, cricket_data)
+    fingerprint = scorecard_fingerprint(processed_data)
+    state = latest_state.get(pipeline.match_id)
+    if state is None or state["fingerprint"] != fingerprint:
+        POLLS.inc(match_id=pipeline.match_id, outcome="changed")
+        # Fast tier: a templated line goes out with the scorecard; the agents' commentary follows
+        with STAGE_SECONDS.time(stage="instant"):
+            line = instant_commentary(processed_data, fingerprint)
+        latest_state.publish_tier(pipeline.match_id, "instant", line, fingerprint, raw_data=cricket_data,
+                                  processed_data=processed_data, fingerprint=fingerprint)
+        # New batter or bowler: search for them now, while the agents are still starting up
+        prefetch_tasks[pipeline.match_id] = asyncio.create_task(
+            search_prefetcher.on_scorecard(pipeline.match_id, processed_data))
+        # Agents run in their own task so a slow LLM round trip doesn't hold up polling. A run
+        # still queued for an LLM slot is superseded by one for the newer scorecard.
+        task = agent_tasks.get(pipeline.match_id)
+        if task is None or task.done() or LLM_SCHEDULER.is_waiting(pipeline.match_id):
+            agent_tasks[pipeline.match_id] = asyncio.create_task(publish_commentary(pipeline.match_id))
+    else:
+        POLLS.inc(match_id=pipeline.match_id, outcome="unchanged")
+    return match_phase(cricket_data)
+
+async def publish_commentary(match_id: str):
+    """Generate commentary for the latest scorecard, catching up if it moved on while the agents ran"""
+    while True:
+        state = latest_state.get(match_id)
+        if state is None:
+            return
+        fingerprint = state["fingerprint"]
+        try:
+            agent_result = await commentary_for(match_id, fingerprint, state["processed_data"])
+        except SchedulerSkipped as e:
+            # Merged into a newer run or shed under load: the instant line stands for this scorecard
+            print(f"Commentary for match {match_id} skipped: {e}")
+            return
+        except Exception as e:
+            print(f"Commentary for match {match_id} failed: {e}")
+            return
+        latest_state.publish_tier(match_id, "enriched", getattr(agent_result, "content", agent_result), fingerprint,
+                                  agent_output=agent_result, agent_fingerprint=fingerprint)
+        if latest_state.get(match_id)["fingerprint"] == fingerprint:
+            return
+
+def forget_match(match_id: str):
+    for tasks in (agent_tasks, prefetch_tasks):
+        task = tasks.pop(match_id, None)
+        if task:
+            task.cancel()
+    latest_state.forget(match_id)
+    response_cache.forget(match_id)
+    agent_cache.forget(match_id)
+    search_prefetcher.forget(match_id)
+    stats_engine.forget(match_id)
+    SEMANTIC_CACHE.forget(match_id)
+    prompt_builder.forget(match_id)
+
+poller = AdaptivePoller(registry, refresh_match)
+registry.on_evict(forget_match)
+
+# Store-backed responses are versioned: clients revalidate with If-None-Match and
+# repeat polls for the same version reuse the already serialized body
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "30")),
+)
+LIVE_DATA_CACHE_CONTROL = f"public, max-age={os.getenv('LIVE_DATA_MAX_AGE', '1')}, must-revalidate"
 
-        # The agent result might be a dictionary or a string depending on the agent's last step
-        # We'll return the raw data, processed data, and the agent's result
-        return {
-            "raw_data": cricket_data,
-            "processed_data": processed_data,
-            "agent_output": agent_result
-        }
+@app.get("/api/live-data/{match_id}")
+async def get_live_data(match_id: str, request: Request):
+    pipeline = registry.get(match_id)
+    if not pipeline:
+        raise HTTPException(status_code=404, detail=f"Match {match_id} is not active. Please call /api/set-match/{match_id} first.")
 
-    except Exception as e:
-        # In a real application, you might want more specific error handling
-        print(f"An error occurred: {e}")
-        raise HTTPException(status_code=500, detail=f"An error occurred while fetching data or running agents: {e}")
-
-# Optional: Add an endpoint to stop the server process on shutdown
-# This is tricky with FastAPI and uvicorn lifecycle, may require custom handlers
-# For simplicity, we'll omit this for the basic version.
-# @app.on_event("shutdown")
-# def shutdown_event():
-#     global pipeline_instance
-#     if pipeline_instance and pipeline_instance.server_process:
-#         pipeline_instance.server_process.terminate()
-#         print("Flask server process terminated.") 
\ No newline at end of file
+    state = latest_state.get(match_id)
+    if state is None:
+        try:
+            # Cold match: do the poller's first cycle now (one in-flight fetch per match). The
+            # instant line is ready as soon as it returns; the agents carry on in the background.
+            await refresh_match(pipeline)
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            return {"message": "Could not fetch live data.", "data": {}}
+        state = latest_state.get(match_id)
+
+    # Served from the poller's store; every new tier or scorecard bumps the version
+    etag = make_etag(match_id, state["version"], state["fingerprint"], state["generation"])
+    headers = {"ETag": etag, "Cache-Control": LIVE_DATA_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    # The generation tells a re-registered match apart from the one that was evicted or deleted
+    body = response_cache.get_or_render((match_id, state["generation"], state["version"], state["fingerprint"]), lambda: {
+        "raw_data": state["raw_data"],
+        "processed_data": state["processed_data"],
+        # Latest full commentary, which may describe an earlier scorecard than the instant line
+        "agent_output": state.get("agent_output"),
+        "commentary": {"instant": state.get("instant"), "enriched": state.get("enriched")},
+    })
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Streaming clients watching the same match and scorecard share one streamed agent run
+commentary_streams = BroadcastGroup()
+
+async def stream_commentary_team(match_id: str, fingerprint: str, processed_data: dict, broadcast):
+    situation = situation_for(match_id, processed_data)
+    cached = agent_cache.get(match_id, fingerprint)
+    if cached is None:
+        cached = await asyncio.to_thread(SEMANTIC_CACHE.lookup, "commentary", situation)
+    if cached is not None:
+        # Nothing changed on the field, or nothing that reads differently: replay it as a single frame
+        broadcast.publish(getattr(cached, "content", cached))
+        return
+
+    print("Streaming commentary agent team...")
+    loop = asyncio.get_running_loop()
+    prompt = commentary_prompt(match_id, processed_data)
+
+    def produce():
+        # Runs in a worker thread (see run_commentary_team); tokens hop back onto the loop
+        for chunk in new_commentary_agent().run(prompt, stream=True):
+            if chunk.content:
+                loop.call_soon_threadsafe(broadcast.publish, chunk.content)
+
+    # Streams queue separately from the poller's runs so neither supersedes the other
+    async with llm_slot((match_id, "stream"), processed_data, prompt):
+        with STAGE_SECONDS.time(stage="commentary"), situation_context(situation):
+            await asyncio.to_thread(produce)
+    SEMANTIC_CACHE.store("commentary", situation, broadcast.text())
+    prompt_builder.commit(match_id, processed_data, broadcast.text())
+    agent_cache.put(match_id, fingerprint, broadcast.text())
+
+@app.get("/api/live-data/{match_id}/stream")
+async def stream_live_data(match_id: str):
+    """Server-Sent Events: a processed_data frame, the instant line, then commentary tokens as they are generated"""
+    pipeline = registry.get(match_id)
+    if not pipeline:
+        raise HTTPException(status_code=404, detail=f"Match {match_id} is not active. Please call /api/set-match/{match_id} first.")
+
+    state = latest_state.get(match_id)
+    if state is not None:
+        processed_data, fingerprint = state["processed_data"], state["fingerprint"]
+        instant = state.get("instant")
+    else:
+        cricket_data = await fetch_flights.do(pipeline.match_id, pipeline.fetch_cricket_data_async)
+        if not cricket_data:
+            raise HTTPException(status_code=502, detail="Could not fetch live data.")
+        processed_data = process_snapshot(pipeline, cricket_data)
+        fingerprint = scorecard_fingerprint(processed_data)
+        instant = {"text": instant_commentary(processed_data, fingerprint), "fingerprint": fingerprint, "version": 0}
+
+    broadcast = commentary_streams.get_or_start(
+        (pipeline.match_id, fingerprint),
+        lambda broadcast: stream_commentary_team(pipeline.match_id, fingerprint, processed_data, broadcast))
+
+    async def event_stream():
+        # The scorecard goes out before the first token so the UI can render straight away
+        yield sse_event("processed_data", processed_data)
+        if instant is not None:
+            yield sse_event("instant", instant)
+        try:
+            async for token in broadcast.subscribe():
+                yield sse_event("token", token)
+        except Exception as e:
+            yield sse_event("error", str(e))
+            return
+        yield sse_event("done", {"agent_output": broadcast.text()})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/poll-schedule")
+def get_poll_schedule():
+    return poller.schedule
+
+@app.get("/api/upstream-stats")
+def get_upstream_stats():
+    return upstream.stats()
+
+@app.get("/api/cache-stats")
+def get_cache_stats():
+    return {**agent_cache.stats(), "responses": response_cache.stats(), "searches": SEARCH_CACHE.stats(),
+            "semantic": SEMANTIC_CACHE.stats()}
+
+@app.get("/api/llm-scheduler")
+def get_llm_scheduler():
+    return LLM_SCHEDULER.stats()
+
+# --- Metrics ---
+# State that already lives in the caches, poller and upstream client is read at scrape time
+REGISTRY.callback_gauge(
+    "agent_cache_lookups_total", "Agent output cache lookups by result", ("result",),
+    lambda: {("hit",): agent_cache.stats()["hits"], ("miss",): agent_cache.stats()["misses"]},
+    metric_type="counter")
+REGISTRY.callback_gauge(
+    "response_cache_lookups_total", "Serialized response cache lookups by result", ("result",),
+    lambda: {("hit",): response_cache.hits, ("miss",): response_cache.misses},
+    metric_type="counter")
+REGISTRY.callback_gauge(
+    "search_cache_lookups_total", "Web-search tool cache lookups by result", ("result",),
+    lambda: {("hit",): SEARCH_CACHE.hits, ("miss",): SEARCH_CACHE.misses, ("prefetch",): SEARCH_CACHE.prefetched},
+    metric_type="counter")
+REGISTRY.callback_gauge(
+    "semantic_cache_lookups_total", "Situation-similarity cache lookups by agent output kind and result",
+    ("kind", "result"),
+    lambda: {(kind, result): counts[key] for kind, counts in SEMANTIC_CACHE.counts().items()
+             for result, key in (("hit", "hits"), ("miss", "misses"))},
+    metric_type="counter")
+REGISTRY.callback_gauge(
+    "singleflight_in_flight", "Coalesced operations currently running", ("kind",),
+    lambda: {("fetch",): fetch_flights.in_flight(), ("agent",): agent_flights.in_flight()})
+REGISTRY.callback_gauge(
+    "poll_lag_seconds", "How far each match's poll is behind its schedule", ("match_id",),
+    lambda: {(match_id,): max(0.0, time.time() - entry["next_poll_at"])
+             for match_id, entry in list(poller.schedule.items())})
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+REGISTRY.callback_gauge(
+    "upstream_circuit_state", "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)", ("upstream",),
+    lambda: {(host,): BREAKER_STATES[stats["state"]] for host, stats in upstream.stats().items()})
+REGISTRY.callback_gauge(
+    "upstream_requests_total", "Upstream request attempts by outcome", ("upstream", "outcome"),
+    lambda: {(host, outcome): stats[outcome] for host, stats in upstream.stats().items()
+             for outcome in ("requests", "retries", "failures", "short_circuited")},
+    metric_type="counter")
+REGISTRY.callback_gauge(
+    "llm_queue_depth", "Agent runs waiting for an LLM slot, by priority", ("priority",),
+    lambda: {(priority,): depth for priority, depth in LLM_SCHEDULER.queue_depth().items()})
+REGISTRY.callback_gauge(
+    "llm_runs_in_flight", "Agent runs holding an LLM slot", (),
+    lambda: {(): LLM_SCHEDULER.running})
+REGISTRY.callback_gauge(
+    "active_matches", "Matches in the pipeline registry", (),
+    lambda: {(): len(registry)})
+
+@app.middleware("http")
+async def track_in_flight(request: Request, call_next):
+    with HTTP_IN_FLIGHT.track_inprogress():
+        return await call_next(request)
+
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/live-data")
+async def get_default_live_data(request: Request, match_id: str = None):
+    """Backwards compatible endpoint: match_id query parameter, else the most recently set match"""
+    match_id = match_id or registry.most_recent()
+    if not match_id:
+        raise HTTPException(status_code=400, detail="Match ID not set. Please call /api/set-match/{match_id} first.")
+    return await get_live_data(match_id, request)
@@ -0,0 +1,143 @@
+import asyncio
+import re
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+# Seconds between polls for each match phase
+POLL_INTERVALS = {
+    "in_over": 2.0,         # balls are being bowled, stay tight
+    "between_overs": 5.0,   # a new bowler is walking in
+    "unknown": 10.0,
+    "innings_break": 60.0,
+    "delay": 120.0,         # rain, bad light, lunch/tea, drinks
+    "complete": 600.0,
+}
+MAX_ERROR_BACKOFF = 60.0
+
+COMPLETE_MARKERS = re.compile(r"\b(won by|match drawn|match tied|no result|abandoned|won the match)\b")
+DELAY_MARKERS = re.compile(r"\b(rain|bad light|wet outfield|lunch|tea|stumps|delayed|drinks)\b")
+BREAK_MARKERS = re.compile(r"\b(innings break|need|target|yet to bat)\b")
+OVERS_PATTERN = re.compile(r"\((\d+)(?:\.(\d))?")
+
+
+def match_phase(raw_data: dict) -> str:
+    """Classify the match from a raw cricket-api payload to decide how often to poll it"""
+    update = str(raw_data.get("update", "")).lower()
+    if COMPLETE_MARKERS.search(update):
+        return "complete"
+    if DELAY_MARKERS.search(update):
+        return "delay"
+    if "innings break" in update:
+        return "innings_break"
+
+    overs = OVERS_PATTERN.search(str(raw_data.get("livescore", "")))
+    if not overs:
+        # No overs in the score yet: either a break between innings or the toss
+        return "innings_break" if BREAK_MARKERS.search(update) else "unknown"
+    balls = int(overs.group(2) or 0)
+    return "in_over" if 0 < balls < 6 else "between_overs"
+
+
+class LatestStateStore:
+    """Latest raw/processed data and agent output per match, written by the poller"""
+
+    def __init__(self):
+        self._states: Dict[str, dict] = {}
+        # Bumped for every new state, so a match registered again never reuses an old (generation, version)
+        self._generations = 0
+
+    def update(self, match_id: str, **fields) -> dict:
+        state = self._states.get(match_id)
+        if state is None:
+            self._generations += 1
+            state = self._states[match_id] = {"version": 0, "generation": self._generations}
+        state.update(fields)
+        state["version"] += 1
+        state["updated_at"] = time.time()
+        return state
+
+    def publish_tier(self, match_id: str, tier: str, text: str, for_fingerprint: str, **fields) -> dict:
+        """Store one commentary tier ("instant" or "enriched") stamped with the version it is published at.
+
+        Clients show the tier with the higher version; an enriched text with the same
+        fingerprint as the instant line replaces it, an older one stays above it in the feed.
+        """
+        version = self._states.get(match_id, {"version": 0})["version"] + 1
+        fields[tier] = {"text": text, "fingerprint": for_fingerprint, "version": version}
+        return self.update(match_id, **fields)
+
+    def get(self, match_id: str) -> Optional[dict]:
+        return self._states.get(match_id)
+
+    def forget(self, match_id: str):
+        self._states.pop(match_id, None)
+
+
+class AdaptivePoller:
+    """Polls every active match in the background at a phase-dependent interval.
+
+    refresh(pipeline) does one fetch/publish cycle for a match and returns the
+    match phase (see match_phase). Errors back off exponentially.
+    """
+
+    def __init__(self, registry, refresh: Callable[[object], Awaitable[str]], reconcile_interval: float = 1.0):
+        self.registry = registry
+        self.refresh = refresh
+        self.reconcile_interval = reconcile_interval
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.schedule: Dict[str, dict] = {}
+
+    async def run(self):
+        """Start and stop per-match poll loops as matches are added to and evicted from the registry"""
+        while True:
+            self.reconcile()
+            await asyncio.sleep(self.reconcile_interval)
+
+    def reconcile(self):
+        self.registry.evict_idle()
+        active = set(self.registry.active_matches())
+        for match_id in active - set(self._tasks):
+            self.start(match_id)
+        for match_id in set(self._tasks) - active:
+            self.stop(match_id)
+
+    def start(self, match_id: str):
+        if match_id not in self._tasks:
+            self._tasks[match_id] = asyncio.create_task(self._poll_loop(match_id))
+
+    def stop(self, match_id: str):
+        task = self._tasks.pop(match_id, None)
+        if task:
+            task.cancel()
+        self.schedule.pop(match_id, None)
+
+    def stop_all(self):
+        for match_id in list(self._tasks):
+            self.stop(match_id)
+
+    async def _poll_loop(self, match_id: str):
+        errors = 0
+        while True:
+            pipeline = self.registry.peek(match_id)
+            if pipeline is None:
+                return
+            started = time.time()
+            try:
+                phase = await self.refresh(pipeline)
+                errors = 0
+                interval = POLL_INTERVALS.get(phase, POLL_INTERVALS["unknown"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                errors += 1
+                phase = "error"
+                interval = min(POLL_INTERVALS["in_over"] * 2 ** errors, MAX_ERROR_BACKOFF)
+                print(f"Polling match {match_id} failed ({errors} in a row): {e}")
+
+            self.schedule[match_id] = {
+                "phase": phase,
+                "interval": interval,
+                "last_poll_at": started,
+                "next_poll_at": started + interval,
+            }
+            await asyncio.sleep(max(0.0, started + interval - time.time()))
@@ -0,0 +1,166 @@
+import os
+import re
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+# Rough count, good enough for budgeting: about four characters per token
+CHARS_PER_TOKEN = 4
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+MARKDOWN = re.compile(r"[*_#>`]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    limit = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def summarize_commentary(text: str, max_tokens: int = 40) -> str:
+    """Opening sentence of a commentary, clipped: enough to remember what was already said"""
+    text = " ".join(MARKDOWN.sub("", text or "").split())
+    first = SENTENCE_END.split(text, maxsplit=1)[0]
+    return _clip(first, max_tokens)
+
+
+def _score_line(stats: dict) -> str:
+    score = stats.get("score")
+    if not score:
+        return ""
+    line = f"{score['runs']}/{score['wickets']} in {score['overs']} overs (RR {score['run_rate']})"
+    chase = stats.get("chase")
+    if chase and chase.get("required_rate") is not None:
+        line += f", need {chase['runs_needed']} from {chase['balls_left']} balls (RRR {chase['required_rate']})"
+    return line
+
+
+def _player_lines(stats: dict) -> List[str]:
+    batters = ", ".join(f"{b['name']} {b['runs']}({b['balls']})" for b in stats.get("batters", []))
+    bowlers = ", ".join(f"{b['name']} {b['overs']}-{b['runs']}-{b['wickets']}" for b in stats.get("bowlers", []))
+    lines = []
+    if batters:
+        lines.append(f"Batting: {batters}")
+    if bowlers:
+        lines.append(f"Bowling: {bowlers}")
+    return lines
+
+
+class _MatchMemory:
+    def __init__(self):
+        self.last_stats: Optional[dict] = None
+        self.last_context: Optional[str] = None
+        self.summaries: Deque[str] = deque()
+        self.summary_tokens = 0
+
+
+class PromptBuilder:
+    """Compact commentary prompts: what changed since the last commentary, plus a rolling memory.
+
+    The agent instructions (system prompt) never change, and the user message starts with
+    the match header, so the longest possible prefix stays identical between calls and
+    provider-side prompt caching can apply. Memory is capped at memory_tokens (oldest
+    lines go first) and the whole message at max_tokens.
+    """
+
+    def __init__(self, memory_tokens: int = 250, max_tokens: int = 800, summary_tokens: int = 40):
+        self.memory_tokens = memory_tokens
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self._matches: Dict[str, _MatchMemory] = {}
+
+    def build(self, match_id: str, processed_data: dict) -> str:
+        memory = self._matches.get(match_id) or _MatchMemory()
+        stats = processed_data.get("match_stats") or {}
+
+        header = [f"Match: {processed_data.get('team1', 'Unknown')} vs {processed_data.get('team2', 'Unknown')}"]
+        now = ["Now: " + (_score_line(stats) or processed_data.get("current_score", ""))] + _player_lines(stats)
+        context = processed_data.get("context") or ""
+        changes = self._changes(memory, processed_data, stats)
+        recall = list(memory.summaries)
+
+        def render() -> str:
+            parts = header[:]
+            if recall:
+                parts += ["Already said (build on it, don't repeat):"] + [f"- {line}" for line in recall]
+            parts += now
+            if changes:
+                parts += ["Since the last commentary:"] + [f"- {line}" for line in changes]
+            parts.append("Commentate on what just happened.")
+            return "\n".join(parts)
+
+        prompt = render()
+        # Over budget: forget the oldest memory first, then changes from the front, always
+        # keeping the current update line the commentary is about
+        while estimate_tokens(prompt) > self.max_tokens and (recall or len(changes) > 1):
+            if recall:
+                recall.pop(0)
+            else:
+                changes.pop(next((i for i, line in enumerate(changes) if line != context), 0))
+            prompt = render()
+        return prompt
+
+    def _changes(self, memory: _MatchMemory, processed_data: dict, stats: dict) -> List[str]:
+        previous = memory.last_stats
+        context = processed_data.get("context") or ""
+        if previous is None:
+            # First commentary for this match: the full picture, briefly
+            changes = [context] if context else []
+            partnership = stats.get("partnership")
+            if partnership:
+                changes.append(f"Partnership {partnership['runs']} off {partnership['balls']}")
+            return changes + stats.get("highlights", [])
+
+        changes = []
+        score, before = stats.get("score"), previous.get("score")
+        if score and before:
+            runs, wickets = score["runs"] - before["runs"], score["wickets"] - before["wickets"]
+            if runs or wickets:
+                changes.append(f"{runs} runs" + (f" and {wickets} wicket{'s' if wickets > 1 else ''}" if wickets else "")
+                               + f" since {before['overs']} overs")
+        batters = {b["name"] for b in stats.get("batters", [])}
+        old_batters = {b["name"] for b in previous.get("batters", [])}
+        for name in sorted(batters - old_batters):
+            changes.append(f"New batter: {name}")
+        bowlers, old_bowlers = stats.get("bowlers", []), previous.get("bowlers", [])
+        if bowlers and (not old_bowlers or bowlers[0]["name"] != old_bowlers[0]["name"]):
+            changes.append(f"Bowling change: {bowlers[0]['name']} on")
+        trend = stats.get("run_rate_trend") or {}
+        if trend.get("direction") != (previous.get("run_rate_trend") or {}).get("direction") \
+                and trend.get("direction") in ("accelerating", "slowing"):
+            changes.append(f"Scoring is {trend['direction']} (last {trend['recent_balls']} balls at "
+                           f"{trend['recent_run_rate']})")
+        for key in ("milestones", "highlights"):
+            changes += [item for item in stats.get(key, []) if item not in previous.get(key, [])]
+        if context and context != memory.last_context:
+            changes.append(context)
+        return changes
+
+    def commit(self, match_id: str, processed_data: dict, commentary: str):
+        """Record a commentary that went out: later prompts are deltas from this point"""
+        memory = self._matches.setdefault(match_id, _MatchMemory())
+        stats = processed_data.get("match_stats") or {}
+        memory.last_stats = stats
+        memory.last_context = processed_data.get("context") or ""
+
+        summary = summarize_commentary(commentary, self.summary_tokens)
+        if not summary:
+            return
+        score = stats.get("score")
+        if memory.summaries and memory.summaries[-1].endswith(summary):
+            # Commentary reused from a near-identical situation: nothing new was said
+            return
+        line = f"[{score['overs']} ov] {summary}" if score else summary
+        memory.summaries.append(line)
+        memory.summary_tokens += estimate_tokens(line)
+        while memory.summary_tokens > self.memory_tokens and len(memory.summaries) > 1:
+            memory.summary_tokens -= estimate_tokens(memory.summaries.popleft())
+
+    def forget(self, match_id: str):
+        self._matches.pop(match_id, None)
+
+
+def prompt_builder_from_env() -> PromptBuilder:
+    return PromptBuilder(memory_tokens=int(os.getenv("PROMPT_MEMORY_TOKENS", "250")),
+                         max_tokens=int(os.getenv("PROMPT_MAX_TOKENS", "800")))
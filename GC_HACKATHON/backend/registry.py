@@ -0,0 +1,181 @@
+import asyncio
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+
+class CricketApiServer:
+    """One shared cricket-api Flask process, restarted if it dies"""
+
+    def __init__(self, repo_path: str = "cricket-api/api", host: str = "127.0.0.1", port: int = 5000,
+                 session=None):
+        # Health checks can share the pipelines' keep-alive session
+        self.session = session or requests.Session()
+        self.repo_path = Path(repo_path)
+        self.base_url = f"http://{host}:{port}"
+        self.port = port
+        self.server_process = None
+        self.restarts = 0
+        self._lock = threading.Lock()
+
+    def score_url(self, match_id: str) -> str:
+        return f"{self.base_url}/score?id={match_id}"
+
+    def is_healthy(self) -> bool:
+        try:
+            self.session.get(f"{self.base_url}/", timeout=1)
+            return True
+        except requests.exceptions.RequestException:
+            return False
+
+    def ensure_running(self):
+        """Start local API server from cricket-api repository unless it is already up"""
+        with self._lock:
+            if self.server_process and self.server_process.poll() is None:
+                return
+            if self.server_process:
+                # Our process exited underneath us
+                print(f"Flask server exited with code {self.server_process.returncode}, restarting...")
+                self.server_process = None
+                self.restarts += 1
+
+            # Check if server is already running (e.g. started by another worker)
+            if self.is_healthy():
+                print("Flask server is already running.")
+                return
+
+            self._start()
+
+    def _start(self):
+        if not self.repo_path.exists():
+            # print("Cloning cricket-api repository...")
+            subprocess.run(["git", "clone", "https://github.com/sanwebinfo/cricket-api"])
+
+        # Start the server process
+        print("Starting Flask server...")
+        self.server_process = subprocess.Popen(
+            ["flask", "--app", "index.py", "run", "--host=0.0.0.0", f"--port={self.port}"],
+            cwd=self.repo_path,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
+        # Wait for server to become available
+        max_attempts = 30
+        for attempt in range(max_attempts):
+            try:
+                response = self.session.get(f"{self.base_url}/", timeout=2)
+                if response.status_code == 200:
+                    print("Flask server started successfully!")
+                    return
+            except requests.exceptions.RequestException:
+                # Server not ready yet, wait and try again
+                time.sleep(1)
+
+        raise TimeoutError(f"Flask server failed to start after {max_attempts} seconds")
+
+    async def supervise(self, interval: float = 5.0):
+        """Background task: restart the Flask process whenever it has exited"""
+        while True:
+            await asyncio.sleep(interval)
+            if self.server_process and self.server_process.poll() is not None:
+                try:
+                    await asyncio.to_thread(self.ensure_running)
+                except Exception as e:
+                    print(f"Server restart failed: {e}")
+
+    def stop(self):
+        with self._lock:
+            if self.server_process and self.server_process.poll() is None:
+                self.server_process.terminate()
+                print("Flask server process terminated.")
+            self.server_process = None
+
+
+class PipelineRegistry:
+    """Per-match CricketDataPipeline objects, capped in number and evicted LRU when idle"""
+
+    def __init__(self, pipeline_factory: Callable[[str], object], max_matches: int = 8,
+                 idle_timeout: float = 15 * 60):
+        self.pipeline_factory = pipeline_factory
+        self.max_matches = max_matches
+        self.idle_timeout = idle_timeout
+        # Ordered from least to most recently used
+        self._pipelines: "OrderedDict[str, object]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._evict_listeners: List[Callable[[str], None]] = []
+
+    def on_evict(self, listener: Callable[[str], None]):
+        """Call listener(match_id) whenever a match leaves the registry"""
+        self._evict_listeners.append(listener)
+
+    def register(self, match_id: str):
+        """Return the pipeline for match_id, creating it (and evicting others) if needed"""
+        self.evict_idle()
+        pipeline = self.get(match_id)
+        if pipeline is not None:
+            return pipeline
+
+        while len(self._pipelines) >= self.max_matches:
+            lru_match_id = next(iter(self._pipelines))
+            print(f"Evicting least recently used match {lru_match_id}")
+            self.remove(lru_match_id)
+
+        pipeline = self.pipeline_factory(match_id)
+        self._pipelines[match_id] = pipeline
+        self._last_used[match_id] = time.monotonic()
+        return pipeline
+
+    def get(self, match_id: str):
+        pipeline = self._pipelines.get(match_id)
+        if pipeline is not None:
+            self._pipelines.move_to_end(match_id)
+            self._last_used[match_id] = time.monotonic()
+        return pipeline
+
+    def peek(self, match_id: str):
+        """Like get, but without counting as use (background work must not keep a match alive)"""
+        return self._pipelines.get(match_id)
+
+    def remove(self, match_id: str) -> bool:
+        self._last_used.pop(match_id, None)
+        if self._pipelines.pop(match_id, None) is None:
+            return False
+        for listener in self._evict_listeners:
+            listener(match_id)
+        return True
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        now = time.monotonic() if now is None else now
+        idle = [match_id for match_id, last_used in self._last_used.items()
+                if now - last_used > self.idle_timeout]
+        for match_id in idle:
+            print(f"Evicting idle match {match_id}")
+            self.remove(match_id)
+        return idle
+
+    def most_recent(self) -> Optional[str]:
+        return next(reversed(self._pipelines), None)
+
+    def active_matches(self) -> List[str]:
+        return list(self._pipelines)
+
+    def __contains__(self, match_id: str) -> bool:
+        return match_id in self._pipelines
+
+    def __len__(self) -> int:
+        return len(self._pipelines)
+
+
+def registry_from_env(pipeline_factory: Callable[[str], object]) -> PipelineRegistry:
+    return PipelineRegistry(
+        pipeline_factory,
+        max_matches=int(os.getenv("MAX_ACTIVE_MATCHES", "8")),
+        idle_timeout=float(os.getenv("MATCH_IDLE_TIMEOUT", str(15 * 60))),
+    )
@@ -0,0 +1,133 @@
+import asyncio
+import os
+
+from http_client import UpstreamClient
+
+NO_DATA = "Data Not Found"
+NO_UPDATE = "Match Stats will Update Soon..."
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+}
+
+# (key, tag, class attribute, index) for every field of the cricket-api /score response,
+# using the same Cricbuzz selectors as sanwebinfo/cricket-api
+FIELDS = [
+    ("title", "h1", "cb-nav-hdr cb-font-18 line-ht24", 0),
+    ("livescore", "span", "cb-font-20 text-bold", 0),
+    ("runrate", "span", "cb-font-12 cb-text-gray", 0),
+    ("batterone", "div", "cb-col cb-col-50", 1),
+    ("battertwo", "div", "cb-col cb-col-50", 2),
+    ("bowlerone", "div", "cb-col cb-col-50", 4),
+    ("bowlertwo", "div", "cb-col cb-col-50", 5),
+    ("batsmanonerun", "div", "cb-col cb-col-10 ab text-right", 0),
+    ("batsmanoneball", "div", "cb-col cb-col-10 ab text-right", 1),
+    ("batsmanonesr", "div", "cb-col cb-col-14 ab text-right", 0),
+    ("batsmantworun", "div", "cb-col cb-col-10 ab text-right", 2),
+    ("batsmantwoball", "div", "cb-col cb-col-10 ab text-right", 3),
+    ("batsmantwosr", "div", "cb-col cb-col-14 ab text-right", 1),
+    ("bowleroneover", "div", "cb-col cb-col-10 text-right", 4),
+    ("bowleronerun", "div", "cb-col cb-col-10 text-right", 5),
+    ("bowleronewickers", "div", "cb-col cb-col-8 text-right", 5),
+    ("bowleroneeconomy", "div", "cb-col cb-col-14 text-right", 2),
+    ("bowlertwoover", "div", "cb-col cb-col-10 text-right", 6),
+    ("bowlertworun", "div", "cb-col cb-col-10 text-right", 7),
+    ("bowlertwowickers", "div", "cb-col cb-col-8 text-right", 7),
+    ("bowlertwoeconomy", "div", "cb-col cb-col-14 text-right", 3),
+]
+
+# Status banners, checked in order; the first one present becomes "update"
+STATUS_CLASSES = [
+    "cb-col cb-col-100 cb-min-stts cb-text-complete",
+    "cb-text-inprogress",
+    "cb-col cb-col-100 cb-font-18 cb-toss-sts cb-text-abandon",
+    "cb-text-stumps",
+    "cb-text-lunch",
+    "cb-text-inningsbreak",
+    "cb-text-tea",
+    "cb-text-rain",
+    "cb-text-wetoutfield",
+]
+
+# Only build a tree for the tags we read, which is most of the parse cost saved
+RELEVANT_TAGS = ["h1", "span", "div"]
+
+
+def parse_live_score(html: str) -> dict:
+    """Parse a Cricbuzz live-score page into the dict shape cricket-api's /score returns"""
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer(RELEVANT_TAGS))
+    found = {}
+
+    def text_of(tag: str, css_class: str, index: int):
+        key = (tag, css_class)
+        if key not in found:
+            found[key] = soup.find_all(tag, attrs={"class": css_class})
+        elements = found[key]
+        return elements[index].text.strip() if index < len(elements) else None
+
+    data = {}
+    for key, tag, css_class, index in FIELDS:
+        value = text_of(tag, css_class, index)
+        data[key] = NO_DATA if value is None else value
+    data["title"] = data["title"].replace(", Commentary", "")
+
+    data["update"] = NO_UPDATE
+    for css_class in STATUS_CLASSES:
+        status = text_of("div", css_class, 0)
+        if status:
+            data["update"] = status
+            break
+    return data
+
+
+class FlaskScoreProvider:
+    """Scores from the sanwebinfo/cricket-api Flask app (needs CricketApiServer running)"""
+
+    name = "flask"
+    needs_api_server = True
+
+    def __init__(self, client: UpstreamClient, base_url: str = "http://127.0.0.1:5000"):
+        self.client = client
+        self.base_url = base_url
+
+    def score_url(self, match_id: str) -> str:
+        return f"{self.base_url}/score?id={match_id}"
+
+    def fetch(self, match_id: str) -> dict:
+        return self.client.get_json(self.score_url(match_id))
+
+    async def afetch(self, match_id: str) -> dict:
+        return await self.client.aget_json(self.score_url(match_id))
+
+
+class CricbuzzScoreProvider:
+    """Scores parsed in-process from the Cricbuzz live-score page: no subprocess, no localhost hop"""
+
+    name = "native"
+    needs_api_server = False
+
+    def __init__(self, client: UpstreamClient, base_url: str = "https://www.cricbuzz.com/live-cricket-scores"):
+        self.client = client
+        self.base_url = base_url
+
+    def score_url(self, match_id: str) -> str:
+        return f"{self.base_url}/{match_id}"
+
+    def fetch(self, match_id: str) -> dict:
+        return parse_live_score(self.client.get_text(self.score_url(match_id), headers=BROWSER_HEADERS))
+
+    async def afetch(self, match_id: str) -> dict:
+        html = await self.client.aget_text(self.score_url(match_id), headers=BROWSER_HEADERS)
+        # Parsing is CPU bound, keep it off the event loop
+        return await asyncio.to_thread(parse_live_score, html)
+
+
+def provider_from_env(client: UpstreamClient, flask_base_url: str = "http://127.0.0.1:5000"):
+    """SCORE_PROVIDER=native (default) parses Cricbuzz directly; SCORE_PROVIDER=flask uses cricket-api"""
+    name = os.getenv("SCORE_PROVIDER", "native").lower()
+    if name == "flask":
+        return FlaskScoreProvider(client, flask_base_url)
+    if name != "native":
+        raise ValueError(f"Unknown SCORE_PROVIDER {name!r}, expected 'native' or 'flask'")
+    return CricbuzzScoreProvider(client)
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Set, Tuple
+
+# Words agents put around player names that don't change what DuckDuckGo returns much
+NOISE_WORDS = {
+    "a", "an", "and", "the", "of", "in", "for", "on", "to", "with", "about",
+    "cricket", "cricketer", "player", "stats", "statistics", "statistical", "record", "records",
+    "career", "profile", "facts", "interesting", "latest", "recent", "performance", "performances",
+}
+PLACEHOLDER_NAMES = {"", "data not found", "unknown"}
+# One query per player, normalized to just the name, so any "<name> stats" style search hits
+PREFETCH_QUERY = "{name} cricket statistics"
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation, word order and filler words don't make a different search"""
+    words = re.findall(r"[a-z0-9]+", query.lower())
+    kept = sorted({word for word in words if word not in NOISE_WORDS})
+    return " ".join(kept) or " ".join(sorted(set(words)))
+
+
+class SearchCache:
+    """TTL + LRU cache of web-search tool results keyed by normalized query.
+
+    Searches run in agent worker threads, so lookups are locked and concurrent misses
+    for one key wait for a single search instead of all going out.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 1800.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, str]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+
+    def key(self, kind: str, query: str, max_results: int) -> Tuple[str, str, int]:
+        return kind, normalize_query(query), int(max_results)
+
+    def get_or_search(self, kind: str, query: str, max_results: int, search: Callable[[], str]) -> str:
+        key = self.key(kind, query, max_results)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                waiting = self._in_flight.get(key)
+                if waiting is None:
+                    self.misses += 1
+                    self._in_flight[key] = threading.Event()
+                    break
+            # Someone else is running this search; use their result (or retry if it failed)
+            waiting.wait()
+
+        try:
+            result = search()
+            with self._lock:
+                self._entries[key] = (time.monotonic(), result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key).set()
+
+    def contains(self, kind: str, query: str, max_results: int) -> bool:
+        with self._lock:
+            entry = self._entries.get(self.key(kind, query, max_results))
+            return entry is not None and time.monotonic() - entry[0] <= self.ttl
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "prefetched": self.prefetched,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def players_in(processed_data: dict) -> Set[str]:
+    """Batters and bowlers named in a processed scorecard"""
+    player_stats = processed_data.get("player_stats") or {}
+    names = set()
+    for group in ("batsmen", "bowlers"):
+        names.update((player_stats.get(group) or {}).keys())
+    return {name.strip() for name in names if name and name.strip().lower() not in PLACEHOLDER_NAMES}
+
+
+class PlayerPrefetcher:
+    """Warms the search cache in the background when a new batter or bowler shows up in a match"""
+
+    def __init__(self, prefetch: Callable[[List[str]], None], enabled: bool = True):
+        self.prefetch = prefetch
+        self.enabled = enabled
+        self._seen: Dict[str, Set[str]] = {}
+
+    def new_players(self, match_id: str, processed_data: dict) -> List[str]:
+        players = players_in(processed_data)
+        seen = self._seen.setdefault(match_id, set())
+        new = sorted(players - seen)
+        seen.update(new)
+        return new
+
+    async def on_scorecard(self, match_id: str, processed_data: dict):
+        new = self.new_players(match_id, processed_data)
+        if new and self.enabled:
+            # Searches block, keep them off the event loop
+            await asyncio.to_thread(self.prefetch, new)
+
+    def forget(self, match_id: str):
+        self._seen.pop(match_id, None)
+
+
+def search_cache_from_env() -> SearchCache:
+    return SearchCache(max_entries=int(os.getenv("SEARCH_CACHE_SIZE", "512")),
+                       ttl=float(os.getenv("SEARCH_CACHE_TTL", "1800")))
+
+
+SEARCH_CACHE = search_cache_from_env()
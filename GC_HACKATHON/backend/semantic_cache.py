@@ -0,0 +1,212 @@
+"""Reuse agent output across near-identical match situations.
+
+A dot ball with the same batters and bowler, or a single that rotates the strike, reads
+the same to the StatsAnalyzer and the commentary agents as the ball before it. Each
+such routine situation is reduced to a canonical text (no exact scores, no strike-rate
+decimals), embedded with the pipeline's all-MiniLM-L6-v2 embedder, and compared with
+earlier situations of the same match and innings. Without the embedding packages only
+identical canonical texts match. Boundaries, wickets and milestones are never routine:
+their text keeps the score, over and players, and only the same ball matches it.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+# The embedder lives in cricket_pipeline, see stats_engine.py
+PIPELINE_DIR = Path(__file__).resolve().parent.parent / "cricket_pipeline"
+if str(PIPELINE_DIR) not in sys.path:
+    sys.path.append(str(PIPELINE_DIR))
+
+from processing.embeddings import get_embedder  # noqa: E402
+
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+APPROACHING = re.compile(r"needs \d+ for (\d+)")
+
+
+class Situation(NamedTuple):
+    match_id: str
+    innings: int
+    text: str
+    # Only routine situations are matched by similarity; the rest need the exact text
+    routine: bool = True
+
+
+def _last_ball(stats: dict) -> str:
+    events = stats.get("events") or []
+    for kind in ("wicket", "six", "four"):
+        if kind in events:
+            return kind
+    if events:
+        return "several balls, runs scored"
+    if stats.get("scorer"):
+        return f"runs to {stats['scorer']}"
+    return "dot ball"
+
+
+def is_routine(stats: dict) -> bool:
+    """Dots and singles, with no milestone reached: the commentary on one fits the next"""
+    if _last_ball(stats) not in ("dot ball", f"runs to {stats.get('scorer')}"):
+        return False
+    return all(APPROACHING.search(milestone) for milestone in stats.get("milestones") or [])
+
+
+def situation_text(processed_data: dict) -> str:
+    """Canonical description of the match situation: only what would change the analysis"""
+    stats = processed_data.get("match_stats") or {}
+    score = stats.get("score") or {}
+    over = int(float(score.get("overs") or 0))
+    lines = [
+        f"Innings {stats.get('innings', 1)}, overs {over // 5 * 5}-{over // 5 * 5 + 5}, "
+        f"{score.get('wickets', 0)} wickets down",
+        f"Last ball: {_last_ball(stats)}",
+        "Batting: " + ", ".join(line["name"] for line in stats.get("batters") or []),
+        "Bowling: " + ", ".join(line["name"] for line in (stats.get("bowlers") or [])[:1]),
+        f"Scoring {(stats.get('run_rate_trend') or {}).get('direction', 'unknown')}",
+    ]
+    chase = stats.get("chase")
+    if chase and chase.get("required_rate") is not None:
+        lines.append(f"Chasing at a required rate of about {round(chase['required_rate'])}")
+    lines += [APPROACHING.sub(r"nearing \1", milestone) for milestone in stats.get("milestones") or []]
+    lines += [NUMBER.sub("#", highlight) for highlight in stats.get("highlights") or []]
+    if not is_routine(stats):
+        # A boundary or wicket is about this ball: who, when and the score it left
+        lines.append(f"Score {score.get('runs', 0)}/{score.get('wickets', 0)} after {score.get('overs', 0)} overs")
+        lines += [f"{role.capitalize()}: {stats[role]}" for role in ("scorer", "dismissed") if stats.get(role)]
+    return "\n".join(lines)
+
+
+def situation_for(match_id: str, processed_data: dict) -> Situation:
+    stats = processed_data.get("match_stats") or {}
+    return Situation(match_id, stats.get("innings", 1), situation_text(processed_data), is_routine(stats))
+
+
+# The situation of the run in progress, for agents deep inside a phi team (see commentary_agents.py)
+CURRENT_SITUATION: ContextVar[Optional[Situation]] = ContextVar("situation", default=None)
+
+
+@contextmanager
+def situation_context(situation: Situation):
+    token = CURRENT_SITUATION.set(situation)
+    try:
+        yield
+    finally:
+        CURRENT_SITUATION.reset(token)
+
+
+class SemanticCache:
+    """Agent outputs by situation embedding, matched within the same kind, match and innings.
+
+    Bounded LRU with TTL; hit and miss counts per kind. Thread-safe: the StatsAnalyzer
+    looks up from agent worker threads.
+    """
+
+    def __init__(self, threshold: float = 0.97, max_entries: int = 256, ttl: float = 300.0,
+                 enabled: bool = True, embedder=None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._embedder = embedder
+        # (kind, match_id, innings, text) -> (stored_at, unit vector or None, value)
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any, Any]]" = OrderedDict()
+        self._vectors: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._counts: Dict[Hashable, Dict[str, int]] = {}
+
+    def _embed(self, text: str):
+        with self._lock:
+            if text in self._vectors:
+                self._vectors.move_to_end(text)
+                return self._vectors[text]
+        with self._load_lock:
+            if self._embedder is None:
+                # Loaded on first use, in whichever worker thread gets here first
+                self._embedder = get_embedder() or False
+        if not self._embedder:
+            return None
+
+        import numpy as np
+
+        vector = np.asarray(self._embedder.embed_query(text), dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        with self._lock:
+            self._vectors[text] = vector
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def lookup(self, kind: str, situation: Situation) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        key = (kind, *situation)
+        now = time.monotonic()
+        with self._lock:
+            counts = self._counts.setdefault(kind, {"hits": 0, "misses": 0})
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                counts["hits"] += 1
+                return entry[2]
+
+        vector = self._embed(situation.text) if situation.routine else None
+        best, best_key = self.threshold, None
+        with self._lock:
+            if vector is not None:
+                for other, (stored_at, other_vector, _) in self._entries.items():
+                    if other[:3] != key[:3] or other_vector is None or now - stored_at > self.ttl:
+                        continue
+                    similarity = float(vector @ other_vector)
+                    if similarity >= best:
+                        best, best_key = similarity, other
+            if best_key is None:
+                counts["misses"] += 1
+                return None
+            self._entries.move_to_end(best_key)
+            counts["hits"] += 1
+            return self._entries[best_key][2]
+
+    def store(self, kind: str, situation: Situation, value: Any):
+        if not self.enabled or value is None:
+            return
+        vector = self._embed(situation.text) if situation.routine else None
+        with self._lock:
+            key = (kind, *situation)
+            self._entries[key] = (time.monotonic(), vector, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, match_id: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == match_id]:
+                del self._entries[key]
+
+    def counts(self) -> Dict[Hashable, Dict[str, int]]:
+        with self._lock:
+            return {kind: dict(counts) for kind, counts in self._counts.items()}
+
+    def stats(self) -> dict:
+        counts = self.counts()
+        stats = {"entries": len(self._entries), "enabled": self.enabled, "embeddings": bool(self._embedder)}
+        for kind, kind_counts in counts.items():
+            total = kind_counts["hits"] + kind_counts["misses"]
+            stats[kind] = {**kind_counts, "hit_rate": kind_counts["hits"] / total if total else 0.0}
+        return stats
+
+
+def semantic_cache_from_env() -> SemanticCache:
+    return SemanticCache(threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97")),
+                         max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "256")),
+                         ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "300")),
+                         enabled=os.getenv("SEMANTIC_CACHE", "1") != "0")
+
+
+SEMANTIC_CACHE = semantic_cache_from_env()
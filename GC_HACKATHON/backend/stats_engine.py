@@ -0,0 +1,162 @@
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# Match state lives in cricket_pipeline so both apps can use it. Appended, not prepended,
+# so backend modules (main.py in particular) still win on name clashes.
+PIPELINE_DIR = Path(__file__).resolve().parent.parent / "cricket_pipeline"
+if str(PIPELINE_DIR) not in sys.path:
+    sys.path.append(str(PIPELINE_DIR))
+
+from processing.match_state import (  # noqa: E402
+    MatchState, MatchStateStore, Score, balls_to_overs, is_player, overs_to_balls, per_over, player_name, to_int
+)
+
+BATTING_MILESTONES = (50, 100, 150, 200)
+TEAM_MILESTONE_STEP = 50
+RECENT_WINDOW_BALLS = 30
+# Run-rate difference (runs per over) between the recent window and the innings that counts as a trend
+TREND_THRESHOLD = 1.0
+
+
+def strike_rate(runs: int, balls: int) -> Optional[float]:
+    return round(100.0 * runs / balls, 2) if balls else None
+
+
+def batter_lines(raw: dict) -> List[dict]:
+    lines = []
+    for slot, prefix in (("batterone", "batsmanone"), ("battertwo", "batsmantwo")):
+        name = raw.get(slot)
+        if not is_player(name):
+            continue
+        runs, balls = to_int(raw.get(f"{prefix}run")), to_int(raw.get(f"{prefix}ball"))
+        lines.append({"name": player_name(name), "runs": runs, "balls": balls, "strike_rate": strike_rate(runs, balls)})
+    return lines
+
+
+def bowler_lines(state: MatchState) -> List[dict]:
+    lines = []
+    for name in state.last_bowlers:
+        figures = state.bowler_figures[name]
+        lines.append({"name": name, "overs": balls_to_overs(figures.balls), "runs": figures.runs,
+                      "wickets": figures.wickets, "economy": per_over(figures.runs, figures.balls)})
+    return lines
+
+
+class StatsEngine:
+    """Deterministic match statistics from raw cricket-api payloads and the per-match MatchState.
+
+    Strike rates, economy, run-rate trend, partnership and milestones are plain arithmetic,
+    so they are computed here in microseconds instead of by an LLM.
+    """
+
+    def __init__(self, states: MatchStateStore = None):
+        self.states = states or MatchStateStore()
+
+    def analyze(self, match_id: str, raw: dict) -> dict:
+        state = self.states.state(match_id)
+        changed = state.ingest(raw)
+        score = state.last_score
+        batters = batter_lines(raw)
+
+        stats = {"innings": state.innings, "batters": batters, "bowlers": bowler_lines(state), "events": [],
+                 "milestones": [], "highlights": []}
+        if score is not None:
+            stats["score"] = {"runs": score.runs, "wickets": score.wickets, "overs": balls_to_overs(score.balls),
+                              "run_rate": state.run_rate()}
+            stats["run_rate_trend"] = self._run_rate_trend(state, score)
+            stats["partnership"] = self._partnership(state, batters)
+            if changed:
+                stats["events"] = self._events(state.previous_score, score)
+                stats["milestones"] = self._team_milestones(state.previous_score, score)
+                stats.update(self._who(state))
+        if state.chase:
+            stats["chase"] = state.chase
+
+        stats["milestones"] += self._batting_milestones(state, batters)
+        stats["highlights"] = self._highlights(batters, stats["bowlers"])
+        return stats
+
+    def forget(self, match_id: str):
+        self.states.forget(match_id)
+
+    def _run_rate_trend(self, state: MatchState, score: Score) -> dict:
+        recent = state.recent_run_rate(RECENT_WINDOW_BALLS)
+        trend = {"recent_balls": recent["balls"] if recent else 0, "recent_run_rate": None, "direction": "unknown"}
+        if recent and recent["balls"] >= 6 and score.balls:
+            difference = recent["run_rate"] - score.runs * 6.0 / score.balls
+            trend["recent_run_rate"] = recent["run_rate"]
+            trend["direction"] = ("accelerating" if difference > TREND_THRESHOLD
+                                  else "slowing" if difference < -TREND_THRESHOLD else "steady")
+        return trend
+
+    def _partnership(self, state: MatchState, batters: List[dict]) -> dict:
+        partnership = state.partnership()
+        if partnership is not None:
+            return {**partnership, "estimated": False}
+        # No wicket seen since we started watching: the two batters' own runs, extras not included
+        return {"runs": sum(line["runs"] for line in batters), "balls": sum(line["balls"] for line in batters),
+                "estimated": True}
+
+    def _events(self, previous: Optional[Score], score: Score) -> List[str]:
+        if previous is None:
+            return []
+        events = []
+        if score.wickets > previous.wickets:
+            events.append("wicket")
+        runs, balls = score.runs - previous.runs, score.balls - previous.balls
+        if balls == 1 and runs in (4, 6):
+            events.append("four" if runs == 4 else "six")
+        elif balls > 1 and runs:
+            events.append(f"{runs} runs from {balls} balls")
+        return events
+
+    def _who(self, state: MatchState) -> dict:
+        """The batter who scored the runs and the one who got out, when the snapshots show it"""
+        who = {}
+        if not state.batters_moved:
+            return who
+        before, now = state.previous_batter_runs, state.batter_runs
+        scored = {name: runs - before[name] for name, runs in now.items() if name in before and runs > before[name]}
+        if scored:
+            who["scorer"] = max(scored, key=scored.get)
+        gone = [name for name in before if name not in now]
+        if gone and state.previous_score is not None and state.last_score.wickets > state.previous_score.wickets:
+            who["dismissed"] = gone[0]
+        return who
+
+    def _team_milestones(self, previous: Optional[Score], score: Score) -> List[str]:
+        if previous is None or score.runs // TEAM_MILESTONE_STEP <= previous.runs // TEAM_MILESTONE_STEP:
+            return []
+        return [f"team {score.runs // TEAM_MILESTONE_STEP * TEAM_MILESTONE_STEP} up"]
+
+    def _batting_milestones(self, state: MatchState, batters: List[dict]) -> List[str]:
+        milestones = []
+        for line in batters:
+            # previous_batter_runs only moves when the batters' runs do: compare on those snapshots
+            # alone, or a repeat poll would reach the same milestone again
+            before = state.previous_batter_runs.get(line["name"]) if state.batters_moved else None
+            for mark in BATTING_MILESTONES:
+                if before is not None and before < mark <= line["runs"]:
+                    milestones.append(f"{line['name']} reaches {mark}")
+                elif mark - 10 <= line["runs"] < mark:
+                    milestones.append(f"{line['name']} needs {mark - line['runs']} for {mark}")
+        return milestones
+
+    def _highlights(self, batters: List[dict], bowlers: List[dict]) -> List[str]:
+        highlights = []
+        for line in batters:
+            if line["balls"] >= 10 and (line["strike_rate"] or 0) >= 150:
+                highlights.append(f"{line['name']} striking at {line['strike_rate']}")
+            elif line["balls"] >= 20 and (line["strike_rate"] or 0) < 80:
+                highlights.append(f"{line['name']} struggling at a strike rate of {line['strike_rate']}")
+        for line in bowlers:
+            balls = overs_to_balls(line["overs"])
+            if line["wickets"] >= 3:
+                highlights.append(f"{line['name']} has {line['wickets']} wickets")
+            if balls >= 12 and line["economy"] is not None:
+                if line["economy"] <= 6:
+                    highlights.append(f"{line['name']} economical at {line['economy']} an over")
+                elif line["economy"] >= 10:
+                    highlights.append(f"{line['name']} expensive at {line['economy']} an over")
+        return highlights
@@ -0,0 +1,102 @@
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class TokenBroadcast:
+    """Fan one stream of tokens out to any number of subscribers.
+
+    Subscribers that join late first replay the tokens published so far, then
+    follow the live stream, so every client sees the complete text.
+    """
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        # Called when the last subscriber leaves before the stream is done (see BroadcastGroup)
+        self.on_idle: Optional[Callable[[], None]] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, token: str):
+        self.tokens.append(token)
+        self._wake()
+
+    def close(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._wake()
+
+    def text(self) -> str:
+        return "".join(self.tokens)
+
+    def _wake(self):
+        # Wake everyone waiting on the current event and hand out a fresh one for the next wait
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        index = 0
+        self.subscribers += 1
+        try:
+            while True:
+                changed = self._changed
+                while index < len(self.tokens):
+                    yield self.tokens[index]
+                    index += 1
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and not self.done and self.on_idle is not None:
+                self.on_idle()
+
+
+class BroadcastGroup:
+    """Single-flight for streams: one producer per key, shared by every subscriber.
+
+    The group holds each producer task (the event loop only keeps weak references) and
+    cancels it once its last subscriber has left.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, TokenBroadcast] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    def get_or_start(self, key: Hashable,
+                     producer: Callable[[TokenBroadcast], Awaitable[None]]) -> TokenBroadcast:
+        broadcast = self._inflight.get(key)
+        if broadcast is None:
+            broadcast = TokenBroadcast()
+            self._inflight[key] = broadcast
+            task = self._tasks[key] = asyncio.ensure_future(self._produce(broadcast, producer))
+            broadcast.on_idle = task.cancel
+            task.add_done_callback(lambda task: self._finished(key, broadcast, task))
+        return broadcast
+
+    async def _produce(self, broadcast: TokenBroadcast, producer):
+        try:
+            await producer(broadcast)
+            broadcast.close()
+        except asyncio.CancelledError:
+            broadcast.close()
+            raise
+        except Exception as e:
+            broadcast.close(e)
+            raise
+
+    def _finished(self, key, broadcast: TokenBroadcast, task: asyncio.Task):
+        if self._inflight.get(key) is broadcast:
+            del self._inflight[key]
+            del self._tasks[key]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Commentary stream failed: {task.exception()}")
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Events frame; data is JSON encoded so newlines stay in one frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
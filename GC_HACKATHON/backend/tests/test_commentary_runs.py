@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+main = pytest.importorskip("main")
+
+from streaming import TokenBroadcast  # noqa: E402
+
+
+class BlockingAgent:
+    """Runs the way phi does even from arun: synchronously, for a while"""
+
+    def __init__(self, seconds: float = 0.3):
+        self.seconds = seconds
+        self.threads = []
+
+    def run(self, prompt, stream=False):
+        self.threads.append(threading.current_thread())
+        if stream:
+            return self._stream()
+        time.sleep(self.seconds)
+        return type("Response", (), {"content": "What a shot!"})()
+
+    def _stream(self):
+        for token in ("What ", "a ", "shot!"):
+            time.sleep(self.seconds / 3)
+            yield type("Chunk", (), {"content": token})()
+
+
+PROCESSED = {"team1": "IND", "team2": "AUS", "current_score": "100/1 (12.0)", "context": "FOUR", "match_stats": {}}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    agent = BlockingAgent()
+    monkeypatch.setattr(main, "new_commentary_agent", lambda: agent)
+    monkeypatch.setattr(main.SEMANTIC_CACHE, "enabled", False)
+    yield agent
+    main.agent_cache.forget("test-match")
+    main.prompt_builder.forget("test-match")
+
+
+async def ticks_while(coroutine) -> int:
+    ticks = 0
+    task = asyncio.ensure_future(coroutine)
+    while not task.done():
+        await asyncio.sleep(0.01)
+        ticks += 1
+    await task
+    return ticks
+
+
+def test_agent_run_leaves_the_event_loop_free(agent):
+    ticks = asyncio.run(ticks_while(main.run_commentary_team("test-match", "fp", PROCESSED)))
+    assert agent.threads and agent.threads[0] is not threading.main_thread()
+    assert ticks >= 10
+    assert main.agent_cache.get("test-match", "fp").content == "What a shot!"
+
+
+def test_streamed_tokens_come_back_on_the_loop(agent):
+    async def run():
+        broadcast = TokenBroadcast()
+        ticks = await ticks_while(main.stream_commentary_team("test-match", "fp-stream", PROCESSED, broadcast))
+        return ticks, broadcast.tokens
+
+    ticks, tokens = asyncio.run(run())
+    assert ticks >= 10
+    assert tokens == ["What ", "a ", "shot!"]
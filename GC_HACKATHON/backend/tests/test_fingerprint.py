@@ -0,0 +1,13 @@
+from fingerprint import AgentOutputCache
+
+
+def test_lookup_totals_never_go_down():
+    cache = AgentOutputCache()
+    cache.put("1", "abc", "commentary")
+    cache.get("1", "abc")
+    cache.get("1", "def")
+    cache.get("2", "abc")
+    cache.forget("1")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert list(stats["matches"]) == ["2"]
@@ -0,0 +1,28 @@
+from http_cache import ResponseCache, etag_matches, make_etag
+from poller import LatestStateStore
+
+
+def test_reregistered_match_gets_a_new_generation():
+    store = LatestStateStore()
+    first = dict(store.update("1", fingerprint="abc"))
+    store.forget("1")
+    second = store.update("1", fingerprint="abc")
+    assert second["version"] == first["version"] == 1
+    assert second["generation"] != first["generation"]
+    assert make_etag("1", 1, "abc", second["generation"]) != make_etag("1", 1, "abc", first["generation"])
+
+
+def test_forget_drops_only_that_matchs_bodies():
+    cache = ResponseCache()
+    cache.get_or_render(("1", 1, 1, "abc"), lambda: {"timestamp": 1})
+    cache.get_or_render(("2", 2, 1, "abc"), lambda: {"timestamp": 1})
+    cache.forget("1")
+    assert cache.get_or_render(("1", 1, 1, "abc"), lambda: {"timestamp": 2}) == b'{"timestamp":2}'
+    assert cache.get_or_render(("2", 2, 1, "abc"), lambda: {"timestamp": 2}) == b'{"timestamp":1}'
+
+
+def test_etag_matches_weak_and_listed_tags():
+    etag = make_etag("1", 3, "abcdef", 2)
+    assert etag_matches(f'W/{etag}, "other"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from http_client import CircuitBreaker, UpstreamClient
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_get("/score", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/score"
+
+
+def _opened_client(url: str) -> UpstreamClient:
+    client = UpstreamClient(retries=0, failure_threshold=1, reset_timeout=0.05)
+    client._breaker("127.0.0.1:" + url.split(":")[2].split("/")[0]).record_failure()
+    time.sleep(0.06)
+    return client
+
+
+def test_probe_answered_with_html_reopens_the_breaker():
+    async def scenario():
+        healthy = {"value": False}
+
+        async def handler(request):
+            if healthy["value"]:
+                return web.json_response({"livescore": "IND 10/0 (1.0)"})
+            return web.Response(text="<html>Down for maintenance</html>", content_type="text/html")
+
+        runner, url = await _serve(handler)
+        client = _opened_client(url)
+        try:
+            try:
+                await client.aget_json(url)
+            except ValueError:
+                pass
+            breaker = next(iter(client.breakers.values()))
+            assert breaker.state == "open"
+
+            healthy["value"] = True
+            await asyncio.sleep(0.06)
+            assert await client.aget_json(url) == {"livescore": "IND 10/0 (1.0)"}
+            assert breaker.state == "closed"
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_probe_does_not_leave_the_breaker_half_open():
+    async def scenario():
+        async def handler(request):
+            await asyncio.sleep(1)
+            return web.json_response({})
+
+        runner, url = await _serve(handler)
+        client = _opened_client(url)
+        try:
+            task = asyncio.ensure_future(client.aget_json(url))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            assert next(iter(client.breakers.values())).state == "open"
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+
+
+def test_unresolved_probe_expires_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_sync_html_body_is_not_retried_or_held_against_the_breaker():
+    async def scenario():
+        hits = []
+
+        async def handler(request):
+            hits.append(request)
+            return web.Response(text="<html>Error</html>", content_type="text/html")
+
+        runner, url = await _serve(handler)
+        client = UpstreamClient(retries=2, failure_threshold=1, backoff_base=0)
+        try:
+            for _ in range(2):
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, client.get_json, url)
+                except ValueError:
+                    pass
+            host = next(iter(client.breakers))
+            assert len(hits) == 2
+            assert client.breakers[host].state == "closed"
+            assert client.counters[host]["retries"] == 0
+            assert client.counters[host]["failures"] == 2
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
@@ -0,0 +1,18 @@
+from prompt_builder import PromptBuilder
+
+
+def processed(context, highlights=(), runs=50):
+    return {"team1": "IND", "team2": "AUS", "context": context,
+            "match_stats": {"score": {"runs": runs, "wickets": 1, "overs": 8.0, "run_rate": 6.25},
+                            "batters": [], "bowlers": [], "milestones": [], "highlights": list(highlights)}}
+
+
+def test_trimmed_prompt_keeps_the_current_update_line():
+    builder = PromptBuilder(max_tokens=80)
+    builder.commit("1", processed("Starc to Kohli, no run"), "Dot ball.")
+    update = "Starc to Kohli, SIX, launched over long-on"
+    highlights = [f"Highlight number {i} that takes up some of the budget" for i in range(8)]
+    prompt = builder.build("1", processed(update, highlights, runs=56))
+    assert update in prompt
+    assert "Highlight number 0" not in prompt
+    assert "Highlight number 7" in prompt
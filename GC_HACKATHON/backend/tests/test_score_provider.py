@@ -0,0 +1,113 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from score_provider import (
+    FIELDS, NO_DATA, NO_UPDATE, CricbuzzScoreProvider, FlaskScoreProvider, parse_live_score, provider_from_env
+)
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+LIVE = {
+    "title": "India vs Australia, 3rd ODI - Live Cricket Score",
+    "livescore": "IND 245/4 (42.3)",
+    "runrate": "CRR:\xa05.76 REQ:\xa05.38",
+    "batterone": "Virat Kohli *",
+    "battertwo": "KL Rahul",
+    "bowlerone": "Mitchell Starc *",
+    "bowlertwo": "Adam Zampa",
+    "batsmanonerun": "84",
+    "batsmanoneball": "91",
+    "batsmanonesr": "92.31",
+    "batsmantworun": "31",
+    "batsmantwoball": "27",
+    "batsmantwosr": "114.81",
+    "bowleroneover": "8.3",
+    "bowleronerun": "52",
+    "bowleronewickers": "2",
+    "bowleroneeconomy": "6.12",
+    "bowlertwoover": "9",
+    "bowlertworun": "41",
+    "bowlertwowickers": "1",
+    "bowlertwoeconomy": "4.56",
+    "update": "India need 42 runs in 45 balls",
+}
+
+
+def page(name: str) -> str:
+    return (FIXTURES / f"cricbuzz_{name}.html").read_text(encoding="utf-8")
+
+
+class RecordedClient:
+    """Answers every request with one recorded page, and remembers what was asked"""
+
+    def __init__(self, body):
+        self.body = body
+        self.urls = []
+
+    def get_text(self, url, headers=None):
+        self.urls.append(url)
+        return self.body
+
+    def get_json(self, url, headers=None):
+        self.urls.append(url)
+        return self.body
+
+    async def aget_text(self, url, headers=None):
+        return self.get_text(url, headers)
+
+    async def aget_json(self, url, headers=None):
+        return self.get_json(url, headers)
+
+
+def test_live_page_fills_every_field():
+    data = parse_live_score(page("live"))
+    assert set(LIVE) == {key for key, *_ in FIELDS} | {"update"}
+    assert data == LIVE
+
+
+def test_innings_break_banner():
+    data = parse_live_score(page("innings_break"))
+    assert data["update"] == "Innings Break"
+    assert data["livescore"] == "AUS 286/8 (50)"
+    assert data["batterone"] == data["bowlerone"] == NO_DATA
+
+
+def test_result_banner():
+    data = parse_live_score(page("result"))
+    assert data["update"] == "India won by 6 wkts"
+    assert data["title"] == LIVE["title"]
+
+
+def test_no_live_match_page():
+    data = parse_live_score(page("no_live_match"))
+    assert data["update"] == NO_UPDATE
+    assert all(data[key] == NO_DATA for key, *_ in FIELDS)
+
+
+def test_cricbuzz_provider_parses_in_process():
+    client = RecordedClient(page("live"))
+    provider = CricbuzzScoreProvider(client)
+    assert provider.fetch("107563") == LIVE
+    assert asyncio.run(provider.afetch("107563")) == LIVE
+    assert client.urls == ["https://www.cricbuzz.com/live-cricket-scores/107563"] * 2
+    assert not provider.needs_api_server
+
+
+def test_flask_provider_is_selectable(monkeypatch):
+    monkeypatch.setenv("SCORE_PROVIDER", "flask")
+    client = RecordedClient(LIVE)
+    provider = provider_from_env(client, "http://127.0.0.1:5001")
+    assert isinstance(provider, FlaskScoreProvider) and provider.needs_api_server
+    assert provider.fetch("107563") == LIVE
+    assert asyncio.run(provider.afetch("107563")) == LIVE
+    assert client.urls == ["http://127.0.0.1:5001/score?id=107563"] * 2
+
+
+def test_provider_from_env_defaults_to_native(monkeypatch):
+    monkeypatch.delenv("SCORE_PROVIDER", raising=False)
+    assert isinstance(provider_from_env(RecordedClient("")), CricbuzzScoreProvider)
+    monkeypatch.setenv("SCORE_PROVIDER", "scrapy")
+    with pytest.raises(ValueError):
+        provider_from_env(RecordedClient(""))
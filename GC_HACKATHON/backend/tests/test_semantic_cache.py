@@ -0,0 +1,41 @@
+from semantic_cache import SemanticCache, situation_for
+
+
+class SameVector:
+    """Every text embeds alike, so only the cache's own rules keep situations apart"""
+
+    def embed_query(self, text):
+        return [1.0, 0.0]
+
+
+def processed(runs, overs, events=(), scorer=None, dismissed=None, milestones=()):
+    stats = {"innings": 1, "score": {"runs": runs, "wickets": 2, "overs": overs, "run_rate": 6.0},
+             "events": list(events), "batters": [{"name": "Kohli"}, {"name": "Gill"}],
+             "bowlers": [{"name": "Starc"}], "milestones": list(milestones), "highlights": []}
+    if scorer:
+        stats["scorer"] = scorer
+    if dismissed:
+        stats["dismissed"] = dismissed
+    return {"match_stats": stats}
+
+
+def test_routine_balls_share_commentary():
+    cache = SemanticCache(embedder=SameVector())
+    cache.store("commentary", situation_for("1", processed(61, 10.2)), "Dot ball, tight line")
+    assert cache.lookup("commentary", situation_for("1", processed(62, 11.4, scorer="Kohli"))) == "Dot ball, tight line"
+
+
+def test_boundaries_and_wickets_are_not_reused_for_other_balls():
+    cache = SemanticCache(embedder=SameVector())
+    four = situation_for("1", processed(65, 11.1, events=["four"], scorer="Kohli"))
+    cache.store("commentary", four, "Kohli drives for four, 65/2")
+    assert not four.routine and "Score 65/2 after 11.1 overs" in four.text
+    assert cache.lookup("commentary", four) == "Kohli drives for four, 65/2"
+    assert cache.lookup("commentary", situation_for("1", processed(71, 12.3, events=["four"], scorer="Gill"))) is None
+    assert cache.lookup("commentary", situation_for("1", processed(65, 11.2, events=["wicket"],
+                                                                     dismissed="Kohli"))) is None
+
+
+def test_reached_milestone_is_not_routine():
+    assert situation_for("1", processed(62, 11.4, scorer="Kohli", milestones=["Kohli needs 3 for 50"])).routine
+    assert not situation_for("1", processed(62, 11.4, scorer="Kohli", milestones=["Kohli reaches 50"])).routine
@@ -0,0 +1,63 @@
+from stats_engine import StatsEngine
+
+
+def payload(score: str, kohli: int, gill: int, bowler_overs: str = "2.0", bowler_runs: int = 10) -> dict:
+    return {"livescore": f"IND {score}", "update": "",
+            "batterone": "Virat Kohli", "batsmanonerun": str(kohli), "batsmanoneball": "40",
+            "battertwo": "Shubman Gill", "batsmantworun": str(gill), "batsmantwoball": "20",
+            "bowlerone": "Pat Cummins", "bowleroneover": bowler_overs, "bowleronerun": str(bowler_runs),
+            "bowleronewickers": "0"}
+
+
+def reached(stats: dict) -> list:
+    return [milestone for milestone in stats["milestones"] if "reaches" in milestone]
+
+
+def test_batting_milestone_is_reported_once():
+    engine = StatsEngine()
+    engine.analyze("1", payload("100/1 (12.1)", 48, 20))
+    assert reached(engine.analyze("1", payload("102/1 (12.2)", 50, 20))) == ["Virat Kohli reaches 50"]
+    # Dot ball, then a single to the other batter: Kohli is still on 50
+    assert reached(engine.analyze("1", payload("102/1 (12.3)", 50, 20))) == []
+    assert reached(engine.analyze("1", payload("103/1 (12.4)", 50, 21))) == []
+    assert reached(engine.analyze("1", payload("103/1 (12.4)", 50, 21))) == []
+
+
+def test_spell_includes_its_first_ball():
+    engine = StatsEngine()
+    engine.analyze("1", payload("10/0 (1.0)", 6, 4, bowler_overs="1.0", bowler_runs=10))
+    engine.analyze("1", {**payload("11/0 (1.1)", 6, 5), "bowlerone": "Mitchell Starc", "bowleroneover": "0.1",
+                         "bowleronerun": "1"})
+    for ball, runs in ((2, 1), (3, 2), (4, 2), (5, 3), (6, 4)):
+        engine.analyze("1", {**payload(f"{10 + runs}/0 (1.{ball})", 6, 4 + runs), "bowlerone": "Mitchell Starc",
+                             "bowleroneover": "1.0" if ball == 6 else f"0.{ball}", "bowleronerun": str(runs)})
+    spell = engine.states.state("1").bowler_spells()["Mitchell Starc"]
+    assert (spell["overs"], spell["runs"]) == ("1.0", 4)
+
+
+def test_spell_of_a_bowler_seen_mid_innings_starts_when_we_joined():
+    engine = StatsEngine()
+    engine.analyze("1", payload("60/1 (8.2)", 30, 20, bowler_overs="3.2", bowler_runs=25))
+    engine.analyze("1", payload("61/1 (8.3)", 31, 20, bowler_overs="3.3", bowler_runs=26))
+    spell = engine.states.state("1").bowler_spells()["Pat Cummins"]
+    assert (spell["balls"], spell["runs"]) == (1, 1)
+
+
+def test_state_keys_players_without_the_strike_marker():
+    engine = StatsEngine()
+    engine.analyze("1", {**payload("49/0 (6.1)", 30, 19), "batterone": "Virat Kohli *", "bowlerone": "Pat Cummins *"})
+    engine.analyze("1", {**payload("50/0 (6.2)", 30, 20), "battertwo": "Shubman Gill *", "bowlerone": "Pat Cummins *"})
+    state = engine.states.state("1")
+    assert state.batter_runs == {"Virat Kohli": 30, "Shubman Gill": 20}
+    assert state.previous_batter_runs == {"Virat Kohli": 30, "Shubman Gill": 19}
+    assert list(state.bowler_figures) == ["Pat Cummins"] and state.current_bowler == "Pat Cummins"
+
+
+def test_milestone_and_scorer_when_the_strike_changes_on_that_ball():
+    engine = StatsEngine()
+    engine.analyze("1", {**payload("99/1 (11.5)", 49, 20), "batterone": "Virat Kohli *"})
+    # The single brings up the fifty and moves the star to the other end
+    stats = engine.analyze("1", {**payload("100/1 (11.6)", 50, 20), "battertwo": "Shubman Gill *"})
+    assert reached(stats) == ["Virat Kohli reaches 50"]
+    assert stats["scorer"] == "Virat Kohli"
+    assert [line["name"] for line in stats["batters"]] == ["Virat Kohli", "Shubman Gill"]
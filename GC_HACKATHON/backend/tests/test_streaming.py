@@ -0,0 +1,70 @@
+import asyncio
+
+from streaming import BroadcastGroup
+
+
+def test_group_holds_the_producer_until_it_finishes():
+    async def run():
+        group = BroadcastGroup()
+
+        async def producer(broadcast):
+            await asyncio.sleep(0.01)
+            broadcast.publish("FOUR")
+
+        broadcast = group.get_or_start("1", producer)
+        assert len(group._tasks) == 1
+        tokens = [token async for token in broadcast.subscribe()]
+        await asyncio.sleep(0)
+        return tokens, group._tasks, group._inflight
+
+    assert asyncio.run(run()) == (["FOUR"], {}, {})
+
+
+def test_last_subscriber_leaving_cancels_the_producer():
+    async def run():
+        group = BroadcastGroup()
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def producer(broadcast):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        broadcast = group.get_or_start("1", producer)
+
+        async def listen():
+            async for _ in broadcast.subscribe():
+                pass
+
+        listeners = [asyncio.ensure_future(listen()) for _ in range(2)]
+        await started.wait()
+        listeners[0].cancel()
+        await asyncio.sleep(0.01)
+        assert not cancelled.is_set()
+        listeners[1].cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        return broadcast.done, group._tasks
+
+    assert asyncio.run(run()) == (True, {})
+
+
+def test_failed_producer_is_logged_and_reaches_subscribers(capsys):
+    async def run():
+        group = BroadcastGroup()
+
+        async def producer(broadcast):
+            raise RuntimeError("upstream down")
+
+        broadcast = group.get_or_start("1", producer)
+        try:
+            async for _ in broadcast.subscribe():
+                pass
+        except RuntimeError as e:
+            return str(e)
+
+    assert asyncio.run(run()) == "upstream down"
+    assert "Commentary stream failed: upstream down" in capsys.readouterr().out
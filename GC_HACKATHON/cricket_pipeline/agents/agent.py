@@ -1,71 +1,126 @@
 import os
-from phi.agent import Agent
-from phi.model.groq import Groq
-from phi.tools.duckduckgo import DuckDuckGo
-from config import key_instance
-# Initialize Gemini
-model=Groq(id="llama-3.3-70b-versatile",api_key=os.getenv("GROQ_API_KEY'"))
-
-# Stats Analyzer Assistant
-stats_analyzer = Agent(
-    name="StatsAnalyzer",
-    model=model,
-    tools = [DuckDuckGo()],
-    instructions=["""
-    You are an expert cricket statistician and analyst. Analyze the provided cricket match data to:
-    
-    1. Summarize the current match situation and key statistics
-    2. Identify exceptional performances from batsmen (high strike rates, milestones)
-    3. Highlight impressive bowling figures (economy rates, wicket-taking spells)
-    4. Calculate partnership statistics and run rate trends
-    5. Identify potential record-breaking performances or notable achievements
-    6. Detect important game-changing moments worth highlighting
-    7. Use websearch for some interesting statistics related to the batsman and the bowler
-
-    The match data will include: score, run rates, batsmen stats (runs, balls, SR), 
-    bowler stats (overs, runs, wickets, economy), and recent commentary.
-    
-    Provide your analysis in a structured format that helps the commentary team understand
-    key aspects of the current match situation and noteworthy performances.
-    """],
-    markdown=True
-)
-
-# Commentary Generator Assistant
-commentary_generator = Agent(
-    name="CommentaryGenerator",
-    model=model,
-    instructions=["""
-    You are an elite cricket commentator renowned for captivating, insightful, and engaging commentary.
-    
-    Using the match data and statistical analysis provided:
-    
-    1. Create vibrant play-by-play commentary that brings the cricket match to life
-    2. Weave statistical insights naturally into your narrative
-    3. Use colorful language, cricket terminology, and appropriate expressions
-    4. Vary your tone to match the game situation - excited for boundaries, analytical for strategy
-    5. Incorporate the latest match developments from the 'latest_commentary' field
-    6. Build upon but don't simply repeat existing commentary
-    7. Include both immediate action description and strategic analysis
-    
-    Your commentary should feel authentic, passionate, and knowledgeable - like listening to 
-    an expert commentator during a live broadcast. Create at least 250 words of rich, 
-    compelling cricket commentary that truly engages fans.
-    """],
-    markdown=True
-)
-
-cricket_commentary_team = Agent(
-    name="Cricket Commentary Team",
-    team=[stats_analyzer, commentary_generator],
-    model=model,
-    instructions=[
-        "Coordinate the team to generate engaging cricket commentary",
-        "First, have the StatsAnalyzer analyze the match data and identify highlights",
-        "Then, have the CommentaryGenerator use the analysis to create engaging commentary",
-        "Ensure the final output is a cohesive and engaging cricket commentary"
-    ],
-    markdown=True,
-)
+from functools import lru_cache
 
+# Agents and the model are built on first use (see get_* below): importing this module
+# must not import phi/groq/pathway or need API keys. The old module-level names
+# (model, stats_analyzer, commentary_generator, cricket_commentary_team) still work.
 
+
+@lru_cache(maxsize=None)
+def get_model():
+    from phi.model.groq import Groq
+    from config import key_instance  # sets GROQ_API_KEY and the Pathway license
+
+    # Initialize Groq
+    return Groq(id="llama-3.3-70b-versatile", api_key=os.getenv("GROQ_API_KEY"))
+
+
+@lru_cache(maxsize=None)
+def get_stats_analyzer():
+    """Stats Analyzer Assistant"""
+    return _stats_analyzer([])
+
+
+def stats_analyzer_for_match(vector_client, match_id=None):
+    """A Stats Analyzer that can also search the match's indexed overs. Not cached: one per caller"""
+    from agents.stats import StatsAnalyzerAgent
+    stats_agent = StatsAnalyzerAgent(vector_client)
+
+    def search_match_history(query: str) -> str:
+        """Search what happened earlier in this match, e.g. "Kohli against Starc" or "wickets in the death overs"."""
+        documents = stats_agent.search(query, match_id=match_id)
+        return "\n".join(document.page_content for document in documents) or "Nothing indexed yet."
+
+    return _stats_analyzer([search_match_history])
+
+
+def _stats_analyzer(extra_tools):
+    from phi.agent import Agent
+    from phi.tools.duckduckgo import DuckDuckGo
+
+    tools = [DuckDuckGo()] + extra_tools
+    return Agent(
+        name="StatsAnalyzer",
+        model=get_model(),
+        tools = tools,
+        instructions=["""
+        You are an expert cricket statistician and analyst. Analyze the provided cricket match data to:
+
+        1. Summarize the current match situation and key statistics
+        2. Identify exceptional performances from batsmen (high strike rates, milestones)
+        3. Highlight impressive bowling figures (economy rates, wicket-taking spells)
+        4. Calculate partnership statistics and run rate trends
+        5. Identify potential record-breaking performances or notable achievements
+        6. Detect important game-changing moments worth highlighting
+        7. Use websearch for some interesting statistics related to the batsman and the bowler
+        8. If you have the search_match_history tool, use it for how this match has gone so far
+
+        The match data will include: score, run rates, batsmen stats (runs, balls, SR),
+        bowler stats (overs, runs, wickets, economy), and recent commentary.
+
+        Provide your analysis in a structured format that helps the commentary team understand
+        key aspects of the current match situation and noteworthy performances.
+        """],
+        markdown=True
+    )
+
+
+@lru_cache(maxsize=None)
+def get_commentary_generator():
+    """Commentary Generator Assistant"""
+    from phi.agent import Agent
+
+    return Agent(
+        name="CommentaryGenerator",
+        model=get_model(),
+        instructions=["""
+        You are an elite cricket commentator renowned for captivating, insightful, and engaging commentary.
+
+        Using the match data and statistical analysis provided:
+
+        1. Create vibrant play-by-play commentary that brings the cricket match to life
+        2. Weave statistical insights naturally into your narrative
+        3. Use colorful language, cricket terminology, and appropriate expressions
+        4. Vary your tone to match the game situation - excited for boundaries, analytical for strategy
+        5. Incorporate the latest match developments from the 'latest_commentary' field
+        6. Build upon but don't simply repeat existing commentary
+        7. Include both immediate action description and strategic analysis
+
+        Your commentary should feel authentic, passionate, and knowledgeable - like listening to
+        an expert commentator during a live broadcast. Create at least 250 words of rich,
+        compelling cricket commentary that truly engages fans.
+        """],
+        markdown=True
+    )
+
+
+@lru_cache(maxsize=None)
+def get_commentary_team():
+    from phi.agent import Agent
+
+    return Agent(
+        name="Cricket Commentary Team",
+        team=[get_stats_analyzer(), get_commentary_generator()],
+        model=get_model(),
+        instructions=[
+            "Coordinate the team to generate engaging cricket commentary",
+            "First, have the StatsAnalyzer analyze the match data and identify highlights",
+            "Then, have the CommentaryGenerator use the analysis to create engaging commentary",
+            "Ensure the final output is a cohesive and engaging cricket commentary"
+        ],
+        markdown=True,
+    )
+
+
+_LAZY_ATTRIBUTES = {
+    "model": get_model,
+    "stats_analyzer": get_stats_analyzer,
+    "commentary_generator": get_commentary_generator,
+    "cricket_commentary_team": get_commentary_team,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,7 @@
 import os
 import argparse
 from dotenv import load_dotenv
-from agents.agent import cricket_commentary_team
+from agents.agent import get_commentary_team
 from utils.utils import load_cricket_data, save_commentary
 
 
@@ -16,7 +16,7 @@ def generate_commentary(input_file: str, output_file: str = None) -> str:
     
     # Generate commentary using the agent team
     print("Generating cricket commentary...")
-    result = cricket_commentary_team.run(cricket_data=cricket_data)
+    result = get_commentary_team().run(cricket_data=cricket_data)
     
     commentary = result.get("final_commentary")
     
@@ -8,10 +8,17 @@ class StatsAnalyzerAgent:
         
         # Query for relevant stats and records
         stat_query = f"Statistics and records for {player_involved} in similar situations"
-        relevant_stats = self.vector_client.similarity_search(stat_query)
+        relevant_stats = self.search(stat_query, match_id=state.get('match_id'))
         
         # Process and format the stats
         return {
             "interesting_stats": self._format_stats(relevant_stats),
             "player_records": self._detect_records(relevant_stats, current_play)
         }
+
+    def search(self, query, match_id=None):
+        # The in-process indexes (processing/ann_index.py, hybrid_retriever.py) search only this
+        # match when given match_id; PathwayVectorClient takes it through **kwargs and ignores it
+        if match_id is None:
+            return self.vector_client.similarity_search(query)
+        return self.vector_client.similarity_search(query, match_id=match_id)
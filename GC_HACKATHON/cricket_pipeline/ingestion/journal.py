@@ -0,0 +1,177 @@
+"""Append-only journal of raw cricket-api responses, and a replay engine over it.
+
+One JSON-lines file per match (<root>/<match_id>.jsonl). cricket-api payloads are flat
+dicts and only a few fields move from one poll to the next, so each entry stores just
+the fields that changed since the previous snapshot:
+
+    {"t": 1712345678.9, "k": 1, "d": {...every field...}}        keyframe
+    {"t": 1712345680.9, "s": {"livescore": "..."}, "r": ["x"]}  set / removed fields
+
+A keyframe is written every keyframe_interval entries, and whenever a writer starts on an
+existing file, so a damaged or truncated line costs at most one keyframe interval.
+
+    python -m ingestion.journal replay 107563 --speed 10 [--agents]
+    python -m ingestion.journal replay 107563 --speed 0          # as fast as possible
+    python -m ingestion.journal export 107563 --out match.jsonl  # plain payloads, e.g. for the fake cricket-api
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+def _path(root: Path, match_id: str) -> Path:
+    return root / f"{''.join(c if c.isalnum() or c in '-_' else '_' for c in str(match_id))}.jsonl"
+
+
+def encode_delta(previous: dict, payload: dict) -> Tuple[dict, List[str]]:
+    changed = {key: value for key, value in payload.items() if key not in previous or previous[key] != value}
+    removed = [key for key in previous if key not in payload]
+    return changed, removed
+
+
+class FeedJournal:
+    """Records raw payloads per match, delta-encoded against the match's previous payload. Thread-safe."""
+
+    def __init__(self, root: str = "./journal", keyframe_interval: int = 100):
+        self.root = Path(root)
+        self.keyframe_interval = keyframe_interval
+        self._previous: Dict[str, dict] = {}
+        self._since_keyframe: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, match_id: str, payload: dict, timestamp: float = None):
+        if not payload:
+            return
+        entry = {"t": round(timestamp if timestamp is not None else time.time(), 3)}
+        with self._lock:
+            previous = self._previous.get(match_id)
+            count = self._since_keyframe.get(match_id, 0)
+            if previous is None or count >= self.keyframe_interval:
+                entry.update(k=1, d=payload)
+                count = 0
+            else:
+                changed, removed = encode_delta(previous, payload)
+                if changed:
+                    entry["s"] = changed
+                if removed:
+                    entry["r"] = removed
+            self._previous[match_id] = dict(payload)
+            self._since_keyframe[match_id] = count + 1
+
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(_path(self.root, match_id), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def match_ids(self) -> List[str]:
+        return sorted(path.stem for path in self.root.glob("*.jsonl"))
+
+    def read(self, match_id: str) -> Iterator[Tuple[float, dict]]:
+        """(timestamp, full payload) for every recorded response, oldest first"""
+        return read_journal_file(_path(self.root, match_id))
+
+
+def read_journal_file(path) -> Iterator[Tuple[float, dict]]:
+    current: Optional[dict] = None
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                print(f"{path}:{number}: unreadable entry, skipping to the next keyframe")
+                current = None
+                continue
+            if entry.get("k"):
+                current = dict(entry["d"])
+            elif current is None:
+                continue
+            else:
+                current.update(entry.get("s") or {})
+                for key in entry.get("r") or ():
+                    current.pop(key, None)
+            yield entry["t"], dict(current)
+
+
+def replay(snapshots: Iterator[Tuple[float, dict]], handle: Callable[[dict, float], None], speed: float = 1.0) -> dict:
+    """Feed recorded payloads to handle(payload, timestamp) with the recorded spacing divided by speed (0: no waiting).
+
+    Returns how many snapshots were replayed, how long it took and handle() latency quantiles.
+    """
+    latencies = []
+    started = first = None
+    for timestamp, payload in snapshots:
+        if started is None:
+            started, first = time.monotonic(), timestamp
+        elif speed > 0:
+            delay = started + (timestamp - first) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        began = time.perf_counter()
+        handle(payload, timestamp)
+        latencies.append(time.perf_counter() - began)
+
+    latencies.sort()
+    quantile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+    return {
+        "snapshots": len(latencies),
+        "elapsed_s": time.monotonic() - started if started is not None else 0.0,
+        "handle_p50_ms": quantile(0.5) * 1000,
+        "handle_p95_ms": quantile(0.95) * 1000,
+        "handle_p99_ms": quantile(0.99) * 1000,
+    }
+
+
+def _replay_command(args):
+    # Imported here: recording needs neither the match state nor the agents
+    from processing.api_response import process_api_response
+    from processing.match_state import MatchStateStore
+
+    match_states = MatchStateStore()
+    analyzer = None
+    if args.agents:
+        from agents.agent import get_stats_analyzer
+        analyzer = get_stats_analyzer()
+
+    def handle(payload: dict, timestamp: float):
+        match_states.ingest(args.match_id, payload, timestamp)
+        process_api_response(args.match_id, payload, timestamp)
+        if analyzer is not None:
+            # The prompt main.py's commentary loop gives the stats analyzer
+            analyzer.run(f"Based upon the following cricket data {payload} generate engaging and exciting commentary")
+
+    journal = FeedJournal(args.journal)
+    report = replay(journal.read(args.match_id), handle, speed=args.speed)
+    print(json.dumps(report, indent=2))
+    print("Match state:", json.dumps(match_states.state(args.match_id).summary(), indent=2))
+
+
+def _export_command(args):
+    journal = FeedJournal(args.journal)
+    with open(args.out, "w", encoding="utf-8") as f:
+        for _, payload in journal.read(args.match_id):
+            f.write(json.dumps(payload) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay or export a recorded cricket-api feed.")
+    parser.add_argument("--journal", default=os.getenv("JOURNAL_DIR", "./journal"))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = commands.add_parser("replay", help="feed a match back through the pipeline")
+    replay_parser.add_argument("match_id")
+    replay_parser.add_argument("--speed", type=float, default=1.0,
+                               help="1 for real time, N for N times faster, 0 for as fast as possible")
+    replay_parser.add_argument("--agents", action="store_true", help="also run the stats analyzer on every snapshot, as main.py's "
+                                    "commentary loop does (not the full commentary team)")
+    replay_parser.set_defaults(func=_replay_command)
+
+    export_parser = commands.add_parser("export", help="write the full payloads, one JSON object per line")
+    export_parser.add_argument("match_id")
+    export_parser.add_argument("--out", required=True)
+    export_parser.set_defaults(func=_export_command)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,93 @@
+"""One long-lived Pathway input for every active match.
+
+Instead of building a one-row table (and a new dataflow) per fetch, LiveScoreSubject keeps
+polling the matches it was given from inside a single pw.run(). A row is emitted only
+when a match's snapshot actually changed, and rows are keyed by match_id in an upsert
+session, so the table always holds the latest snapshot per match and downstream sinks
+(CSV, document and vector stores) see one update per change rather than a rebuild.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Dict, Iterable
+
+import pathway as pw
+from pathway.internals.api import SessionType
+
+# Restamped on every fetch, so not part of "did this snapshot change"
+VOLATILE_FIELDS = ("timestamp",)
+
+
+def row_fingerprint(row: dict) -> str:
+    relevant = {key: value for key, value in row.items() if key not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class LiveScoreSubject(pw.io.python.ConnectorSubject):
+    """Polls every active match every interval seconds and upserts changed snapshots by match_id.
+
+    pipeline_factory(match_id) returns an object with fetch_cricket_data() and
+    _process_api_response(data), i.e. a CricketDataPipeline. Matches can be added and
+    removed while the dataflow runs; a removed match keeps its last row.
+    """
+
+    def __init__(self, pipeline_factory: Callable[[str], object], match_ids: Iterable[str] = (),
+                 interval: float = 2.0):
+        super().__init__()
+        self.pipeline_factory = pipeline_factory
+        self.interval = interval
+        self._pipelines: Dict[str, object] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        for match_id in match_ids:
+            self.add_match(match_id)
+
+    @property
+    def _session_type(self) -> SessionType:
+        # A new row for a match_id replaces the previous one instead of adding to it
+        return SessionType.UPSERT
+
+    def add_match(self, match_id: str):
+        with self._lock:
+            if match_id not in self._pipelines:
+                self._pipelines[match_id] = self.pipeline_factory(match_id)
+
+    def remove_match(self, match_id: str):
+        with self._lock:
+            self._pipelines.pop(match_id, None)
+            self._fingerprints.pop(match_id, None)
+
+    def run(self):
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            with self._lock:
+                pipelines = list(self._pipelines.values())
+            for pipeline in pipelines:
+                try:
+                    self.poll(pipeline)
+                except Exception as e:
+                    print(f"Polling match {pipeline.match_id} failed: {e}")
+            self._stopped.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def poll(self, pipeline) -> bool:
+        """Fetch one match and emit its row if anything but the timestamp changed"""
+        data = pipeline.fetch_cricket_data()
+        if not data:
+            return False
+        row = pipeline._process_api_response(data)
+        fingerprint = row_fingerprint(row)
+        if self._fingerprints.get(pipeline.match_id) == fingerprint:
+            return False
+        self._fingerprints[pipeline.match_id] = fingerprint
+        self.next(**row)
+        return True
+
+    def on_stop(self):
+        self._stopped.set()
+
+
+def read_live_scores(subject: LiveScoreSubject, schema, autocommit_duration_ms: int = 1000) -> pw.Table:
+    """The live table; schema needs match_id as its primary key for the upserts to line up"""
+    return pw.io.python.read(subject, schema=schema, autocommit_duration_ms=autocommit_duration_ms)
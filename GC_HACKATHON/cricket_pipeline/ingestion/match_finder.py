@@ -28,13 +28,14 @@ class CricketMatchFinder:
             print(f"Error fetching matches: {e}")
             return [], []
 
-finder = CricketMatchFinder()
-match_ids, match_titles = finder.get_live_match_info()
+if __name__ == "__main__":
+    finder = CricketMatchFinder()
+    match_ids, match_titles = finder.get_live_match_info()
 
-# Display matches to the user
-print("Available matches:")
-for i, (match_id, title) in enumerate(zip(match_ids, match_titles)):
-    print(f"{i+1}. {title.replace('-', ' ')} (ID: {match_id})")
+    # Display matches to the user
+    print("Available matches:")
+    for i, (match_id, title) in enumerate(zip(match_ids, match_titles)):
+        print(f"{i+1}. {title.replace('-', ' ')} (ID: {match_id})")
 
-# Get user input
-# selected_id = input("\nEnter the ID of the match you want to see results for: ")
+    # Get user input
+    # selected_id = input("\nEnter the ID of the match you want to see results for: ")
@@ -2,16 +2,32 @@ import pathway as pw
 import requests
 import subprocess
 import time
+import threading
 from pathlib import Path
 import json
 import sys
 import os
 from ingestion.match_finder import CricketMatchFinder
-from agents.agent import cricket_commentary_team,commentary_generator,stats_analyzer
+from agents.agent import get_stats_analyzer, stats_analyzer_for_match
 from utils.utils import load_cricket_data
 from agents.commentary import generate_commentary
+from processing.match_state import MatchStateStore
+from processing.api_response import process_api_response
+from ingestion.live_connector import LiveScoreSubject, read_live_scores
+from processing.snapshot_store import SnapshotWriter
+from ingestion.journal import FeedJournal
 import warnings
 warnings.filterwarnings("ignore")
+
+# Running aggregates and ball history per match, fed by every successful fetch
+match_states = MatchStateStore()
+
+# The last payload fetched per match, for readers that must not fetch (and ingest) again
+latest_payloads = {}
+
+# Every raw response, delta-encoded, for replay (python -m ingestion.journal); JOURNAL=0 turns it off
+feed_journal = FeedJournal(os.getenv("JOURNAL_DIR", "./journal")) if os.getenv("JOURNAL", "1") != "0" else None
+
 class CricketDataPipeline:
     def __init__(self, match_id: str):
         self.match_id = match_id
@@ -58,7 +74,12 @@ class CricketDataPipeline:
         try:
             response = requests.get(self.api_url, timeout=10)
             response.raise_for_status()
-            return response.json()
+            data = response.json()
+            match_states.ingest(self.match_id, data)
+            latest_payloads[self.match_id] = data
+            if feed_journal is not None:
+                feed_journal.record(self.match_id, data)
+            return data
         except requests.exceptions.RequestException as e:
             print(f"API request failed: {e}")
             return {}
@@ -84,32 +105,14 @@ class CricketDataPipeline:
 
 
     def _process_api_response(self, data: dict) -> dict:
-        """Transform API response to match document store schema"""
-        return {
-            "match_id": self.match_id,
-            "timestamp": int(time.time()),
-            "current_score": data.get("livescore", ""),
-            "context": data.get("update", ""),
-            "team1": self._extract_team(data.get("title", ""), 0),
-            "team2": self._extract_team(data.get("title", ""), 1),
-            "batsman": f"{data.get('batterone', '')}/{data.get('battertwo', '')}",
-            "bowler": f"{data.get('bowlerone', '')}/{data.get('bowlertwo', '')}",
-            "runs": self._parse_runs(data.get("livescore", "0/0")),
-            "wicket": "wicket" in data.get("context", "").lower(),
-            "player_stats": {
-                "batsmen": {
-                    data.get("batterone", ""): {
-                        "runs": data.get("batsmanonerun", 0),
-                        "balls": data.get("batsmanoneball", 0)
-                    }
-                }
-            }
-        }
+        """Transform API response to match document store schema (see processing/api_response.py)"""
+        return process_api_response(self.match_id, data)
 
     def _get_schema(self):
         """Document store schema for Pathway"""
         class CricketSchema(pw.Schema):
-            match_id: str
+            # Keyed by match, so live updates replace a match's row (see ingestion/live_connector.py)
+            match_id: str = pw.column_definition(primary_key=True)
             timestamp: int
             current_score: str
             context: str
@@ -122,18 +125,6 @@ class CricketDataPipeline:
             player_stats: dict
         return CricketSchema
 
-    def _extract_team(self, title: str, index: int) -> str:
-        """Extract team names from match title"""
-        teams = title.split("vs") if "vs" in title else ["Unknown", "Unknown"]
-        return teams[index].split("-")[0].strip()
-
-    def _parse_runs(self, score: str) -> int:
-        """Extract total runs from score string"""
-        try:
-            return int(score.split("/")[0])
-        except (IndexError, ValueError):
-            return 0
-
 # Usage Example
 if __name__ == "__main__":
     # Replace with your actual match ID from agent
@@ -168,6 +159,7 @@ if __name__ == "__main__":
         # Step 2: Fetch data from API
         cricket_data = pipeline.fetch_cricket_data()
         print("API Response:", cricket_data)
+        print("Match state:", match_states.state(match_id).summary())
 
         data = cricket_data  # cricket_data is already a parsed dictionary
 
@@ -178,12 +170,46 @@ if __name__ == "__main__":
             json.dump(data, f, indent=4)
         
         
-        # Step 3: Create Pathway table
-        pw_table = pipeline.create_pathway_table(cricket_data)
-        
-        # Step 4: Ingest into document store
-        doc_store = pw.io.csv.write(pw_table, "./document_store.csv")
-        stats_analyzer.print_response(f"Based upon the following cricket data {cricket_data} generate engaging and exciting commentary")
+        get_stats_analyzer().print_response(f"Based upon the following cricket data {cricket_data} generate engaging and exciting commentary")
+
+        # Step 3: One long-lived Pathway table, updated in place whenever the scorecard changes
+        live_scores = LiveScoreSubject(CricketDataPipeline, [match_id],
+                                       interval=float(os.getenv("POLL_INTERVAL", "2")))
+        pw_table = read_live_scores(live_scores, pipeline._get_schema())
+
+        # Step 4: Sinks on the live table, all kept up to date by a single pw.run().
+        # Snapshots go to the columnar store (processing/snapshot_store.py), appended in batches
+        doc_store = SnapshotWriter(os.getenv("SNAPSHOT_DIR", "./snapshots"))
+        pw.io.subscribe(pw_table, on_change=doc_store.on_change, on_end=doc_store.close)
+        if os.getenv("VECTOR_STORE", "0") == "embedded":
+            from processing.ann_index import embedded_vector_index
+            from processing.hybrid_retriever import HybridRetriever
+            from processing.rollups import RollupBuilder, read_rollups
+            # Retrieval inside this process instead of the VectorStoreServer, over the same over and
+            # phase documents: names through an inverted index, reranked by vectors. The StatsAnalyzer
+            # searches it as the match goes on
+            vector_index = HybridRetriever(embedded_vector_index())
+            rollups = read_rollups(pw_table, RollupBuilder(titles=dict(zip(match_ids, match_titles))))
+            pw.io.subscribe(rollups, on_change=vector_index.on_change)
+            threading.Thread(target=pw.run, daemon=True).start()
+            stats_analyzer = stats_analyzer_for_match(vector_index, match_id)
+            # The poller in the dataflow thread is the only fetcher, so each snapshot is ingested
+            # and journaled once; this loop comments on the latest one it saw, if it is new
+            commented = None
+            while True:
+                time.sleep(float(os.getenv("COMMENTARY_INTERVAL", "60")))
+                latest = latest_payloads.get(match_id)
+                if latest is None or latest is commented:
+                    continue
+                commented = latest
+                stats_analyzer.print_response(f"Based upon the following cricket data {latest} generate engaging and exciting commentary")
+        elif os.getenv("VECTOR_STORE", "0") == "1":
+            from processing.vector_store import create_vector_store
+            # The vector server runs the whole dataflow, snapshot sink included, in its own thread
+            create_vector_store(pw_table, match_titles=dict(zip(match_ids, match_titles)))
+            threading.Event().wait()
+        else:
+            pw.run()
 
     except Exception as e:
         print(f"Pipeline failed: {e}")
@@ -0,0 +1,357 @@
+"""In-process nearest-neighbour retrieval over the vector store documents, partitioned by match_id.
+
+A drop-in for the PathwayVectorClient that StatsAnalyzerAgent is given as vector_client:
+similarity_search() returns LangChain Documents, but searches an index held in the agent
+process instead of making an HTTP round trip to the VectorStoreServer on port 8666, and
+only looks at the matches and rows the filters allow. It indexes the same over and phase
+documents as the server (processing/rollups.py), replacing a document in place whenever
+its doc_id is emitted again.
+
+- One partition per match_id, so a match-scoped query never touches other matches.
+- Vectors are stored as int8 with one float scale per vector (a quarter of float32).
+- Past train_size vectors, a partition clusters itself (IVF) and a query scores only
+  the nprobe clusters nearest to it; smaller partitions are scanned exhaustively.
+- team / team1 / team2 / start / end filters are applied before any scoring.
+
+    index = embedded_vector_index()
+    pw.io.subscribe(read_rollups(pw_table), on_change=index.on_change)
+    index.similarity_search("Kohli against spin", k=4, match_id="107563", metadata_filter={"start": ts})
+
+    python -m processing.ann_index bench --docs 50000 --matches 20 [--server 127.0.0.1:8666]
+"""
+import argparse
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Those of processing/vector_store.py; a row keeps the ones it has
+# Filtered searches allowing at most this many rows scan them all instead of probing clusters
+EXHAUSTIVE_ROWS = 4096
+METADATA_COLUMNS = ("match_id", "timestamp", "team1", "team2", "level", "innings", "over", "phase",
+                    "runs", "wickets", "bowler", "batters")
+
+
+def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-vector int8 codes and the scales that map them back to floats"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+class _Partition:
+    """The vectors, metadata and cluster assignment of one match. Callers hold the index lock."""
+
+    def __init__(self, dim: int):
+        self.size = 0
+        self.codes = np.empty((64, dim), dtype=np.int8)
+        self.scales = np.empty(64, dtype=np.float32)
+        self.timestamps = np.empty(64, dtype=np.int64)
+        self.teams = np.empty((64, 2), dtype=np.int32)
+        self.clusters = np.empty(64, dtype=np.int32)
+        self.documents: List[Tuple[str, dict]] = []
+        self.ids: Dict[str, int] = {}
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+
+    def add(self, codes: np.ndarray, scales: np.ndarray, timestamps, teams, documents):
+        count = len(codes)
+        if self.size + count > len(self.codes):
+            capacity = max(2 * len(self.codes), self.size + count)
+            for name in ("codes", "scales", "timestamps", "teams", "clusters"):
+                old = getattr(self, name)
+                new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+                new[:self.size] = old[:self.size]
+                setattr(self, name, new)
+        rows = slice(self.size, self.size + count)
+        self.codes[rows], self.scales[rows] = codes, scales
+        self.timestamps[rows], self.teams[rows] = timestamps, teams
+        self.clusters[rows] = self._assign(codes, scales) if self.centroids is not None else -1
+        self.documents.extend(documents)
+        self.size += count
+
+    def replace(self, row: int, code: np.ndarray, scale: float, timestamp: int, teams, document):
+        self.codes[row], self.scales[row] = code, scale
+        self.timestamps[row], self.teams[row] = timestamp, teams
+        if self.centroids is not None:
+            self.clusters[row] = self._assign(code[None], np.array([scale], dtype=np.float32))[0]
+        self.documents[row] = document
+
+    def vectors(self, rows=slice(None)) -> np.ndarray:
+        return self.codes[:self.size][rows].astype(np.float32) * self.scales[:self.size][rows, None]
+
+    def _assign(self, codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+        vectors = codes.astype(np.float32) * scales[:, None]
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def train(self, iterations: int = 8, sample: int = 8192, seed: int = 0):
+        """Spherical k-means with about sqrt(size) clusters, on at most sample vectors"""
+        rng = np.random.default_rng(seed)
+        clusters = max(1, int(np.sqrt(self.size)))
+        rows = rng.choice(self.size, size=min(self.size, sample), replace=False)
+        vectors = normalize(self.vectors(rows))
+        centroids = vectors[rng.choice(len(vectors), size=clusters, replace=False)]
+        for _ in range(iterations):
+            assigned = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assigned, vectors)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = normalize(sums)
+        self.centroids = centroids
+        self.clusters[:self.size] = self._assign(self.codes[:self.size], self.scales[:self.size])
+        self.trained_size = self.size
+
+    def search(self, query: np.ndarray, k: int, nprobe: int, allowed: Optional[np.ndarray]) -> List[Tuple[float, int]]:
+        candidates = np.ones(self.size, dtype=bool) if allowed is None else allowed
+        narrow = allowed is not None and np.count_nonzero(allowed) <= EXHAUSTIVE_ROWS
+        if self.centroids is not None and nprobe < len(self.centroids) and not narrow:
+            probed = np.argpartition(-(self.centroids @ query), nprobe)[:nprobe]
+            in_probed = candidates & np.isin(self.clusters[:self.size], probed)
+            # Fewer than k allowed rows in the nearest clusters: scan all the allowed ones instead
+            if np.count_nonzero(in_probed) >= k:
+                candidates = in_probed
+        rows = np.flatnonzero(candidates)
+        if not len(rows):
+            return []
+        scores = (self.codes[rows].astype(np.float32) @ query) * self.scales[rows]
+        top = np.argpartition(-scores, min(k, len(rows)) - 1)[:k] if len(rows) > k else np.arange(len(rows))
+        return [(float(scores[i]), int(rows[i])) for i in top]
+
+
+class EmbeddedVectorIndex:
+    """Match snapshots embedded with the pipeline's embedder and searched in memory. Thread-safe."""
+
+    def __init__(self, embedder, nprobe: int = 8, train_size: int = 2048):
+        self.embedder = embedder
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self._partitions: Dict[str, _Partition] = {}
+        self._team_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _team_id(self, team: str) -> int:
+        return self._team_ids.setdefault(str(team or ""), len(self._team_ids))
+
+    def add_texts(self, texts: List[str], metadatas: List[dict], vectors=None,
+                  ids: List[str] = None) -> List[Tuple[str, int]]:
+        """Index texts under their metadata's match_id; vectors are computed if not given.
+
+        A text whose id is already indexed replaces that document and keeps its row.
+        Returns a (match_id, row) reference per text, for score_refs() and documents().
+        """
+        if not texts:
+            return []
+        if vectors is None:
+            vectors = self.embedder.embed_documents(texts)
+        codes, scales = quantize(normalize(vectors))
+        by_match: Dict[str, List[int]] = {}
+        refs: List[Tuple[str, int]] = [None] * len(texts)
+        for i, metadata in enumerate(metadatas):
+            by_match.setdefault(str(metadata.get("match_id", "")), []).append(i)
+
+        with self._lock:
+            for match_id, rows in by_match.items():
+                partition = self._partitions.get(match_id)
+                if partition is None:
+                    partition = self._partitions[match_id] = _Partition(codes.shape[1])
+                new_rows = []
+                for i in rows:
+                    row = partition.ids.get(ids[i]) if ids and ids[i] else None
+                    if row is None:
+                        new_rows.append(i)
+                        continue
+                    partition.replace(row, codes[i], scales[i], int(metadatas[i].get("timestamp") or 0),
+                                      self._teams(metadatas[i]), (texts[i], dict(metadatas[i])))
+                    refs[i] = (match_id, row)
+                if not new_rows:
+                    continue
+                for offset, i in enumerate(new_rows):
+                    refs[i] = (match_id, partition.size + offset)
+                    if ids and ids[i]:
+                        partition.ids[ids[i]] = partition.size + offset
+                partition.add(codes[new_rows], scales[new_rows],
+                              [int(metadatas[i].get("timestamp") or 0) for i in new_rows],
+                              [self._teams(metadatas[i]) for i in new_rows],
+                              [(texts[i], dict(metadatas[i])) for i in new_rows])
+                # Retrained as the partition doubles, so clusters keep up with the match
+                if partition.size >= self.train_size and partition.size >= 2 * partition.trained_size:
+                    partition.train()
+        return refs
+
+    def _teams(self, metadata: dict) -> Tuple[int, int]:
+        return self._team_id(metadata.get("team1")), self._team_id(metadata.get("team2"))
+
+    def on_change(self, key, row: dict, time: int, is_addition: bool) -> Optional[Tuple[str, int]]:
+        """pw.io.subscribe callback on the rollup table: each new or updated document, by doc_id.
+
+        Returns the document's reference, or None when nothing was indexed. The removal of
+        an upserted document's old version is skipped: its replacement takes the same row.
+        """
+        text = row.get("text")
+        if not is_addition or not text:
+            return None
+        match_id, doc_id = str(row.get("match_id", "")), row.get("doc_id")
+        with self._lock:
+            partition = self._partitions.get(match_id)
+            indexed = partition.ids.get(doc_id) if partition is not None else None
+            if indexed is not None and partition.documents[indexed][0] == text:
+                # Re-emitted unchanged: nothing to embed
+                return None
+        metadata = {column: row[column] for column in METADATA_COLUMNS if column in row}
+        return self.add_texts([text], [metadata], ids=[doc_id] if doc_id else None)[0]
+
+    def score_refs(self, vector, refs: List[Tuple[str, int]]) -> np.ndarray:
+        """Cosine similarity of the query vector to just these documents"""
+        query = normalize(vector)[0]
+        scores = np.empty(len(refs), dtype=np.float32)
+        by_match: Dict[str, List[int]] = {}
+        for i, (match_id, _) in enumerate(refs):
+            by_match.setdefault(match_id, []).append(i)
+        with self._lock:
+            for match_id, positions in by_match.items():
+                partition = self._partitions[match_id]
+                rows = [refs[i][1] for i in positions]
+                scores[positions] = (partition.codes[rows].astype(np.float32) @ query) * partition.scales[rows]
+        return scores
+
+    def documents(self, refs: List[Tuple[str, int]]) -> List[Tuple[str, dict]]:
+        with self._lock:
+            return [self._partitions[match_id].documents[row] for match_id, row in refs]
+
+    def _allowed(self, partition: _Partition, metadata_filter: dict) -> Optional[np.ndarray]:
+        if not metadata_filter:
+            return None
+        allowed = np.ones(partition.size, dtype=bool)
+        teams = partition.teams[:partition.size]
+        for column, side in (("team1", 0), ("team2", 1)):
+            if column in metadata_filter:
+                allowed &= teams[:, side] == self._team_ids.get(str(metadata_filter[column]), -1)
+        if "team" in metadata_filter:
+            team = self._team_ids.get(str(metadata_filter["team"]), -1)
+            allowed &= (teams[:, 0] == team) | (teams[:, 1] == team)
+        timestamps = partition.timestamps[:partition.size]
+        if metadata_filter.get("start") is not None:
+            allowed &= timestamps >= int(metadata_filter["start"])
+        if metadata_filter.get("end") is not None:
+            allowed &= timestamps <= int(metadata_filter["end"])
+        return allowed
+
+    def search_by_vector(self, vector, k: int = 4, match_id: str = None,
+                         metadata_filter: dict = None) -> List[Tuple[Document, float]]:
+        query = normalize(vector)[0]
+        results = []
+        with self._lock:
+            match_ids = [str(match_id)] if match_id is not None else list(self._partitions)
+            for partition_id in match_ids:
+                partition = self._partitions.get(partition_id)
+                if partition is None:
+                    continue
+                allowed = self._allowed(partition, metadata_filter)
+                for score, row in partition.search(query, k, self.nprobe, allowed):
+                    results.append((score, partition.documents[row]))
+        results.sort(key=lambda result: -result[0])
+        return [(Document(page_content=text, metadata=metadata), score) for score, (text, metadata) in results[:k]]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, match_id: str = None,
+                                     metadata_filter: dict = None) -> List[Tuple[Document, float]]:
+        return self.search_by_vector(self.embedder.embed_query(query), k, match_id, metadata_filter)
+
+    def similarity_search(self, query: str, k: int = 4, match_id: str = None,
+                          metadata_filter: dict = None) -> List[Document]:
+        return [document for document, _ in self.similarity_search_with_score(query, k, match_id, metadata_filter)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            partitions = list(self._partitions.values())
+            documents = sum(partition.size for partition in partitions)
+            dim = partitions[0].codes.shape[1] if partitions else 0
+            return {
+                "matches": len(partitions),
+                "documents": documents,
+                "clustered_matches": sum(partition.centroids is not None for partition in partitions),
+                "vector_bytes": documents * (dim + 4),
+                "float32_bytes": documents * dim * 4,
+            }
+
+
+def embedded_vector_index() -> EmbeddedVectorIndex:
+    """The index over the pipeline's cached embedder (see processing/embedding_cache.py)"""
+    from processing.embedding_cache import CachedEmbeddings
+    from processing.embeddings import load_embedder
+
+    embeddings = CachedEmbeddings(load_embedder(), os.getenv("EMBEDDING_CACHE", "./vector_store/embeddings.sqlite"))
+    return EmbeddedVectorIndex(embeddings, nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "8")))
+
+
+def _quantiles(seconds: List[float]) -> str:
+    seconds = sorted(seconds)
+    return " ".join(f"p{q}={seconds[min(len(seconds) - 1, int(q / 100 * len(seconds)))] * 1000:.3f}ms"
+                    for q in (50, 95, 99))
+
+
+def _benchmark(args):
+    """Synthetic snapshots: search latency and recall of the index, and the server path if given"""
+    rng = np.random.default_rng(0)
+    per_match = args.docs // args.matches
+    # Snapshots of a match are variations on a few situations: topic vectors plus noise of norm args.noise
+    topics = normalize(rng.standard_normal((64, args.dim)))
+    noise = args.noise / np.sqrt(args.dim)
+    index = EmbeddedVectorIndex(embedder=None, nprobe=args.nprobe)
+    exact = {}
+    started = time.perf_counter()
+    for m in range(args.matches):
+        vectors = normalize(topics[rng.integers(0, len(topics), per_match)]
+                            + noise * rng.standard_normal((per_match, args.dim)))
+        exact[str(m)] = vectors
+        index.add_texts([f"match {m} ball {i}" for i in range(per_match)],
+                        [{"match_id": str(m), "timestamp": i, "team1": f"T{m}", "team2": f"T{m + 1}"}
+                         for i in range(per_match)], vectors)
+    print(f"Indexed {args.docs} vectors in {time.perf_counter() - started:.2f}s: {index.stats()}")
+
+    latencies, recalls = [], []
+    for _ in range(args.queries):
+        match_id = str(rng.integers(0, args.matches))
+        query = normalize(topics[rng.integers(0, len(topics))] + noise * rng.standard_normal(args.dim))[0]
+        began = time.perf_counter()
+        found = index.search_by_vector(query, k=args.k, match_id=match_id)
+        latencies.append(time.perf_counter() - began)
+        truth = set(np.argsort(-(exact[match_id] @ query))[:args.k].tolist())
+        recalls.append(len(truth & {int(doc.page_content.rsplit(" ", 1)[1]) for doc, _ in found}) / args.k)
+    print(f"Embedded index, match-scoped: {_quantiles(latencies)} recall@{args.k}={np.mean(recalls):.3f}")
+
+    if args.server:
+        from langchain_community.vectorstores import PathwayVectorClient
+
+        host, port = args.server.rsplit(":", 1)
+        client = PathwayVectorClient(host=host, port=int(port))
+        latencies = []
+        for i in range(min(args.queries, 200)):
+            began = time.perf_counter()
+            client.similarity_search(f"Statistics and records for player {i} in similar situations", k=args.k)
+            latencies.append(time.perf_counter() - began)
+        print(f"VectorStoreServer over HTTP: {_quantiles(latencies)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the embedded vector index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("bench")
+    bench.add_argument("--docs", type=int, default=50000)
+    bench.add_argument("--matches", type=int, default=20)
+    bench.add_argument("--dim", type=int, default=384)
+    bench.add_argument("--queries", type=int, default=1000)
+    bench.add_argument("--k", type=int, default=4)
+    bench.add_argument("--nprobe", type=int, default=8)
+    bench.add_argument("--noise", type=float, default=0.6)
+    bench.add_argument("--server", help="host:port of a running VectorStoreServer to compare against")
+    _benchmark(parser.parse_args())
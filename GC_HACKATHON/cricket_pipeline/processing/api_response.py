@@ -0,0 +1,44 @@
+"""cricket-api payloads as rows of the document store schema (see CricketDataPipeline._get_schema).
+
+Kept free of Pathway so the journal replay (ingestion/journal.py) and tests can process
+payloads without the dataflow.
+"""
+import time
+
+
+def process_api_response(match_id: str, data: dict, timestamp: float = None) -> dict:
+    """Transform API response to match document store schema"""
+    return {
+        "match_id": match_id,
+        "timestamp": int(timestamp if timestamp is not None else time.time()),
+        "current_score": data.get("livescore", ""),
+        "context": data.get("update", ""),
+        "team1": extract_team(data.get("title", ""), 0),
+        "team2": extract_team(data.get("title", ""), 1),
+        "batsman": f"{data.get('batterone', '')}/{data.get('battertwo', '')}",
+        "bowler": f"{data.get('bowlerone', '')}/{data.get('bowlertwo', '')}",
+        "runs": parse_runs(data.get("livescore", "0/0")),
+        "wicket": "wicket" in data.get("context", "").lower(),
+        "player_stats": {
+            "batsmen": {
+                data.get("batterone", ""): {
+                    "runs": data.get("batsmanonerun", 0),
+                    "balls": data.get("batsmanoneball", 0)
+                }
+            }
+        }
+    }
+
+
+def extract_team(title: str, index: int) -> str:
+    """Extract team names from match title"""
+    teams = title.split("vs") if "vs" in title else ["Unknown", "Unknown"]
+    return teams[index].split("-")[0].strip()
+
+
+def parse_runs(score: str) -> int:
+    """Extract total runs from score string"""
+    try:
+        return int(score.split("/")[0])
+    except (IndexError, ValueError):
+        return 0
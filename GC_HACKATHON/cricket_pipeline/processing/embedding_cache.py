@@ -0,0 +1,226 @@
+"""Embed each distinct text once: a content-hash cache on disk in front of the embedder.
+
+The same commentary line ("update") comes back on poll after poll until the next ball,
+and the vector store embeds every row. CachedEmbeddings hashes each text, serves repeats
+from memory or from a SQLite file that survives restarts, and sends only new texts to
+the model, in fixed-size micro-batches. Pathway's LangChain adapter embeds one row per
+aembed_documents call, so concurrent calls are coalesced into one batch as well.
+
+    embeddings = CachedEmbeddings(load_embedder(), "./vector_store/embeddings.sqlite")
+    embeddings.stats()  # {"hit_ratio": 0.93, "embeddings_per_second": 410.0, ...}
+"""
+import array
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from processing.embeddings import EMBEDDING_MODEL
+
+
+def content_key(text: str, model: str = EMBEDDING_MODEL) -> str:
+    return hashlib.sha1(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Vectors by content key in a SQLite file, as float32 blobs. Thread-safe."""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            # Within SQLite's default limit on query parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                for key, blob in rows:
+                    vector = array.array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, List[float]]]):
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                                 [(key, array.array("f", vector).tobytes()) for key, vector in items])
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """A LangChain embedder that only computes texts it has not seen, batch_size at a time.
+
+    Repeats are served from an LRU of memory_entries vectors, then from the store on disk.
+    Concurrent aembed_documents calls wait up to max_wait seconds to share a batch. Prints
+    its stats every report_every seconds while embedding (0 to stay quiet).
+    """
+
+    def __init__(self, embedder: Embeddings, path: str, model: str = EMBEDDING_MODEL, batch_size: int = 32,
+                 max_wait: float = 0.02, memory_entries: int = 4096, report_every: float = 60.0):
+        self.embedder = embedder
+        self.store = EmbeddingStore(path)
+        self.model = model
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.memory_entries = memory_entries
+        self.report_every = report_every
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+        self._counts = {"texts": 0, "memory_hits": 0, "disk_hits": 0, "embedded": 0, "batches": 0}
+        self._embed_seconds = 0.0
+        self._last_report = time.monotonic()
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_texts = set()
+        self._flush_timer = None
+        # The event loop only keeps weak references to tasks
+        self._tasks = set()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [content_key(text, self.model) for text in texts]
+        with self._lock:
+            self._counts["texts"] += len(texts)
+            vectors = self._from_memory(keys)
+            self._counts["memory_hits"] += sum(key in vectors for key in keys)
+
+        missing = list(dict.fromkeys(key for key in keys if key not in vectors))
+        if missing:
+            from_disk = self.store.get_many(missing)
+            vectors.update(from_disk)
+            with self._lock:
+                self._counts["disk_hits"] += sum(key in from_disk for key in keys)
+                self._remember(from_disk)
+
+        # Each distinct text is embedded once, even when concurrent calls bring it at the same time
+        new = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if new:
+            with self._compute_lock:
+                with self._lock:
+                    vectors.update(self._from_memory(list(new)))
+                new = {key: text for key, text in new.items() if key not in vectors}
+                if new:
+                    vectors.update(self._embed_new(new))
+        self._maybe_report()
+        return [vectors[key] for key in keys]
+
+    def _from_memory(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        for key in keys:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                found[key] = self._memory[key]
+        return found
+
+    def _remember(self, vectors: Dict[str, List[float]]):
+        self._memory.update(vectors)
+        for key in vectors:
+            self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def _embed_new(self, new: Dict[str, str]) -> Dict[str, List[float]]:
+        keys, texts = list(new), list(new.values())
+        computed = {}
+        for start in range(0, len(texts), self.batch_size):
+            began = time.perf_counter()
+            batch = self.embedder.embed_documents(texts[start:start + self.batch_size])
+            elapsed = time.perf_counter() - began
+            computed.update(zip(keys[start:start + self.batch_size], batch))
+            with self._lock:
+                self._counts["embedded"] += len(batch)
+                self._counts["batches"] += 1
+                self._embed_seconds += elapsed
+        self.store.put_many(computed.items())
+        with self._lock:
+            self._remember(computed)
+        return computed
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_texts.update(texts)
+        # Repeats cost nothing, so a batch is full when it holds batch_size distinct texts
+        if len(self._pending_texts) >= self.batch_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def _flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        pending, self._pending = self._pending, []
+        self._pending_texts = set()
+        if pending:
+            task = asyncio.ensure_future(self._embed_pending(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _embed_pending(self, pending: List[Tuple[List[str], asyncio.Future]]):
+        # Callers cancelled while waiting for the batch get nothing, before or after embedding
+        pending = [(batch, future) for batch, future in pending if not future.done()]
+        if not pending:
+            return
+        texts = [text for batch, _ in pending for text in batch]
+        try:
+            vectors = await asyncio.to_thread(self.embed_documents, texts)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        start = 0
+        for batch, future in pending:
+            if not future.done():
+                future.set_result(vectors[start:start + len(batch)])
+            start += len(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            embed_seconds = self._embed_seconds
+        return {
+            **counts,
+            # Share of texts served without running the model, repeats within a batch included
+            "hit_ratio": 1 - counts["embedded"] / counts["texts"] if counts["texts"] else 0.0,
+            "embeddings_per_second": counts["embedded"] / embed_seconds if embed_seconds else 0.0,
+            "embed_seconds": embed_seconds,
+        }
+
+    def _maybe_report(self):
+        if not self.report_every or time.monotonic() - self._last_report < self.report_every:
+            return
+        self._last_report = time.monotonic()
+        stats = self.stats()
+        print(f"Embeddings: {stats['texts']} texts, hit ratio {stats['hit_ratio']:.2f}, "
+              f"{stats['embedded']} embedded in {stats['batches']} batches "
+              f"at {stats['embeddings_per_second']:.0f}/s")
@@ -0,0 +1,25 @@
+"""The sentence embedder shared by the vector store and the backend's caches.
+
+Loading all-MiniLM-L6-v2 takes seconds and a few hundred MB, so it is loaded once per
+process, on first use. langchain_community and sentence-transformers are optional for
+callers that can do without embeddings: get_embedder() returns None when they are missing.
+"""
+from functools import lru_cache
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+@lru_cache(maxsize=None)
+def load_embedder():
+    """The LangChain embedder; raises ImportError if the embedding packages are not installed"""
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+
+def get_embedder():
+    try:
+        return load_embedder()
+    except ImportError as e:
+        print(f"Embeddings unavailable ({e}); install langchain-community and sentence-transformers")
+        return None
@@ -0,0 +1,167 @@
+"""Keyword-first retrieval: BM25 over player and team names, reranked by vectors.
+
+Queries like "Statistics and records for Virat Kohli in similar situations" hinge on a
+name, which embeddings match poorly and expensively. HybridRetriever indexes the same
+over and phase documents as the vector store (processing/rollups.py), keeping an inverted
+index over the names in each document's columns (batters, bowler, teams) and over any of
+those names its text mentions. A document re-emitted under its doc_id replaces its old
+postings. A query's name tokens pick at most `candidates` documents by BM25, and only
+those are reranked against the query vector, read from the EmbeddedVectorIndex's stored
+int8 vectors. A query made only of names is answered from the inverted index without
+embedding anything; one with no known name, or whose names pick no document (the
+vocabulary only grows, and filters may rule every candidate out), falls back to the
+vector index.
+
+    retriever = HybridRetriever(embedded_vector_index())
+    pw.io.subscribe(read_rollups(pw_table), on_change=retriever.on_change)
+    retriever.similarity_search("Kohli against Starc", k=4, match_id="107563")
+"""
+import math
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+from processing.ann_index import EmbeddedVectorIndex
+from processing.match_state import is_player
+
+TOKEN = re.compile(r"[a-z0-9]+")
+# Words in the agents' query templates and common English that are never a name on their own
+STOPWORDS = {"a", "an", "and", "the", "for", "in", "of", "on", "to", "at", "vs", "v", "with", "against",
+             "statistics", "records", "record", "similar", "situations", "situation", "stats"}
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(str(text or "").lower())
+
+
+def entity_names(row: dict) -> List[str]:
+    """Players and teams of a document ("batters" and "bowler" may hold "A/B")"""
+    names = [name.strip() for field in ("batters", "bowler") for name in str(row.get(field) or "").split("/")
+             if is_player(name)]
+    return names + [str(row[field]) for field in ("team1", "team2") if row.get(field)]
+
+
+def matches_filter(metadata: dict, metadata_filter: Optional[dict]) -> bool:
+    """The EmbeddedVectorIndex filters (team, team1, team2, start, end) on one document"""
+    if not metadata_filter:
+        return True
+    for column in ("team1", "team2"):
+        if column in metadata_filter and str(metadata.get(column)) != str(metadata_filter[column]):
+            return False
+    if "team" in metadata_filter and str(metadata_filter["team"]) not in (str(metadata.get("team1")),
+                                                                         str(metadata.get("team2"))):
+        return False
+    timestamp = int(metadata.get("timestamp") or 0)
+    if metadata_filter.get("start") is not None and timestamp < int(metadata_filter["start"]):
+        return False
+    if metadata_filter.get("end") is not None and timestamp > int(metadata_filter["end"]):
+        return False
+    return True
+
+
+class HybridRetriever:
+    """BM25 over entity tokens to narrow, EmbeddedVectorIndex vectors to rerank. Thread-safe."""
+
+    def __init__(self, index: EmbeddedVectorIndex, candidates: int = 50, keyword_weight: float = 0.3,
+                 k1: float = 1.2, b: float = 0.75):
+        self.index = index
+        self.candidates = candidates
+        self.keyword_weight = keyword_weight
+        self.k1 = k1
+        self.b = b
+        # match_id -> token -> {row: term frequency}, so match-scoped queries read one match's postings
+        self._postings: Dict[str, Dict[str, Dict[int, int]]] = {}
+        self._tokens: Dict[Tuple[str, int], List[str]] = {}
+        self._total_length = 0
+        self._vocabulary: Set[str] = set()
+        self._lock = threading.Lock()
+        self._counts = {"keyword_only": 0, "reranked": 0, "vector_fallback": 0}
+
+    def on_change(self, key, row: dict, time: int, is_addition: bool):
+        ref = self.index.on_change(key, row, time, is_addition)
+        if ref is not None:
+            self.add(ref, entity_names(row), row.get("text"))
+
+    def add(self, ref: Tuple[str, int], names: Iterable[str], text: str = ""):
+        """Index a document the vector index holds under ref, replacing what was indexed there"""
+        with self._lock:
+            postings = self._postings.setdefault(ref[0], {})
+            for token in self._tokens.pop(ref, ()):
+                row_counts = postings[token]
+                row_counts[ref[1]] -= 1
+                if not row_counts[ref[1]]:
+                    del row_counts[ref[1]]
+                self._total_length -= 1
+            tokens = [token for name in names for token in tokenize(name) if token not in STOPWORDS]
+            self._vocabulary.update(tokens)
+            # Names the text mentions count too ("Cummins to Kohli, FOUR", "Bowlers: Starc (2 ov)")
+            tokens += [token for token in tokenize(text) if token in self._vocabulary]
+            for token in tokens:
+                row_counts = postings.setdefault(token, {})
+                row_counts[ref[1]] = row_counts.get(ref[1], 0) + 1
+            self._tokens[ref] = tokens
+            self._total_length += len(tokens)
+
+    def keyword_search(self, tokens: List[str], match_id: str = None,
+                       limit: int = None) -> List[Tuple[float, Tuple[str, int]]]:
+        """BM25 over the inverted index: (score, ref), best first"""
+        with self._lock:
+            documents = len(self._tokens)
+            if not documents:
+                return []
+            average_length = self._total_length / documents
+            match_ids = [str(match_id)] if match_id is not None else list(self._postings)
+            scores: Dict[Tuple[str, int], float] = {}
+            for token in set(tokens):
+                frequency = sum(len(self._postings.get(m, {}).get(token, ())) for m in self._postings)
+                if not frequency:
+                    continue
+                idf = math.log(1 + (documents - frequency + 0.5) / (frequency + 0.5))
+                for m in match_ids:
+                    for row, tf in self._postings.get(m, {}).get(token, {}).items():
+                        length = len(self._tokens[(m, row)])
+                        norm = tf + self.k1 * (1 - self.b + self.b * length / average_length)
+                        scores[(m, row)] = scores.get((m, row), 0.0) + idf * tf * (self.k1 + 1) / norm
+        ranked = sorted(((score, ref) for ref, score in scores.items()), key=lambda item: -item[0])
+        return ranked[:limit] if limit else ranked
+
+    def similarity_search_with_score(self, query: str, k: int = 4, match_id: str = None,
+                                     metadata_filter: dict = None) -> List[Tuple[Document, float]]:
+        words = [token for token in tokenize(query) if token not in STOPWORDS]
+        with self._lock:
+            names = [token for token in words if token in self._vocabulary]
+        ranked = self.keyword_search(names, match_id) if names else []
+        if metadata_filter and ranked:
+            documents = self.index.documents([ref for _, ref in ranked])
+            ranked = [item for item, (_, metadata) in zip(ranked, documents) if matches_filter(metadata, metadata_filter)]
+        ranked = ranked[:self.candidates]
+        if not ranked:
+            with self._lock:
+                self._counts["vector_fallback"] += 1
+            return self.index.similarity_search_with_score(query, k, match_id, metadata_filter)
+
+        if len(names) == len(words) or len(ranked) <= k:
+            # Nothing but names, or nothing to choose between: the keyword ranking is the answer
+            outcome, scored = "keyword_only", ranked[:k]
+        else:
+            outcome = "reranked"
+            similarities = self.index.score_refs(self.index.embedder.embed_query(query), [ref for _, ref in ranked])
+            best = ranked[0][0] or 1.0
+            scored = sorted(((float(similarity) + self.keyword_weight * score / best, ref)
+                             for similarity, (score, ref) in zip(similarities, ranked)),
+                            key=lambda item: -item[0])[:k]
+        with self._lock:
+            self._counts[outcome] += 1
+        documents = self.index.documents([ref for _, ref in scored])
+        return [(Document(page_content=text, metadata=metadata), score)
+                for (score, _), (text, metadata) in zip(scored, documents)]
+
+    def similarity_search(self, query: str, k: int = 4, match_id: str = None,
+                          metadata_filter: dict = None) -> List[Document]:
+        return [document for document, _ in self.similarity_search_with_score(query, k, match_id, metadata_filter)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"documents": len(self._tokens), "vocabulary": len(self._vocabulary), **self._counts}
@@ -0,0 +1,324 @@
+"""Incremental per-match state built from successive cricket-api /score snapshots.
+
+Each snapshot that changes the score is appended to compact typed arrays, a few bytes
+per ball, while running aggregates (partnership, runs per over, bowler spells, chase
+equation) are updated in O(1). The over-by-over worm, run-rate windows and spells can
+then be read without re-fetching or re-scanning anything.
+"""
+import re
+import time
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, List, NamedTuple, Optional
+
+# "IND 123/4 (15.2)", "123-4 (15.2 ov)", "123 (15.2)"
+SCORE_PATTERN = re.compile(r"(\d+)(?:\s*[/-]\s*(\d+))?\s*\(\s*(\d+)(?:\.(\d))?")
+CHASE_PATTERN = re.compile(r"need (\d+) runs? (?:in|from) (\d+) balls?", re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+PLACEHOLDERS = {"", "data not found", "unknown"}
+NO_BOWLER = 0xFFFF
+
+
+class Score(NamedTuple):
+    runs: int
+    wickets: int
+    balls: int
+
+
+def parse_score(livescore: str) -> Optional[Score]:
+    """Runs, wickets and legal balls from a cricket-api livescore string, None if it has no overs"""
+    match = SCORE_PATTERN.search(str(livescore or ""))
+    if not match:
+        return None
+    runs, wickets, overs, balls = match.groups()
+    return Score(int(runs), int(wickets or 0), overs_to_balls(f"{overs}.{balls or 0}"))
+
+
+def overs_to_balls(overs) -> int:
+    """'15.2' -> 92"""
+    number = to_float(overs)
+    whole = int(number)
+    return whole * 6 + round((number - whole) * 10)
+
+
+def balls_to_overs(balls: int) -> str:
+    return f"{balls // 6}.{balls % 6}"
+
+
+def to_float(value, default: float = 0.0) -> float:
+    """First number in a scraped value such as '45', '(30)' or '8.50'"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = NUMBER_PATTERN.search(str(value or ""))
+    return float(match.group()) if match else default
+
+
+def to_int(value, default: int = 0) -> int:
+    return int(to_float(value, default))
+
+
+def first_present(raw: dict, *keys):
+    """First non-empty value among keys; cricket-api spells some keys differently than expected"""
+    for key in keys:
+        if raw.get(key) not in (None, ""):
+            return raw[key]
+    return None
+
+
+def is_player(name) -> bool:
+    return bool(name) and str(name).strip().lower() not in PLACEHOLDERS
+
+
+def player_name(name) -> str:
+    """A name without Cricbuzz's marker for the striker and the bowler on ("Virat Kohli *")"""
+    return str(name).strip().rstrip("*").rstrip()
+
+
+def per_over(runs: int, balls: int) -> Optional[float]:
+    return round(6.0 * runs / balls, 2) if balls else None
+
+
+class BowlerFigures(NamedTuple):
+    balls: int
+    runs: int
+    wickets: int
+
+
+def bowler_figures(raw: dict, slot: str = "bowlerone") -> BowlerFigures:
+    return BowlerFigures(
+        overs_to_balls(first_present(raw, f"{slot}over", f"{slot}overs") or 0),
+        to_int(first_present(raw, f"{slot}run", f"{slot}runs")),
+        to_int(first_present(raw, f"{slot}wickers", f"{slot}wicket", f"{slot}wickets")),
+    )
+
+
+class MatchState:
+    """History and running aggregates for the current innings of one match"""
+
+    def __init__(self, match_id: str):
+        self.match_id = match_id
+        self.innings = 1
+        self.completed_innings: List[Score] = []
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self._reset_innings()
+
+    def _reset_innings(self):
+        # One entry per snapshot that changed the score
+        self.balls = array("H")
+        self.runs = array("H")
+        self.wickets = array("B")
+        self.timestamps = array("I")
+        self.bowler_ids = array("H")
+        # Runs scored in each over; runs that arrive across a polling gap go to the latest over
+        self.over_runs = array("H")
+        self.base_runs = 0
+        self.tracked_from_over = 0
+        self.last_score: Optional[Score] = None
+        self.previous_score: Optional[Score] = None
+        # Score when the current partnership started
+        self.partnership_start = Score(0, 0, 0)
+        self.partnership_known = True
+        self.batter_runs: Dict[str, int] = {}
+        self.previous_batter_runs: Dict[str, int] = {}
+        # Whether the latest snapshot changed batter_runs, i.e. previous_batter_runs is the ball before
+        self.batters_moved = False
+        # bowler -> [figures at spell start, latest over index seen, spell start over index]
+        self._spells: Dict[str, list] = {}
+        self.current_bowler: Optional[str] = None
+        self.bowler_figures: Dict[str, BowlerFigures] = {}
+        # Bowlers named in the latest snapshot, current bowler first
+        self.last_bowlers: List[str] = []
+        self.chase: Optional[dict] = None
+
+    def _name_id(self, name: str) -> int:
+        if name not in self._name_ids:
+            self._name_ids[name] = len(self._names)
+            self._names.append(name)
+        return self._name_ids[name]
+
+    def ingest(self, raw: dict, timestamp: float = None) -> bool:
+        """Fold one /score payload into the state; True if the score moved"""
+        score = parse_score(raw.get("livescore"))
+        changed = score is not None and score != self.last_score
+        if changed:
+            if self.last_score is not None and score.balls < self.last_score.balls:
+                # The score went backwards: a new innings has started
+                self.completed_innings.append(self.last_score)
+                self.innings += 1
+                self._reset_innings()
+            self._append(score, timestamp)
+        self._update_players(raw)
+        if changed:
+            self.bowler_ids.append(self._name_id(self.current_bowler) if self.current_bowler else NO_BOWLER)
+        self._update_chase(raw)
+        return changed
+
+    def _append(self, score: Score, timestamp: Optional[float]):
+        previous = self.last_score
+        if previous is None:
+            # Possibly joined mid-innings: runs before this point belong to no over we saw
+            self.base_runs = score.runs
+            self.tracked_from_over = score.balls // 6
+            self.partnership_known = score.wickets == 0
+        elif score.wickets > previous.wickets:
+            self.partnership_start = score
+            self.partnership_known = True
+
+        over = max(score.balls - 1, 0) // 6
+        while len(self.over_runs) <= over:
+            self.over_runs.append(0)
+        if previous is not None:
+            # Several balls between two polls all land in the latest over
+            self.over_runs[over] += max(score.runs - previous.runs, 0)
+
+        self.balls.append(score.balls)
+        self.runs.append(score.runs)
+        self.wickets.append(score.wickets)
+        self.timestamps.append(int(timestamp if timestamp is not None else time.time()))
+        self.previous_score, self.last_score = previous, score
+
+    def _update_players(self, raw: dict):
+        runs = {}
+        for slot, prefix in (("batterone", "batsmanone"), ("battertwo", "batsmantwo")):
+            name = raw.get(slot)
+            if is_player(name):
+                runs[player_name(name)] = to_int(raw.get(f"{prefix}run"))
+        self.batters_moved = runs != self.batter_runs
+        if self.batters_moved:
+            self.previous_batter_runs, self.batter_runs = self.batter_runs, runs
+
+        bowler = raw.get("bowlerone")
+        before = self.bowler_figures.get(player_name(bowler)) if is_player(bowler) else None
+        self.last_bowlers = []
+        for slot in ("bowlerone", "bowlertwo"):
+            name = raw.get(slot)
+            if is_player(name):
+                self.bowler_figures[player_name(name)] = bowler_figures(raw, slot)
+                self.last_bowlers.append(player_name(name))
+        if is_player(bowler):
+            self._update_spell(player_name(bowler), before)
+
+    def _update_spell(self, bowler: str, before: Optional[BowlerFigures]):
+        # A spell goes on while the bowler keeps bowling every other over. It is counted from the
+        # bowler's figures before this appearance, so the ball that started it is part of it.
+        over = self.last_score.balls // 6 if self.last_score else 0
+        spell = self._spells.get(bowler)
+        figures = self.bowler_figures[bowler]
+        if spell is None or over - spell[1] > 2 or figures.balls < spell[0].balls:
+            if before is None:
+                # First sighting: all of it is this spell, unless we joined after balls before this over
+                in_over = (self.last_score.balls - 1) % 6 + 1 if self.last_score and self.last_score.balls else 0
+                joined = self.previous_score is None and figures.balls > in_over
+                before = figures if joined else BowlerFigures(0, 0, 0)
+            self._spells[bowler] = [before, over, over]
+        else:
+            spell[1] = over
+        self.current_bowler = bowler
+
+    def _update_chase(self, raw: dict):
+        match = CHASE_PATTERN.search(str(raw.get("update", "")))
+        if match:
+            needed, balls_left = int(match.group(1)), int(match.group(2))
+            self.chase = {"runs_needed": needed, "balls_left": balls_left,
+                          "required_rate": per_over(needed, balls_left)}
+        elif self.completed_innings and self.last_score is not None:
+            needed = self.completed_innings[-1].runs + 1 - self.last_score.runs
+            self.chase = {"runs_needed": max(needed, 0), "balls_left": None, "required_rate": None}
+
+    # --- Queries ---
+
+    def partnership(self) -> Optional[dict]:
+        if self.last_score is None or not self.partnership_known:
+            return None
+        return {"runs": self.last_score.runs - self.partnership_start.runs,
+                "balls": self.last_score.balls - self.partnership_start.balls}
+
+    def runs_per_over(self) -> List[int]:
+        return self.over_runs.tolist()
+
+    def worm(self) -> List[int]:
+        """Cumulative runs at the end of each over"""
+        return list(accumulate(self.over_runs, initial=self.base_runs))[1:]
+
+    def run_rate(self) -> Optional[float]:
+        return per_over(self.last_score.runs, self.last_score.balls) if self.last_score else None
+
+    def recent_run_rate(self, window_balls: int = 30) -> Optional[dict]:
+        """Run rate over roughly the last window_balls, from the earliest snapshot inside the window"""
+        if self.last_score is None:
+            return None
+        start = bisect_left(self.balls, self.last_score.balls - window_balls)
+        balls = self.last_score.balls - self.balls[start]
+        if balls <= 0:
+            return None
+        return {"balls": balls, "run_rate": per_over(self.last_score.runs - self.runs[start], balls)}
+
+    def bowler_spells(self) -> Dict[str, dict]:
+        spells = {}
+        for bowler, (start, _, start_over) in self._spells.items():
+            figures = self.bowler_figures.get(bowler, start)
+            balls = figures.balls - start.balls
+            spells[bowler] = {"balls": balls, "overs": balls_to_overs(balls), "runs": figures.runs - start.runs,
+                              "wickets": figures.wickets - start.wickets, "since_over": start_over + 1,
+                              "economy": per_over(figures.runs - start.runs, balls)}
+        return spells
+
+    def nbytes(self) -> int:
+        arrays = (self.balls, self.runs, self.wickets, self.timestamps, self.bowler_ids, self.over_runs)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def summary(self) -> dict:
+        score = self.last_score
+        return {
+            "match_id": self.match_id,
+            "innings": self.innings,
+            "score": score._asdict() if score else None,
+            "overs": balls_to_overs(score.balls) if score else None,
+            "run_rate": self.run_rate(),
+            "recent": self.recent_run_rate(),
+            "partnership": self.partnership(),
+            "runs_per_over": self.runs_per_over(),
+            "tracked_from_over": self.tracked_from_over + 1,
+            "worm": self.worm(),
+            "chase": self.chase,
+            "bowler_spells": self.bowler_spells(),
+            "completed_innings": [s._asdict() for s in self.completed_innings],
+            "snapshots": len(self.balls),
+            "history_bytes": self.nbytes(),
+        }
+
+
+class MatchStateStore:
+    """MatchState per match id"""
+
+    def __init__(self):
+        self._states: Dict[str, MatchState] = {}
+
+    def state(self, match_id: str) -> MatchState:
+        """The match's state, created empty on first use"""
+        state = self._states.get(match_id)
+        if state is None:
+            state = self._states[match_id] = MatchState(match_id)
+        return state
+
+    def ingest(self, match_id: str, raw: dict, timestamp: float = None) -> MatchState:
+        state = self.state(match_id)
+        state.ingest(raw, timestamp)
+        return state
+
+    def get(self, match_id: str) -> Optional[MatchState]:
+        return self._states.get(match_id)
+
+    def forget(self, match_id: str):
+        self._states.pop(match_id, None)
+
+    def nbytes(self) -> int:
+        return sum(state.nbytes() for state in self._states.values())
+
+    def __contains__(self, match_id: str) -> bool:
+        return match_id in self._states
+
+    def __len__(self) -> int:
+        return len(self._states)
@@ -0,0 +1,218 @@
+"""Over and innings-phase summaries of the live snapshots, as vector store documents.
+
+Indexing every poll snapshot fills the vector store with near-copies of the same ball.
+RollupBuilder folds the snapshots of a match into one document per over and one per
+phase of an innings (powerplay, middle, death), each with its runs, wickets and main
+bowler as metadata. A document is re-emitted under the same doc_id whenever its over or
+phase moves on, so through RollupSubject's upsert session the index holds a few dozen
+current documents per innings instead of thousands of snapshots.
+
+    builder = RollupBuilder(titles={"107563": "ind-vs-aus-3rd-odi"})   # phases follow the format
+    for row in snapshots:            # rows as CricketDataPipeline._process_api_response returns them
+        documents = builder.update(row)
+"""
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+import pathway as pw
+from pathway.internals.api import SessionType
+
+from processing.match_state import Score, is_player, parse_score, per_over
+
+# (name, first over, last over); overs past the last phase count towards it
+T20_PHASES = (("powerplay", 1, 6), ("middle", 7, 15), ("death", 16, 20))
+ODI_PHASES = (("powerplay", 1, 10), ("middle", 11, 40), ("death", 41, 50))
+TEST_PHASES = (("new ball", 1, 20), ("middle", 21, 80), ("second new ball", 81, 90))
+ODI_TITLE = re.compile(r"\b(odi|one[- ]day|50[- ]over|list a)\b", re.IGNORECASE)
+TEST_TITLE = re.compile(r"\b(test|first[- ]class)\b", re.IGNORECASE)
+KEY_MOMENTS = ("wicket", "out", "four", "six", "fifty", "century", "drop")
+
+
+class RollupSchema(pw.Schema):
+    doc_id: str = pw.column_definition(primary_key=True)
+    text: str
+    match_id: str
+    timestamp: int
+    team1: str
+    team2: str
+    level: str
+    innings: int
+    over: int
+    phase: str
+    runs: int
+    wickets: int
+    bowler: str
+    batters: str
+
+
+def phases_for_title(title: str):
+    """Phases for the match format named in a title or slug ("ind-vs-aus-3rd-odi"); T20 otherwise"""
+    title = str(title or "").replace("-", " ")
+    if ODI_TITLE.search(title):
+        return ODI_PHASES
+    if TEST_TITLE.search(title):
+        return TEST_PHASES
+    return T20_PHASES
+
+
+def phase_of(over: int, phases=T20_PHASES) -> str:
+    for name, first, last in phases:
+        if first <= over <= last:
+            return name
+    return phases[-1][0]
+
+
+class _Over:
+    def __init__(self, number: int, start: Score):
+        self.number = number
+        self.start = start
+        self.end = start
+        self.bowler = ""
+        self.batters: List[str] = []
+        self.lines: List[str] = []
+        self.timestamp = 0
+
+    @property
+    def runs(self) -> int:
+        return self.end.runs - self.start.runs
+
+    @property
+    def wickets(self) -> int:
+        return self.end.wickets - self.start.wickets
+
+
+class _MatchRollup:
+    def __init__(self, phases):
+        self.phases = phases
+        self.innings = 1
+        # None until the first snapshot; the score then is where our overs start, as for MatchState
+        self.last: Optional[Score] = None
+        self.overs: Dict[int, _Over] = {}
+
+
+class RollupBuilder:
+    """Snapshots in, over and phase documents out. Thread-safe.
+
+    titles maps match ids to match titles, from which each match's phases are chosen
+    (see phases_for_title); matches without one use default_phases.
+    """
+
+    def __init__(self, titles: Dict[str, str] = None, default_phases=T20_PHASES, max_lines: int = 6):
+        self.default_phases = default_phases
+        self.max_lines = max_lines
+        self._phases = {str(match_id): phases_for_title(title) for match_id, title in (titles or {}).items()}
+        self._matches: Dict[str, _MatchRollup] = {}
+        self._lock = threading.Lock()
+
+    def set_title(self, match_id: str, title: str):
+        with self._lock:
+            self._phases[str(match_id)] = phases_for_title(title)
+
+    def update(self, row: dict) -> List[dict]:
+        """Fold in one snapshot; returns the over and phase documents it changed"""
+        score = parse_score(row.get("current_score"))
+        if score is None or score.balls == 0:
+            return []
+        match_id = str(row.get("match_id", ""))
+        with self._lock:
+            match = self._matches.get(match_id)
+            if match is None:
+                match = self._matches[match_id] = _MatchRollup(self._phases.get(match_id, self.default_phases))
+            if match.last is not None and score.balls < match.last.balls:
+                # Fewer balls than before: the next innings has started, from nothing.
+                # Fewer runs on the same balls is only a scorer's correction.
+                match.innings += 1
+                match.overs = {}
+                match.last = Score(0, 0, 0)
+            number = (score.balls - 1) // 6 + 1
+            over = match.overs.get(number)
+            if over is None:
+                # Joined mid-innings: the runs before our first snapshot belong to no over we saw
+                over = match.overs[number] = _Over(number, match.last or score)
+            over.end = score
+            over.timestamp = int(row.get("timestamp") or 0)
+            bowlers = [name.strip() for name in str(row.get("bowler") or "").split("/") if is_player(name)]
+            if bowlers:
+                over.bowler = bowlers[0]
+            over.batters = [name.strip() for name in str(row.get("batsman") or "").split("/") if is_player(name)]
+            context = str(row.get("context") or "").strip()
+            if context and context not in over.lines:
+                over.lines = (over.lines + [context])[-self.max_lines:]
+            match.last = score
+
+            teams = {"team1": str(row.get("team1") or ""), "team2": str(row.get("team2") or "")}
+            phase = phase_of(number, match.phases)
+            in_phase = [o for n, o in sorted(match.overs.items()) if phase_of(n, match.phases) == phase]
+            return [self._over_document(match_id, match.innings, over, phase, teams),
+                    self._phase_document(match_id, match.innings, phase, in_phase, teams)]
+
+    def _over_document(self, match_id: str, innings: int, over: _Over, phase: str, teams: dict) -> dict:
+        text = (f"{teams['team1']} v {teams['team2']}, innings {innings}, over {over.number} ({phase}): "
+                f"{over.runs} runs, {over.wickets} wicket{'s' if over.wickets != 1 else ''}"
+                f"{', bowled by ' + over.bowler if over.bowler else ''}. "
+                f"Score {over.end.runs}/{over.end.wickets} after {over.end.balls // 6}.{over.end.balls % 6} overs. "
+                f"Batting: {', '.join(over.batters) or 'unknown'}.")
+        if over.lines:
+            text += " " + "; ".join(over.lines)
+        return {"doc_id": f"{match_id}:{innings}:over:{over.number}", "text": text, "match_id": match_id,
+                "timestamp": over.timestamp, **teams, "level": "over", "innings": innings, "over": over.number,
+                "phase": phase, "runs": over.runs, "wickets": over.wickets, "bowler": over.bowler,
+                "batters": "/".join(over.batters)}
+
+    def _phase_document(self, match_id: str, innings: int, phase: str, overs: List[_Over], teams: dict) -> dict:
+        runs = sum(over.runs for over in overs)
+        wickets = sum(over.wickets for over in overs)
+        balls = sum(over.end.balls - over.start.balls for over in overs)
+        bowlers = Counter(over.bowler for over in overs if over.bowler)
+        batters = list(dict.fromkeys(name for over in overs for name in over.batters))
+        moments = [line for over in overs for line in over.lines
+                   if any(word in line.lower() for word in KEY_MOMENTS)][-self.max_lines:]
+        last = overs[-1]
+        text = (f"{teams['team1']} v {teams['team2']}, innings {innings}, {phase} (overs {overs[0].number}-{last.number}): "
+                f"{runs} runs for {wickets} wicket{'s' if wickets != 1 else ''} at {per_over(runs, balls) or 0} an over. "
+                f"Bowlers: {', '.join(f'{name} ({count} ov)' for name, count in bowlers.most_common()) or 'unknown'}.")
+        if moments:
+            text += " Key moments: " + "; ".join(moments)
+        return {"doc_id": f"{match_id}:{innings}:phase:{phase}", "text": text, "match_id": match_id,
+                "timestamp": last.timestamp, **teams, "level": "phase", "innings": innings, "over": last.number,
+                "phase": phase, "runs": runs, "wickets": wickets,
+                "bowler": bowlers.most_common(1)[0][0] if bowlers else "", "batters": "/".join(batters)}
+
+
+class RollupSubject(pw.io.python.ConnectorSubject):
+    """Feeds RollupBuilder documents into Pathway, upserted by doc_id.
+
+    Subscribe on_change to the live snapshot table (ingestion/live_connector.py) and read
+    this subject with RollupSchema.
+    """
+
+    def __init__(self, builder: RollupBuilder = None):
+        super().__init__()
+        self.builder = builder or RollupBuilder()
+        self._stopped = threading.Event()
+
+    @property
+    def _session_type(self) -> SessionType:
+        return SessionType.UPSERT
+
+    def on_change(self, key, row: dict, time: int, is_addition: bool):
+        if not is_addition:
+            return
+        for document in self.builder.update(row):
+            self.next(**document)
+
+    def run(self):
+        # Documents arrive through on_change; keep the source open until the dataflow stops
+        self._stopped.wait()
+
+    def on_stop(self):
+        self._stopped.set()
+
+
+def read_rollups(pw_table: pw.Table, builder: RollupBuilder = None) -> pw.Table:
+    """Over and phase documents of the matches in the live snapshot table"""
+    subject = RollupSubject(builder)
+    pw.io.subscribe(pw_table, on_change=subject.on_change)
+    return pw.io.python.read(subject, schema=RollupSchema, autocommit_duration_ms=1000)
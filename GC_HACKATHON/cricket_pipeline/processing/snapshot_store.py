@@ -0,0 +1,242 @@
+"""Columnar, append-only store for processed match snapshots (Arrow IPC files).
+
+Layout: <root>/match_id=<id>/part-<first ts>-<last ts>-<random>.arrow, one immutable file per
+flushed batch. Columns are typed and player_stats is flattened into batter/bowler
+columns, so reads never parse text. The time range in each file name lets a reader skip
+files outside a query without opening them; the files it does need are memory-mapped.
+The hive-style directories also work with pyarrow.dataset for season-wide analytics.
+
+    writer = SnapshotWriter("./snapshots")
+    writer.append(processed_row)            # batched, flushed every batch_size rows / max_delay s
+    SnapshotReader("./snapshots").read_match("107563", start=ts0, end=ts1)
+"""
+import csv
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from processing.match_state import is_player, to_float, to_int
+
+BATTERS = 2
+BOWLERS = 2
+PART_PATTERN = re.compile(r"part-(\d+)-(\d+)-\w+\.arrow$")
+
+SCHEMA = pa.schema(
+    [
+        ("match_id", pa.string()),
+        ("timestamp", pa.int64()),
+        ("current_score", pa.string()),
+        ("context", pa.string()),
+        ("team1", pa.string()),
+        ("team2", pa.string()),
+        ("runs", pa.int32()),
+        ("wicket", pa.bool_()),
+    ]
+    + [field for i in range(1, BATTERS + 1) for field in (
+        (f"batter{i}", pa.string()), (f"batter{i}_runs", pa.int32()), (f"batter{i}_balls", pa.int32()))]
+    + [field for i in range(1, BOWLERS + 1) for field in (
+        (f"bowler{i}", pa.string()), (f"bowler{i}_overs", pa.float32()), (f"bowler{i}_runs", pa.int32()),
+        (f"bowler{i}_wickets", pa.int32()))]
+)
+
+
+def flatten_snapshot(row: dict) -> dict:
+    """A processed snapshot (see CricketDataPipeline._process_api_response) as one flat, typed record"""
+    flat = {
+        "match_id": str(row.get("match_id", "")),
+        "timestamp": to_int(row.get("timestamp")),
+        "current_score": row.get("current_score") or "",
+        "context": row.get("context") or "",
+        "team1": row.get("team1") or "",
+        "team2": row.get("team2") or "",
+        "runs": to_int(row.get("runs")),
+        "wicket": bool(row.get("wicket")),
+    }
+    player_stats = row.get("player_stats") or {}
+    if isinstance(player_stats, str):
+        # Rows read back from the old CSV store carry it as JSON text
+        player_stats = json.loads(player_stats or "{}")
+
+    # "batsman"/"bowler" hold "A/B", so players missing from player_stats still get a name column
+    for role, group, names, count, fields in (
+            ("batter", "batsmen", row.get("batsman"), BATTERS, ("runs", "balls")),
+            ("bowler", "bowlers", row.get("bowler"), BOWLERS, ("overs", "runs", "wickets"))):
+        lines = {str(name).strip(): line for name, line in (player_stats.get(group) or {}).items() if is_player(name)}
+        players = list(lines) + [name.strip() for name in str(names or "").split("/")
+                                 if is_player(name) and name.strip() not in lines]
+        for i in range(1, count + 1):
+            name = players[i - 1] if i <= len(players) else None
+            line = lines.get(name) if isinstance(lines.get(name), dict) else {}
+            flat[f"{role}{i}"] = name
+            for field in fields:
+                value = line.get(field)
+                convert = to_float if field == "overs" else to_int
+                flat[f"{role}{i}_{field}"] = convert(value) if value not in (None, "") else None
+    return flat
+
+
+def _partition(match_id: str) -> str:
+    return "match_id=" + re.sub(r"[^A-Za-z0-9_-]", "_", str(match_id))
+
+
+class SnapshotWriter:
+    """Buffers snapshots per match and appends each batch as a new IPC file. Thread-safe.
+
+    A batch is written once it holds batch_size rows, or max_delay seconds after its first
+    row, by a timer, so the last snapshots of a quiet match are not held back. With
+    max_delay None (or infinite) batches wait for batch_size or flush().
+    """
+
+    def __init__(self, root: str = "./snapshots", batch_size: int = 256, max_delay: Optional[float] = 30.0):
+        self.root = Path(root)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._buffers: Dict[str, List[dict]] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+
+    def append(self, row: dict):
+        flat = flatten_snapshot(row)
+        match_id = flat["match_id"]
+        with self._lock:
+            buffer = self._buffers.setdefault(match_id, [])
+            buffer.append(flat)
+            if match_id not in self._timers and self.max_delay is not None and math.isfinite(self.max_delay):
+                timer = self._timers[match_id] = threading.Timer(self.max_delay, self._flush_late, (match_id,))
+                timer.daemon = True
+                timer.start()
+            batch = self._take(match_id) if len(buffer) >= self.batch_size else None
+        if batch:
+            self._write(match_id, batch)
+
+    def extend(self, rows: Iterable[dict]):
+        for row in rows:
+            self.append(row)
+
+    def on_change(self, key, row: dict, time: int, is_addition: bool):
+        """pw.io.subscribe callback: upserts retract the old row first, only additions are new snapshots"""
+        if is_addition:
+            self.append(row)
+
+    def flush(self):
+        with self._lock:
+            batches = {match_id: self._take(match_id) for match_id in list(self._buffers)}
+        for match_id, batch in batches.items():
+            if batch:
+                self._write(match_id, batch)
+
+    close = flush
+
+    def _flush_late(self, match_id: str):
+        with self._lock:
+            # A batch taken in the meantime cancelled this timer; a later one has its own
+            batch = self._take(match_id) if self._timers.get(match_id) is threading.current_thread() else None
+        if batch:
+            self._write(match_id, batch)
+
+    def _take(self, match_id: str) -> List[dict]:
+        timer = self._timers.pop(match_id, None)
+        if timer is not None:
+            timer.cancel()
+        return self._buffers.pop(match_id, [])
+
+    def _write(self, match_id: str, batch: List[dict]):
+        batch.sort(key=lambda flat: flat["timestamp"])
+        table = pa.Table.from_pylist(batch, schema=SCHEMA)
+        directory = self.root / _partition(match_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"part-{batch[0]['timestamp']}-{batch[-1]['timestamp']}-{uuid.uuid4().hex[:8]}.arrow"
+        # Written aside and renamed, so readers never see half a file
+        partial = directory / (name + ".tmp")
+        with pa.OSFile(str(partial), "wb") as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+            writer.write_table(table)
+        os.replace(partial, directory / name)
+
+
+class SnapshotReader:
+    def __init__(self, root: str = "./snapshots"):
+        self.root = Path(root)
+
+    def match_ids(self) -> List[str]:
+        return sorted(path.name.split("=", 1)[1] for path in self.root.glob("match_id=*") if path.is_dir())
+
+    def parts(self, match_id: str, start: int = None, end: int = None) -> List[Path]:
+        """Files of one match that can hold snapshots in [start, end], by the range in their names"""
+        parts = []
+        for path in sorted((self.root / _partition(match_id)).glob("part-*.arrow")):
+            match = PART_PATTERN.search(path.name)
+            if not match:
+                continue
+            first, last = int(match.group(1)), int(match.group(2))
+            if (start is None or last >= start) and (end is None or first <= end):
+                parts.append(path)
+        return parts
+
+    def read_match(self, match_id: str, start: int = None, end: int = None, columns: List[str] = None) -> pa.Table:
+        """A match's snapshots with start <= timestamp <= end, memory-mapped rather than read"""
+        tables = []
+        for path in self.parts(match_id, start, end):
+            with pa.memory_map(str(path), "r") as source:
+                table = _filter_time(pa.ipc.open_file(source).read_all(), start, end)
+            tables.append(table.select(columns) if columns else table)
+        if not tables:
+            return SCHEMA.empty_table().select(columns) if columns else SCHEMA.empty_table()
+        return pa.concat_tables(tables)
+
+    def dataset(self) -> ds.Dataset:
+        """Every match as one pyarrow dataset, for season-wide scans with filter pushdown"""
+        return ds.dataset(str(self.root), format="ipc", partitioning="hive", schema=SCHEMA)
+
+    def scan(self, start: int = None, end: int = None, match_ids: List[str] = None, columns: List[str] = None) -> pa.Table:
+        condition = None
+        for part in (ds.field("timestamp") >= start if start is not None else None,
+                     ds.field("timestamp") <= end if end is not None else None,
+                     ds.field("match_id").isin(match_ids) if match_ids else None):
+            if part is not None:
+                condition = part if condition is None else condition & part
+        return self.dataset().to_table(columns=columns, filter=condition)
+
+
+def _filter_time(table: pa.Table, start: Optional[int], end: Optional[int]) -> pa.Table:
+    mask = None
+    if start is not None:
+        mask = pc.greater_equal(table["timestamp"], start)
+    if end is not None:
+        upper = pc.less_equal(table["timestamp"], end)
+        mask = upper if mask is None else pc.and_(mask, upper)
+    return table if mask is None else table.filter(mask)
+
+
+def backfill_csv(csv_path: str, writer: SnapshotWriter) -> int:
+    """Import a document_store.csv written by pw.io.csv.write (additions only)"""
+    count = 0
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("diff", "1") != "1":
+                continue
+            row["wicket"] = str(row.get("wicket", "")).lower() == "true"
+            writer.append(row)
+            count += 1
+    writer.flush()
+    return count
+
+
+if __name__ == "__main__":
+    # python -m processing.snapshot_store backfill ./document_store.csv [./snapshots]
+    if len(sys.argv) < 3 or sys.argv[1] != "backfill":
+        sys.exit("usage: python -m processing.snapshot_store backfill <document_store.csv> [snapshot dir]")
+    started = time.perf_counter()
+    written = backfill_csv(sys.argv[2], SnapshotWriter(sys.argv[3] if len(sys.argv) > 3 else "./snapshots",
+                                                        batch_size=65536, max_delay=None))
+    print(f"Backfilled {written} snapshots in {time.perf_counter() - started:.2f}s")
@@ -1,18 +1,28 @@
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from pathlib import Path
 import pathway as pw
 from pathway.xpacks.llm.vector_store import VectorStoreServer
+import os
+from processing.embeddings import load_embedder
+from processing.embedding_cache import CachedEmbeddings
+from processing.rollups import RollupBuilder, read_rollups
+
+METADATA_COLUMNS = ["match_id", "timestamp", "team1", "team2", "level", "innings", "over", "phase",
+                    "runs", "wickets", "bowler", "batters"]
 
 # Step 1: Set up LangChain components
-def create_vector_store(pw_table, output_dir="./vector_store"):
+def create_vector_store(pw_table, output_dir="./vector_store", ball_level=None, match_titles=None):
     # Create output directory if it doesn't exist
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
     print("Creating vector store with LangChain integration...")
     
-    # Initialize the embedding model through LangChain
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    # Initialize the embedding model through LangChain; repeated texts come from the cache
+    embeddings = CachedEmbeddings(
+        load_embedder(),
+        os.getenv("EMBEDDING_CACHE", f"{output_dir}/embeddings.sqlite"),
+        batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    )
     
     # Configure text splitter for document chunking
     text_splitter = RecursiveCharacterTextSplitter(
@@ -21,14 +31,31 @@ def create_vector_store(pw_table, output_dir="./vector_store"):
     )
     
     # Step 2: Prepare data for the vector store
-    # Create a connectable table that maintains context and metadata
-    vector_data = pw_table.select(
-        text=pw.this.context,
-        match_id=pw.this.match_id,
-        timestamp=pw.this.timestamp,
-        team1=pw.this.team1,
-        team2=pw.this.team2
-    )
+    # One document per over and per innings phase (processing/rollups.py), updated in place,
+    # instead of one per poll snapshot. The match titles name the format, which sets the phases
+    rollups = read_rollups(pw_table, RollupBuilder(titles=match_titles))
+    vector_data = rollups.select(*[pw.this[column] for column in ["text"] + METADATA_COLUMNS])
+    documents = [vector_data]
+
+    if ball_level is None:
+        ball_level = os.getenv("VECTOR_BALL_LEVEL", "0") == "1"
+    if ball_level:
+        # Every snapshot as well, with the same columns as the rollups
+        documents.append(pw_table.select(
+            text=pw.this.context,
+            match_id=pw.this.match_id,
+            timestamp=pw.this.timestamp,
+            team1=pw.this.team1,
+            team2=pw.this.team2,
+            level="ball",
+            innings=0,
+            over=0,
+            phase="",
+            runs=pw.this.runs,
+            wickets=pw.if_else(pw.this.wicket, 1, 0),
+            bowler=pw.this.bowler,
+            batters=pw.this.batsman
+        ))
 
     
     # Step 3: Create Pathway Vector Store Server
@@ -37,11 +64,11 @@ def create_vector_store(pw_table, output_dir="./vector_store"):
     
     # Initialize the server with LangChain components
     vector_server = VectorStoreServer.from_langchain_components(
-        vector_data,
+        *documents,
         embedder=embeddings,
         splitter=text_splitter,
         text_column="text",
-        metadata_columns=["match_id", "timestamp", "team1", "team2"]
+        metadata_columns=METADATA_COLUMNS
     )
 
     
@@ -75,34 +102,35 @@ def create_vector_store(pw_table, output_dir="./vector_store"):
     # Return server object for client connection in LangGraph
     return vector_server
 
-# Usage in main pipeline
-vector_server = create_vector_store(pw_table, output_dir="./vector_store")
-pw.run()
+if __name__ == "__main__":
+    # Usage in main pipeline
+    vector_server = create_vector_store(pw_table, output_dir="./vector_store")
+    pw.run()
 
-# Step 6: Demonstrate LangChain client connection (for future LangGraph integration)
-print("\nVerifying LangChain client connection to vector store:")
-try:
-    from langchain_community.vectorstores import PathwayVectorClient
-    
-    # Connect to the running server
-    client = PathwayVectorClient(host="127.0.0.1", port=8666)
-    
-    # Test a simple query to verify connection
-    print("Testing vector store with query: 'current match status'")
-    docs = client.similarity_search("current match status", k=2)
-    
-    if docs:
-        print(f"✓ Successfully retrieved {len(docs)} documents")
-        print(f"First result: {docs[0].page_content[:100]}...")
-    else:
-        print("No documents found. Vector store may be empty.")
+    # Step 6: Demonstrate LangChain client connection (for future LangGraph integration)
+    print("\nVerifying LangChain client connection to vector store:")
+    try:
+        from langchain_community.vectorstores import PathwayVectorClient
+    
+        # Connect to the running server
+        client = PathwayVectorClient(host="127.0.0.1", port=8666)
+    
+        # Test a simple query to verify connection
+        print("Testing vector store with query: 'current match status'")
+        docs = client.similarity_search("current match status", k=2)
+    
+        if docs:
+            print(f"✓ Successfully retrieved {len(docs)} documents")
+            print(f"First result: {docs[0].page_content[:100]}...")
+        else:
+            print("No documents found. Vector store may be empty.")
         
-    # Get vector store statistics for verification
-    stats = client.get_vectorstore_statistics()
-    print(f"Vector store stats: {stats}")
+        # Get vector store statistics for verification
+        stats = client.get_vectorstore_statistics()
+        print(f"Vector store stats: {stats}")
     
-except Exception as e:
-    print(f"Error connecting to vector store: {e}")
-    print("Note: This is expected if running in a non-interactive environment")
+    except Exception as e:
+        print(f"Error connecting to vector store: {e}")
+        print("Note: This is expected if running in a non-interactive environment")
 
-print("\nData successfully ingested into Pathway-LangChain vector store!")
+    print("\nData successfully ingested into Pathway-LangChain vector store!")
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Pipeline modules import each other as packages of this directory (processing.*, ingestion.*)
+PIPELINE_DIR = Path(__file__).resolve().parent.parent
+if str(PIPELINE_DIR) not in sys.path:
+    sys.path.insert(0, str(PIPELINE_DIR))
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from processing.ann_index import EmbeddedVectorIndex, normalize  # noqa: E402
+
+
+def trained_index(size=5000, dim=32):
+    rng = np.random.default_rng(1)
+    index = EmbeddedVectorIndex(embedder=None, nprobe=2, train_size=1024)
+    index.add_texts([f"ball {i}" for i in range(size)],
+                    [{"match_id": "1", "timestamp": i, "team1": "IND", "team2": "AUS"} for i in range(size)],
+                    normalize(rng.standard_normal((size, dim))))
+    assert index.stats()["clustered_matches"] == 1
+    return index, rng
+
+
+def test_narrow_filter_on_a_trained_partition_finds_its_rows():
+    index, rng = trained_index()
+    query = rng.standard_normal(32)
+    found = index.search_by_vector(query, k=4, match_id="1", metadata_filter={"start": 4990})
+    assert len(found) == 4
+    assert all(document.metadata["timestamp"] >= 4990 for document, _ in found)
+    # And the best of the ten allowed rows, as an exhaustive scan ranks them
+    scores = index.score_refs(query, [("1", row) for row in range(4990, 5000)])
+    best = [4990 + int(i) for i in np.argsort(-scores)[:4]]
+    assert [document.metadata["timestamp"] for document, _ in found] == best
+
+
+def test_wide_filter_still_probes_clusters():
+    index, rng = trained_index(size=12000)
+    found = index.search_by_vector(rng.standard_normal(32), k=4, match_id="1", metadata_filter={"start": 100})
+    assert len(found) == 4
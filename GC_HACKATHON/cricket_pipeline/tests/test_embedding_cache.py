@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from processing.embedding_cache import CachedEmbeddings  # noqa: E402
+
+
+class SlowEmbedder:
+    def __init__(self, seconds: float = 0.1):
+        self.seconds = seconds
+        self.texts = []
+
+    def embed_documents(self, texts):
+        time.sleep(self.seconds)
+        self.texts += texts
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_caller_cancelled_mid_batch_does_not_break_the_batch(tmp_path):
+    async def run():
+        cache = CachedEmbeddings(SlowEmbedder(), str(tmp_path / "embeddings.sqlite"), batch_size=2, report_every=0)
+        cancelled = asyncio.ensure_future(cache.aembed_documents(["four"]))
+        kept = asyncio.ensure_future(cache.aembed_documents(["sixes"]))
+        await asyncio.sleep(0.02)
+        batches = set(cache._tasks)
+        assert len(batches) == 1
+        cancelled.cancel()
+        assert await kept == [[5.0, 1.0]]
+        # set_result on the cancelled caller's future would fail the batch task
+        await asyncio.gather(*batches)
+        assert not cache._tasks
+
+    asyncio.run(run())
+
+
+def test_caller_cancelled_before_the_batch_is_not_embedded(tmp_path):
+    async def run():
+        embedder = SlowEmbedder(0)
+        cache = CachedEmbeddings(embedder, str(tmp_path / "embeddings.sqlite"), batch_size=8, max_wait=0.05,
+                                 report_every=0)
+        cancelled = asyncio.ensure_future(cache.aembed_documents(["four"]))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        assert await cache.aembed_documents(["sixes"]) == [[5.0, 1.0]]
+        return embedder.texts
+
+    assert asyncio.run(run()) == ["sixes"]
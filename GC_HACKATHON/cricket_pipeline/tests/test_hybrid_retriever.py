@@ -0,0 +1,78 @@
+import zlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from processing.ann_index import EmbeddedVectorIndex  # noqa: E402
+from processing.hybrid_retriever import HybridRetriever  # noqa: E402
+
+
+class WordEmbedder:
+    """Bag of hashed words: texts sharing words are similar, and counting embeddings is easy"""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.embedded = 0
+
+    def _vector(self, text: str) -> list:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode()) % self.dim] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def document(doc_id, text, batters="Virat Kohli/Shubman Gill", bowler="Mitchell Starc", over=1):
+    return {"doc_id": doc_id, "text": text, "match_id": "1", "timestamp": over, "team1": "IND", "team2": "AUS",
+            "level": "over", "innings": 1, "over": over, "phase": "powerplay", "runs": 4, "wickets": 0,
+            "bowler": bowler, "batters": batters}
+
+
+def test_re_emitted_document_replaces_the_old_one():
+    embedder = WordEmbedder()
+    index = EmbeddedVectorIndex(embedder)
+    first = index.on_change(None, document("1:1:over:1", "over 1: 4 runs"), 0, True)
+    assert index.on_change(None, document("1:1:over:1", "over 1: 4 runs"), 0, True) is None
+    assert index.on_change(None, document("1:1:over:1", "over 1: 4 runs"), 0, False) is None
+    second = index.on_change(None, document("1:1:over:1", "over 1: 10 runs, a six"), 0, True)
+    assert first == second and embedder.embedded == 2
+    assert index.stats()["documents"] == 1
+    assert index.documents([second])[0][0] == "over 1: 10 runs, a six"
+
+
+def test_names_come_from_the_document_columns():
+    retriever = HybridRetriever(EmbeddedVectorIndex(WordEmbedder()))
+    retriever.on_change(None, document("1:1:over:1", "over 1: 4 runs"), 0, True)
+    retriever.on_change(None, document("1:1:over:2", "over 2: 1 run", batters="Rohit Sharma/Shubman Gill",
+                                       bowler="Pat Cummins", over=2), 0, True)
+    found = retriever.similarity_search("Kohli", k=4, match_id="1")
+    assert [doc.metadata["over"] for doc in found] == [1]
+    assert [doc.metadata["over"] for doc in retriever.similarity_search("Cummins", k=4)] == [2]
+
+
+def test_updated_document_drops_its_old_postings():
+    retriever = HybridRetriever(EmbeddedVectorIndex(WordEmbedder()))
+    retriever.on_change(None, document("1:1:over:1", "over 1: 4 runs"), 0, True)
+    retriever.on_change(None, document("1:1:over:1", "over 1: 6 runs", batters="Rohit Sharma/Shubman Gill"), 0, True)
+    assert [doc.page_content for doc in retriever.similarity_search("Rohit", k=4)] == ["over 1: 6 runs"]
+    assert retriever.stats()["documents"] == 1
+    # "kohli" is still a known name but picks nothing, so the vector index answers
+    assert [doc.page_content for doc in retriever.similarity_search("Kohli", k=4)] == ["over 1: 6 runs"]
+    assert retriever.stats()["vector_fallback"] == 1
+
+
+def test_names_filtered_out_fall_back_to_the_vector_index():
+    retriever = HybridRetriever(EmbeddedVectorIndex(WordEmbedder()))
+    retriever.on_change(None, document("1:1:over:1", "over 1: 4 runs"), 0, True)
+    found = retriever.similarity_search("Kohli boundaries", k=4, metadata_filter={"team": "IND"})
+    assert [doc.metadata["over"] for doc in found] == [1]
+    assert retriever.similarity_search("Kohli boundaries", k=4, metadata_filter={"team": "ENG"}) == []
+    assert retriever.stats()["vector_fallback"] == 1
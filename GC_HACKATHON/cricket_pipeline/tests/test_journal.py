@@ -0,0 +1,39 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from ingestion.journal import FeedJournal
+from processing.api_response import process_api_response
+
+PIPELINE_DIR = Path(__file__).resolve().parent.parent
+
+
+def payload(livescore, update="ball"):
+    return {"title": "India vs Australia - 1st ODI", "livescore": livescore, "update": update,
+            "batterone": "Virat Kohli*", "battertwo": "Shubman Gill", "bowlerone": "Mitchell Starc"}
+
+
+def test_journal_round_trips_payloads(tmp_path):
+    journal = FeedJournal(str(tmp_path), keyframe_interval=2)
+    payloads = [payload("IND 4/0 (0.1)"), payload("IND 4/0 (0.2)", update="dot"), payload("IND 10/0 (0.3)")]
+    for timestamp, data in enumerate(payloads):
+        journal.record("1", data, timestamp)
+    assert [data for _, data in journal.read("1")] == payloads
+
+
+def test_processed_row_uses_the_recorded_timestamp():
+    row = process_api_response("1", payload("10/0 (0.3)"), 1712345678.9)
+    assert (row["timestamp"], row["team1"], row["team2"], row["runs"]) == (1712345678, "India", "Australia", 10)
+
+
+def test_replay_cli_runs_without_the_pipeline(tmp_path):
+    journal = FeedJournal(str(tmp_path))
+    for timestamp, livescore in enumerate(("IND 4/0 (0.1)", "IND 10/0 (0.2)")):
+        journal.record("1", payload(livescore), timestamp)
+
+    result = subprocess.run([sys.executable, "-m", "ingestion.journal", "--journal", str(tmp_path), "replay", "1",
+                             "--speed", "0"], cwd=PIPELINE_DIR, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.split("Match state:")[0])
+    assert report["snapshots"] == 2
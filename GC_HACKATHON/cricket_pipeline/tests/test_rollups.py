@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("pathway")
+
+from processing.rollups import ODI_PHASES, T20_PHASES, TEST_PHASES, RollupBuilder, phases_for_title  # noqa: E402
+
+
+def row(score, match_id="1", context=""):
+    return {"match_id": match_id, "current_score": score, "timestamp": 1, "team1": "IND", "team2": "AUS",
+            "batsman": "Kohli/Gill", "bowler": "Starc/Cummins", "context": context}
+
+
+def over_doc(documents):
+    return next(document for document in documents if document["level"] == "over")
+
+
+def test_phases_follow_the_title():
+    assert phases_for_title("ind-vs-aus-3rd-odi-india-tour-of-australia-2025") == ODI_PHASES
+    assert phases_for_title("England v India, 2nd Test") == TEST_PHASES
+    assert phases_for_title("ind-vs-aus-1st-t20i") == T20_PHASES
+    assert phases_for_title("") == T20_PHASES
+
+
+def test_odi_match_gets_odi_phase_labels():
+    builder = RollupBuilder(titles={"1": "ind-vs-aus-3rd-odi"})
+    assert over_doc(builder.update(row("60/0 (8.2)")))["phase"] == "powerplay"
+    assert over_doc(RollupBuilder().update(row("60/0 (8.2)")))["phase"] == "middle"
+
+
+def test_first_over_starts_from_the_first_snapshot():
+    builder = RollupBuilder()
+    assert over_doc(builder.update(row("120/3 (14.2)")))["runs"] == 0
+    document = over_doc(builder.update(row("126/3 (14.4)")))
+    assert (document["over"], document["runs"]) == (15, 6)
+
+
+def test_scorer_correction_is_not_a_new_innings():
+    builder = RollupBuilder()
+    builder.update(row("40/0 (4.1)"))
+    builder.update(row("46/0 (4.3)"))
+    document = over_doc(builder.update(row("45/0 (4.3)")))
+    assert (document["innings"], document["runs"]) == (1, 5)
+
+
+def test_second_innings_starts_from_nothing():
+    builder = RollupBuilder()
+    builder.update(row("180/6 (20.0)"))
+    document = over_doc(builder.update(row("5/0 (0.2)")))
+    assert (document["innings"], document["over"], document["runs"]) == (2, 1, 5)
+
+
+def test_documents_carry_the_batters():
+    documents = RollupBuilder().update(row("12/0 (1.4)"))
+    assert [document["batters"] for document in documents] == ["Kohli/Gill", "Kohli/Gill"]
@@ -0,0 +1,77 @@
+import csv
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from processing.snapshot_store import SnapshotReader, SnapshotWriter  # noqa: E402
+
+PIPELINE_DIR = Path(__file__).resolve().parent.parent
+
+
+def snapshot(timestamp, match_id="1"):
+    return {"match_id": match_id, "timestamp": timestamp, "current_score": "10/0 (1.2)", "context": "",
+            "team1": "IND", "team2": "AUS", "batsman": "Kohli/Gill", "bowler": "Starc/Cummins", "runs": 1}
+
+
+def wait_for_rows(reader, match_id, rows, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if reader.read_match(match_id).num_rows == rows:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_quiet_match_is_flushed_after_max_delay(tmp_path):
+    writer = SnapshotWriter(str(tmp_path), batch_size=100, max_delay=0.1)
+    writer.append(snapshot(1))
+    writer.append(snapshot(2))
+    # No further append comes along: the timer writes the batch
+    assert wait_for_rows(SnapshotReader(str(tmp_path)), "1", 2)
+    assert len(SnapshotReader(str(tmp_path)).parts("1")) == 1
+
+
+def test_full_batch_is_written_once(tmp_path):
+    writer = SnapshotWriter(str(tmp_path), batch_size=2, max_delay=0.1)
+    writer.append(snapshot(1))
+    writer.append(snapshot(2))
+    writer.append(snapshot(3))
+    writer.close()
+    time.sleep(0.2)
+    reader = SnapshotReader(str(tmp_path))
+    assert reader.read_match("1")["timestamp"].to_pylist() == [1, 2, 3]
+    assert len(reader.parts("1")) == 2
+
+
+def test_backfill_cli_writes_without_timers(tmp_path):
+    csv_path = tmp_path / "document_store.csv"
+    columns = ["match_id", "timestamp", "current_score", "context", "team1", "team2", "batsman", "bowler",
+               "runs", "wicket", "player_stats", "time", "diff"]
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for timestamp in (1, 2, 3):
+            writer.writerow({**snapshot(timestamp), "wicket": "False", "player_stats": "{}", "time": timestamp,
+                             "diff": 1})
+        writer.writerow({**snapshot(2), "wicket": "False", "player_stats": "{}", "time": 4, "diff": -1})
+
+    result = subprocess.run([sys.executable, "-m", "processing.snapshot_store", "backfill", str(csv_path),
+                             str(tmp_path / "snapshots")], cwd=PIPELINE_DIR, capture_output=True, text=True,
+                            timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert "Traceback" not in result.stderr
+    assert "Backfilled 3 snapshots" in result.stdout
+    assert SnapshotReader(str(tmp_path / "snapshots")).read_match("1")["timestamp"].to_pylist() == [1, 2, 3]
+
+
+def test_no_timer_without_a_finite_max_delay(tmp_path):
+    for max_delay in (None, float("inf")):
+        writer = SnapshotWriter(str(tmp_path), max_delay=max_delay)
+        writer.append(snapshot(1))
+        assert not writer._timers
+        writer.close()
@@ -0,0 +1,21 @@
+from agents.stats import StatsAnalyzerAgent
+
+
+class KeywordClient:
+    """Takes extra keywords the way PathwayVectorClient.similarity_search(query, k, **kwargs) does"""
+
+    def __init__(self):
+        self.calls = []
+
+    def similarity_search(self, query, k=4, **kwargs):
+        self.calls.append((query, kwargs))
+        return []
+
+
+def test_search_passes_match_id_as_a_keyword():
+    client = KeywordClient()
+    StatsAnalyzerAgent(client).search("Kohli against Starc", match_id="107563")
+    StatsAnalyzerAgent(client).search("Kohli against Starc")
+    assert client.calls == [("Kohli against Starc", {"match_id": "107563"}),
+                            ("Kohli against Starc", {})]
+
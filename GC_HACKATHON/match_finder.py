@@ -21,6 +21,7 @@ class CricketMatchFinder:
             print(f"Error fetching matches: {e}")
             return []
 
-finder = CricketMatchFinder()
-live_match_ids = finder.get_live_match_ids()
-print(f"Live Match IDs: {live_match_ids}")
+if __name__ == "__main__":
+    finder = CricketMatchFinder()
+    live_match_ids = finder.get_live_match_ids()
+    print(f"Live Match IDs: {live_match_ids}")